@@ -0,0 +1,391 @@
+"""
+Benchmark das rotas da API contra um MongoDB local.
+
+Popula o banco com volumes configuráveis, dispara requisições concorrentes
+em cada rota dos routers de src/routes/ e grava p50/p95/p99 e throughput
+por endpoint em um arquivo JSON, que pode ser comparado entre commits.
+
+Exemplos:
+    python -m benchmarks.bench_api --seed --users 100000 --cards 1000000 --decks 500000
+    python -m benchmarks.bench_api --requests 500 --concurrency 32 --output bench_output.json
+    python -m benchmarks.bench_api --inmemory --seed --cards 20000 --decks 5000
+    python -m benchmarks.bench_api --include-writes --include-exports --endpoints export
+    python -m benchmarks.bench_api --compare antes.json depois.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+SAMPLE_SIZE = 200
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark das rotas da API TCG")
+    parser.add_argument("--mongo-url", default=os.getenv("BENCH_MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default=os.getenv("BENCH_MONGODB_DATABASE", "tcg_bench"))
+    parser.add_argument("--inmemory", action="store_true", help="Sobe um mongod temporário (requer pymongo_inmemory)")
+    parser.add_argument("--base-url", default=None, help="Usa um servidor já rodando em vez da app em processo")
+
+    parser.add_argument("--seed", action="store_true", help="Popula o banco antes de medir")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--collections", type=int, default=100)
+    parser.add_argument("--cards", type=int, default=10000)
+    parser.add_argument("--decks", type=int, default=5000)
+    parser.add_argument("--rng-seed", type=int, default=42)
+    parser.add_argument("--append", action="store_true", help="Popula sem apagar os dados existentes")
+
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes concorrentes por endpoint")
+    parser.add_argument("--endpoints", default=None, help="Só mede endpoints cujo nome contenha este texto")
+    parser.add_argument("--include-writes", action="store_true", help="Inclui rotas de escrita (POST)")
+    parser.add_argument(
+        "--include-exports", action="store_true", help="Inclui os exports completos de cartas e decks (lêem a collection inteira)"
+    )
+    parser.add_argument("--bulk-size", type=int, default=100, help="Cartas por requisição em POST /cards/bulk")
+    parser.add_argument(
+        "--index-timeout", type=float, default=300, help="Segundos de espera pelos índices em memória (app em processo)"
+    )
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DEPOIS"), help="Compara dois resultados e sai")
+    return parser.parse_args()
+
+
+@asynccontextmanager
+async def mongo_url(args):
+    if not args.inmemory:
+        yield args.mongo_url
+        return
+    try:
+        from pymongo_inmemory import Mongod
+    except ImportError:
+        raise SystemExit("--inmemory requer o pacote 'pymongo_inmemory' instalado")
+    with Mongod() as mongod:
+        yield mongod.connection_string
+
+
+async def seed(args):
+    from script import seed_database
+
+    await seed_database(
+        users=args.users,
+        collections=args.collections,
+        cards=args.cards,
+        decks=args.decks,
+        seed=args.rng_seed,
+        append=args.append,
+    )
+
+
+async def sample_ids(args) -> dict:
+    from src.models.card import Card
+    from src.models.collection import Collection
+    from src.models.deck import Deck
+    from src.models.user import User
+
+    ids = {}
+    for key, model in (("user_id", User), ("collection_id", Collection), ("card_id", Card), ("deck_id", Deck)):
+        rows = await model.aggregate([{"$sample": {"size": SAMPLE_SIZE}}, {"$project": {"_id": 1}}]).to_list()
+        ids[key] = [str(row["_id"]) for row in rows]
+        if not ids[key]:
+            raise SystemExit(f"Collection '{model.get_collection_name()}' vazia: rode com --seed")
+
+    # (formato, carta) tirados de decks reais, para as consultas de /meta
+    # não caírem em cartas que nenhum deck do formato usa
+    rows = await Deck.aggregate([
+        {"$sample": {"size": SAMPLE_SIZE}},
+        {"$match": {"cards.0": {"$exists": True}}},
+        {"$project": {"format": 1, "card": {"$arrayElemAt": ["$cards", 0]}}},
+    ]).to_list()
+    ids["format_card"] = [(row["format"], str(row["card"].id)) for row in rows]
+    return ids
+
+
+async def wait_for_indexes(timeout: float) -> None:
+    """
+    Espera a co-ocorrência e o índice de similaridade ficarem prontos, para
+    que /meta e /decks/{id}/similar não sejam medidos respondendo 503.
+    """
+    from src.core.cooccurrence import engine as cooccurrence
+    from src.core.similarity import index as similarity
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cooccurrence.status not in ("pending", "building") and similarity.status not in ("pending", "building"):
+            return
+        await asyncio.sleep(0.5)
+    print(f"Aviso: índices em memória não ficaram prontos em {timeout:.0f}s")
+
+
+def scenarios(ids: dict, args) -> list[tuple]:
+    """
+    (nome, método, função que monta o path, função que monta o corpo[, headers]).
+    Corpos em bytes são enviados como estão (com os headers do cenário);
+    os demais, como JSON.
+    """
+    pick = lambda key: lambda: random.choice(ids[key])
+    card, collection, deck, user = pick("card_id"), pick("collection_id"), pick("deck_id"), pick("user_id")
+    format_card = pick("format_card")
+    page = lambda: random.randint(1, 20)
+    deck_format = lambda: random.choice(["Standard", "Modern", "Commander", "Pauper"])
+
+    def together():
+        deck_format, card_id = format_card()
+        return f"/meta/{deck_format}/cards/{card_id}/together?k=20"
+
+    items = [
+        ("GET /users/", "GET", lambda: f"/users/?page={page()}", None),
+        ("GET /users/cursor", "GET", lambda: "/users/cursor", None),
+        ("GET /users/{user_id}", "GET", lambda: f"/users/{user()}", None),
+
+        ("GET /collections/", "GET", lambda: f"/collections/?page={page()}", None),
+        ("GET /collections/cursor", "GET", lambda: "/collections/cursor", None),
+        ("GET /collections/{collection_id}", "GET", lambda: f"/collections/{collection()}", None),
+        ("GET /collections/{collection_id}/cards", "GET", lambda: f"/collections/{collection()}/cards", None),
+        ("GET /collections/{collection_id}/cards/cursor", "GET", lambda: f"/collections/{collection()}/cards/cursor", None),
+        ("GET /collections/search", "GET", lambda: "/collections/search?query=Storm", None),
+        ("GET /collections/count", "GET", lambda: "/collections/count", None),
+        ("GET /collections/filter/by-year", "GET", lambda: f"/collections/filter/by-year?year={random.randint(2000, 2024)}", None),
+        ("GET /collections/stats/by-year", "GET", lambda: "/collections/stats/by-year", None),
+        ("GET /collections/stats/with-cards", "GET", lambda: "/collections/stats/with-cards", None),
+
+        ("GET /cards/", "GET", lambda: f"/cards/?page={page()}", None),
+        ("GET /cards/cursor", "GET", lambda: "/cards/cursor", None),
+        ("GET /cards/{card_id}", "GET", lambda: f"/cards/{card()}", None),
+        ("GET /cards/search?mode=contains", "GET", lambda: "/cards/search?query=Dragon%20Celestial%2012&mode=contains", None),
+        ("GET /cards/search?mode=prefix", "GET", lambda: "/cards/search?query=dragon%20celestial%201&mode=prefix", None),
+        ("GET /cards/search?mode=text", "GET", lambda: "/cards/search?query=Dragon&mode=text", None),
+        ("GET /cards/stats/by-rarity", "GET", lambda: "/cards/stats/by-rarity", None),
+        ("GET /cards/stats/by-type", "GET", lambda: "/cards/stats/by-type", None),
+
+        ("GET /decks/", "GET", lambda: f"/decks/?page={page()}", None),
+        ("GET /decks/cursor", "GET", lambda: "/decks/cursor", None),
+        ("GET /decks/search", "GET", lambda: "/decks/search?query=Chamas%201", None),
+        ("GET /decks/by-format/{format}", "GET", lambda: f"/decks/by-format/{random.choice(['Standard', 'Modern', 'Commander', 'Pauper'])}", None),
+        ("GET /decks/by-date", "GET", lambda: "/decks/by-date?start=2024-01-01T00:00:00&end=2024-02-01T00:00:00", None),
+        ("GET /decks/{deck_id}/cards", "GET", lambda: f"/decks/{deck()}/cards", None),
+        ("GET /decks/{deck_id}/cards/cursor", "GET", lambda: f"/decks/{deck()}/cards/cursor", None),
+        ("GET /decks/count", "GET", lambda: "/decks/count", None),
+        ("GET /decks/stats/by-format", "GET", lambda: "/decks/stats/by-format", None),
+        ("GET /decks/summary", "GET", lambda: f"/decks/summary?page={page()}", None),
+        ("GET /decks/{deck_id}/analytics", "GET", lambda: f"/decks/{deck()}/analytics", None),
+        ("POST /decks/analytics", "POST", lambda: "/decks/analytics", lambda: {
+            "deck_ids": random.sample(ids["deck_id"], min(50, len(ids["deck_id"])))
+        }),
+        ("GET /decks/{deck_id}/similar", "GET", lambda: f"/decks/{deck()}/similar?k=10", None),
+
+        ("GET /collections/{collection_id}/cards/export?format=ndjson", "GET",
+         lambda: f"/collections/{collection()}/cards/export?format=ndjson", None),
+        ("GET /collections/{collection_id}/cards/export?format=columnar", "GET",
+         lambda: f"/collections/{collection()}/cards/export?format=columnar", None),
+
+        ("GET /meta/{format}/top-cards", "GET", lambda: f"/meta/{deck_format()}/top-cards?k=20", None),
+        ("GET /meta/{format}/top-cards?names=true", "GET", lambda: f"/meta/{deck_format()}/top-cards?k=20&names=true", None),
+        ("GET /meta/{format}/cards/{card_id}/together", "GET", together, None),
+        ("GET /meta/status", "GET", lambda: "/meta/status", None),
+
+        ("GET /jobs/", "GET", lambda: "/jobs/", None),
+        ("GET /jobs/kinds", "GET", lambda: "/jobs/kinds", None),
+
+        ("GET /health/live", "GET", lambda: "/health/live", None),
+        ("GET /health/ready", "GET", lambda: "/health/ready", None),
+        ("GET /health", "GET", lambda: "/health", None),
+
+        ("GET /admin/cache/stats", "GET", lambda: "/admin/cache/stats", None),
+        ("GET /admin/db/pool", "GET", lambda: "/admin/db/pool", None),
+    ]
+
+    if args.include_exports:
+        items += [
+            ("GET /cards/export?format=ndjson", "GET", lambda: "/cards/export?format=ndjson", None),
+            ("GET /cards/export?format=columnar", "GET", lambda: "/cards/export?format=columnar", None),
+            ("GET /decks/export?format=ndjson", "GET", lambda: "/decks/export?format=ndjson", None),
+            ("GET /decks/export?format=columnar", "GET", lambda: "/decks/export?format=columnar", None),
+        ]
+
+    if args.include_writes:
+        counter = iter(range(10**9))
+        run = int(time.time())
+
+        def bulk_body(size: int) -> bytes:
+            lines = (
+                json.dumps({
+                    "name": f"Bench Bulk {run} {next(counter)}", "type": "Spell", "rarity": "Common",
+                    "text": "Carta importada pelo benchmark", "collection_id": collection(),
+                })
+                for _ in range(size)
+            )
+            return "\n".join(lines).encode()
+
+        items += [
+            ("POST /users/", "POST", lambda: "/users/", lambda: {
+                "name": "Bench User", "email": f"bench_{run}_{next(counter)}@email.com", "password": "123456"
+            }),
+            ("POST /cards/", "POST", lambda: "/cards/", lambda: {
+                "name": f"Bench Card {run} {next(counter)}", "type": "Spell", "rarity": "Common",
+                "text": "Carta criada pelo benchmark", "collection_id": collection()
+            }),
+            ("POST /collections/", "POST", lambda: "/collections/", lambda: {
+                "name": f"Bench Set {run} {next(counter)}", "release_date": "2024-01-20"
+            }),
+            ("POST /decks/", "POST", lambda: "/decks/", lambda: {
+                "name": f"Bench Deck {run} {next(counter)}", "format": "Standard", "owner_id": user()
+            }),
+            ("POST /cards/bulk (NDJSON)", "POST", lambda: "/cards/bulk", lambda: bulk_body(args.bulk_size),
+             {"Content-Type": "application/x-ndjson"}),
+            ("POST /jobs/ (decks.analytics)", "POST", lambda: "/jobs/", lambda: {
+                "kind": "decks.analytics",
+                "params": {"deck_ids": random.sample(ids["deck_id"], min(50, len(ids["deck_id"])))},
+            }),
+        ]
+    return items
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, scenario, total: int, concurrency: int) -> dict:
+    name, method, path_fn, body_fn, *extra = scenario
+    headers = extra[0] if extra else None
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            body = body_fn() if body_fn else None
+            payload = {"content": body} if isinstance(body, bytes) else {"json": body}
+            start = time.perf_counter()
+            response = await client.request(method, path_fn(), headers=headers, **payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 2),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+async def run(args):
+    import httpx
+
+    async with mongo_url(args) as url:
+        os.environ["MONGODB_URL"] = url
+        os.environ["MONGODB_DATABASE"] = args.database
+
+        from main import app
+
+        lifespan = app.router.lifespan_context(app) if args.base_url is None else nullcontext()
+        async with lifespan:
+            if args.base_url is not None:
+                from src.core.database import close_db, init_db
+                await init_db()
+
+            if args.seed:
+                await seed(args)
+            ids = await sample_ids(args)
+
+            if args.base_url is None:
+                await wait_for_indexes(args.index_timeout)
+                transport = httpx.ASGITransport(app=app)
+                base_url = "http://bench"
+            else:
+                transport = None
+                base_url = args.base_url
+
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            results = {}
+            async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+                for scenario in scenarios(ids, args):
+                    if args.endpoints and args.endpoints not in scenario[0]:
+                        continue
+                    # aquecimento: tira conexões e caches frios da medição
+                    await run_scenario(client, scenario, min(args.concurrency, args.requests), args.concurrency)
+                    results[scenario[0]] = await run_scenario(client, scenario, args.requests, args.concurrency)
+                    r = results[scenario[0]]
+                    print(f"{scenario[0]:<50} p50 {r['p50_ms']:>8.2f} ms  p95 {r['p95_ms']:>8.2f} ms  "
+                          f"p99 {r['p99_ms']:>8.2f} ms  {r['throughput_rps']:>8.1f} req/s  erros {r['errors']}")
+
+            if args.base_url is not None:
+                await close_db()
+
+    output = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "requests_per_endpoint": args.requests,
+            "concurrency": args.concurrency,
+            "target": args.base_url or "in-process",
+            "volumes": {
+                "users": args.users, "collections": args.collections,
+                "cards": args.cards, "decks": args.decks,
+            } if args.seed else None,
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(output, indent=2, ensure_ascii=False))
+    print(f"\nResultados gravados em {args.output}")
+
+
+def compare(before_path: str, after_path: str) -> None:
+    before = json.loads(Path(before_path).read_text())["results"]
+    after = json.loads(Path(after_path).read_text())["results"]
+
+    def delta(old, new):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"{'endpoint':<50} {'p50':>22} {'p95':>22} {'req/s':>22}")
+    for name in sorted(set(before) | set(after)):
+        if name not in before or name not in after:
+            print(f"{name:<50} {'(só em ' + (before_path if name in before else after_path) + ')':>22}")
+            continue
+        b, a = before[name], after[name]
+        print(
+            f"{name:<50} "
+            f"{b['p50_ms']:>7.2f} → {a['p50_ms']:>7.2f} {delta(b['p50_ms'], a['p50_ms']):>6} "
+            f"{b['p95_ms']:>7.2f} → {a['p95_ms']:>7.2f} {delta(b['p95_ms'], a['p95_ms']):>6} "
+            f"{b['throughput_rps']:>7.1f} → {a['throughput_rps']:>7.1f} {delta(b['throughput_rps'], a['throughput_rps']):>6}"
+        )
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if arguments.compare:
+        compare(*arguments.compare)
+    else:
+        asyncio.run(run(arguments))
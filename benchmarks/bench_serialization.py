@@ -0,0 +1,133 @@
+"""
+Micro-benchmark da serialização das respostas (sem banco).
+
+Compara, por página, o custo de CPU de:
+- legacy:    validação contra o response_model + dict Python + json.dumps
+             (caminho do FastAPI antes do dump_json)
+- validated: validação + dump_json do pydantic (FastAPI atual, RESPONSE_MODE=validated)
+- fast:      src.core.responses.render, sem revalidação (RESPONSE_MODE=fast)
+
+Também confere que os três produzem o mesmo JSON.
+
+Exemplo:
+    python -m benchmarks.bench_serialization --page-size 50 --deck-size 60
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+from datetime import date, datetime
+from pathlib import Path
+
+from beanie import Link
+from bson import DBRef, ObjectId
+from pydantic import TypeAdapter
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fastapi_pagination import Page  # noqa: E402
+
+from src.core.responses import render  # noqa: E402
+from src.models.card import Card, CardRead  # noqa: E402
+from src.models.collection import CollectionResponse  # noqa: E402
+from src.models.deck import Deck, DeckResponse  # noqa: E402
+from src.models.enums.enums import CardRarity, CardType, DeckFormat  # noqa: E402
+from src.models.user import User, UserRead  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark de serialização das respostas")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--deck-size", type=int, default=60)
+    parser.add_argument("--card-pool", type=int, default=2000, help="Cartas distintas entre os decks da página")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--number", type=int, default=20)
+    return parser.parse_args()
+
+
+# Documentos criados com model_construct: não exigem init_beanie nem banco.
+def make_user(i: int) -> User:
+    return User.model_construct(
+        id=ObjectId(), name=f"User {i}", email=f"user{i}@email.com",
+        password="123456", created_at=datetime(2024, 1, 1, 12, 0, i % 60),
+    )
+
+
+def make_card(i: int, rng: random.Random) -> Card:
+    return Card.model_construct(
+        id=ObjectId(), name=f"Card {i}", type=rng.choice(list(CardType)),
+        rarity=rng.choice(list(CardRarity)), text=f"Card {i} é uma carta poderosa com habilidades únicas.",
+        collection=Link(DBRef("collections", ObjectId()), Card), name_normalized=f"card {i}",
+    )
+
+
+def build_pages(args) -> dict:
+    rng = random.Random(42)
+    users = [make_user(i) for i in range(args.page_size)]
+    pool = [make_card(i, rng) for i in range(args.card_pool)]
+    decks = [
+        Deck.model_construct(
+            id=ObjectId(), name=f"Deck {i}", format=rng.choice(list(DeckFormat)),
+            created_at=datetime(2024, 2, 1), owner=users[i],
+            cards=rng.sample(pool, min(args.deck_size, len(pool))), name_normalized=f"deck {i}",
+        )
+        for i in range(args.page_size)
+    ]
+    page_info = {"total": 10000, "page": 1, "size": args.page_size, "pages": 10000 // args.page_size}
+
+    card_reads = [
+        CardRead(id=card.id, name=card.name, type=card.type, rarity=card.rarity, text=card.text,
+                 collection_id=card.collection.ref.id)
+        for card in pool[:args.page_size]
+    ]
+    user_reads = [UserRead(id=u.id, name=u.name, email=u.email, created_at=u.created_at) for u in users]
+
+    return {
+        "Page[CardRead]": (Page[CardRead], Page[CardRead](items=card_reads, **page_info)),
+        "Page[UserRead]": (Page[UserRead], Page[UserRead](items=user_reads, **page_info)),
+        "Page[Deck]": (Page[Deck], Page[Deck](items=decks, **page_info)),
+        "DeckResponse": (DeckResponse, DeckResponse(
+            id=str(decks[0].id), name=decks[0].name, format=decks[0].format, created_at=decks[0].created_at,
+            owner=decks[0].owner, cards_ids=[str(card.id) for card in decks[0].cards],
+        )),
+        "list[CollectionResponse]": (list[CollectionResponse], [
+            CollectionResponse(id=str(ObjectId()), name=f"Set {i}", release_date=date(2020, 1, 1 + i % 28))
+            for i in range(args.page_size)
+        ]),
+    }
+
+
+def main():
+    args = parse_args()
+    print(f"{'response_model':<26} {'legacy':>12} {'validated':>12} {'fast':>12} {'economia':>10}")
+
+    for name, (model, content) in build_pages(args).items():
+        adapter = TypeAdapter(model)
+
+        def legacy():
+            value = adapter.validate_python(content, from_attributes=True)
+            return json.dumps(adapter.dump_python(value, mode="json", by_alias=True), ensure_ascii=False).encode()
+
+        def validated():
+            value = adapter.validate_python(content, from_attributes=True)
+            return adapter.dump_json(value, by_alias=True)
+
+        def fast():
+            return render(model, content)
+
+        outputs = [json.loads(f()) for f in (legacy, validated, fast)]
+        if not outputs[0] == outputs[1] == outputs[2]:
+            raise SystemExit(f"{name}: as saídas divergem")
+
+        timings = [
+            min(timeit.repeat(f, number=args.number, repeat=args.repeat)) / args.number * 1e6
+            for f in (legacy, validated, fast)
+        ]
+        saved = (timings[1] - timings[2]) / timings[1] * 100
+        print(f"{name:<26} {timings[0]:>9.1f} µs {timings[1]:>9.1f} µs {timings[2]:>9.1f} µs {saved:>9.1f}%")
+
+
+if __name__ == "__main__":
+    main()
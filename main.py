@@ -2,10 +2,17 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi_pagination import add_pagination
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 
 from src.core.database import close_db, init_db
-from src.routes import collections, decks, users, cards
+from src.core.cache import cache
+from src.core.cooccurrence import engine as cooccurrence
+from src.core.deck_summary import ensure_deck_summaries
+from src.core.jobs import scheduler
+from src.core.metrics import MetricsMiddleware, registry
+from src.core.similarity import index as similarity
+from src.core.stats import ensure_stats
+from src.routes import admin, collections, decks, health, jobs, meta, users, cards
 
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +34,11 @@ async def lifespan(app: FastAPI):
     try:
         logger.info("Iniciando aplicação...")
         await init_db()
+        await ensure_stats()
+        await ensure_deck_summaries()
+        cooccurrence.start()
+        similarity.start()
+        await scheduler.start()
         logger.info("Banco de dados inicializado com sucesso!")
         yield
     except Exception as e:
@@ -35,7 +47,11 @@ async def lifespan(app: FastAPI):
     finally:
         logger.info("Encerrando aplicação...")
         try:
+            await scheduler.stop()
+            await cooccurrence.stop()
+            await similarity.stop()
             await close_db()
+            await cache.close()
             logger.info("Conexão com banco de dados fechada com sucesso!")
         except Exception as e:
             logger.error(f"Erro ao fechar conexão com o banco: {e}")
@@ -49,11 +65,16 @@ app = FastAPI(
 )
 
 add_pagination(app)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(collections.router)
 app.include_router(decks.router)
 app.include_router(users.router)
 app.include_router(cards.router)
+app.include_router(admin.router)
+app.include_router(health.router)
+app.include_router(meta.router)
+app.include_router(jobs.router)
 
 
 @app.get("/")
@@ -65,7 +86,7 @@ async def root():
         "openapi": "/openapi.json",
     }
 
-@app.get("/health")
-async def health_check():
-    """Health check para verificar se a API está rodando"""
-    return {"status": "healthy", "service": "API de Filmes"}
\ No newline at end of file
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas de latência HTTP e de comandos MongoDB no formato do Prometheus"""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
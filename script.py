@@ -1,136 +1,286 @@
+"""
+Popula o MongoDB com dados sintéticos de TCG.
+
+Exemplos:
+    python script.py
+    python script.py --users 100000 --cards 1000000 --decks 500000 --seed 7
+    python script.py --append --decks 1000
+"""
+import argparse
 import asyncio
-from datetime import date
 import random
+import time
+from datetime import datetime, timedelta
+
+from bson import DBRef, ObjectId
 
+from src.core.cooccurrence import engine as cooccurrence
 from src.core.database import init_db, close_db
+from src.core.deck_summary import rebuild_deck_summaries
+from src.core.search import normalize_name
+from src.core.similarity import index as similarity
+from src.core.stats import rebuild_stats
 from src.models.user import User
 from src.models.collection import Collection
 from src.models.card import Card
 from src.models.deck import Deck
 from src.models.enums.enums import CardType, CardRarity, DeckFormat
 
+BATCH_SIZE = 5000
+WORKERS = 8
 
-async def seed_database():
-    print("🌱 Populando MongoDB com dados reais...")
-
-    # Limpa coleções
-    await Deck.delete_all()
-    await Card.delete_all()
-    await Collection.delete_all()
-    await User.delete_all()
-
-    # ----------------------
-    # USERS (10)
-    # ----------------------
-    users_data = [
-        ("Paulo Marcelo", "paulo@email.com"),
-        ("Lucas Andrade", "lucas@email.com"),
-        ("Mariana Silva", "mariana@email.com"),
-        ("Rafael Costa", "rafael@email.com"),
-        ("Ana Beatriz", "ana@email.com"),
-        ("Pedro Henrique", "pedro@email.com"),
-        ("Juliana Rocha", "juliana@email.com"),
-        ("Gabriel Souza", "gabriel@email.com"),
-        ("Camila Torres", "camila@email.com"),
-        ("Felipe Martins", "felipe@email.com"),
-    ]
+FIRST_NAMES = ["Paulo", "Lucas", "Mariana", "Rafael", "Ana", "Pedro", "Juliana", "Gabriel", "Camila", "Felipe"]
+LAST_NAMES = ["Marcelo", "Andrade", "Silva", "Costa", "Beatriz", "Henrique", "Rocha", "Souza", "Torres", "Martins"]
+COLLECTION_WORDS = ["Origins", "Eclipse", "Legends", "Storm", "Reign", "Destiny", "Horizon", "Dawn", "Chaos", "Wars"]
+CARD_ADJECTIVES = ["Celestial", "Sombrio", "da Aurora", "Carmesim", "Ancestral", "do Abismo", "Eterno", "do Norte", "do Caos", "da Luz"]
+DECK_WORDS = ["Ascensão", "Sombras", "Chamas", "Guardiões", "Caos", "Aurora", "Reinado", "Fúria", "Luz", "Destino"]
 
-    users = []
-    for name, email in users_data:
-        user = User(name=name, email=email, password="123456")
-        await user.insert()
-        users.append(user)
-
-    # ----------------------
-    # COLLECTIONS (10)
-    # ----------------------
-    collections_data = [
-        ("Base Origins", date(2018, 3, 15)),
-        ("Dark Eclipse", date(2019, 6, 10)),
-        ("Ancient Legends", date(2020, 1, 20)),
-        ("Crystal Storm", date(2020, 11, 5)),
-        ("Shadow Reign", date(2021, 4, 12)),
-        ("Flames of Destiny", date(2021, 9, 30)),
-        ("Frozen Horizon", date(2022, 2, 18)),
-        ("Mythic Dawn", date(2022, 8, 7)),
-        ("Eternal Chaos", date(2023, 3, 22)),
-        ("Celestial Wars", date(2024, 1, 10)),
-    ]
+RARITY_WEIGHTS = {CardRarity.Common: 60, CardRarity.Uncommon: 25, CardRarity.Rare: 12, CardRarity.Mythic: 3}
+DECK_SIZES = {DeckFormat.Commander: 100}
+DEFAULT_DECK_SIZE = 60
+# Data base dos created_at gerados (datetime.utcnow() mudaria a cada execução)
+SEED_EPOCH = datetime(2025, 1, 1)
 
-    collections = []
-    for name, release_date in collections_data:
-        collection = Collection(name=name, release_date=release_date)
-        await collection.insert()
-        collections.append(collection)
-
-    # ----------------------
-    # CARDS (10)
-    # ----------------------
-    cards_data = [
-        ("Dragão Azul Celestial", CardType.Dragon, CardRarity.Rare),
-        ("Mago Sombrio Arcano", CardType.Magician, CardRarity.Rare),
-        ("Guerreiro da Aurora", CardType.Warrior, CardRarity.Common),
-        ("Feiticeira Carmesim", CardType.Magician, CardRarity.Rare),
-        ("Titã de Pedra Ancestral", CardType.Dinosaur, CardRarity.Common),
-        ("Espírito do Abismo", CardType.Dragon, CardRarity.Common),
-        ("Fênix das Chamas Eternas", CardType.Mage, CardRarity.Mythic),
-        ("Guardião do Norte", CardType.Dinosaur, CardRarity.Common),
-        ("Serpente do Caos", CardType.Dragon, CardRarity.Rare),
-        ("Anjo da Luz Final", CardType.Warrior, CardRarity.Mythic),
-    ]
 
-    cards = []
-    for i, (name, ctype, rarity) in enumerate(cards_data):
-        card = Card(
-            name=name,
-            type=ctype,
-            rarity=rarity,
-            text=f"{name} é uma carta poderosa com habilidades únicas.",
-            collection=collections[i % len(collections)],
-        )
-        await card.insert()
-        cards.append(card)
-
-    # ----------------------
-    # DECKS (10)
-    # ----------------------
-    decks_data = [
-        "Ascensão Celestial",
-        "Sombras do Abismo",
-        "Chamas Eternas",
-        "Guardiões Antigos",
-        "Caos Primordial",
-        "Aurora Sagrada",
-        "Reinado das Trevas",
-        "Fúria Elemental",
-        "Luz contra Escuridão",
-        "Destino Final",
+def batch_rng(seed: int, kind: str, index: int) -> random.Random:
+    # Cada lote tem seu próprio gerador: o resultado não depende da ordem
+    # em que os workers concorrentes terminam.
+    return random.Random(f"{seed}:{kind}:{index}")
+
+
+def seeded_ids(seed: int, kind: str, offset: int, count: int) -> list:
+    # IDs tirados do gerador, não de ObjectId(): mesma semente, mesmo grafo.
+    # O offset entra na semente para que um --append não repita IDs.
+    rng = random.Random(f"{seed}:{kind}:ids:{offset}")
+    return [ObjectId(rng.randbytes(12)) for _ in range(count)]
+
+
+def batches(ids: list, offset: int, batch_size: int):
+    for index, start in enumerate(range(0, len(ids), batch_size)):
+        yield index, offset + start, ids[start:start + batch_size]
+
+
+def user_batch(rng, start, ids):
+    return [
+        {
+            "_id": _id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "email": f"user{start + i}@seed.local",
+            "password": "123456",
+            "created_at": SEED_EPOCH - timedelta(days=rng.randrange(1000)),
+        }
+        for i, _id in enumerate(ids)
     ]
 
-    for i, deck_name in enumerate(decks_data):
-        deck = Deck(
-            name=deck_name,
-            format=random.choice(list(DeckFormat)),
-            owner=users[i % len(users)],
-            cards=[
-                cards[i % len(cards)],
-                cards[(i + 1) % len(cards)],
-                cards[(i + 2) % len(cards)],
-            ],
-        )
-        await deck.insert()
 
-    print("✅ Banco populado com dados reais!")
-    print("→ 10 users")
-    print("→ 10 collections")
-    print("→ 10 cards")
-    print("→ 10 decks")
+def collection_batch(rng, start, ids):
+    documents = []
+    for i, _id in enumerate(ids):
+        name = f"{rng.choice(COLLECTION_WORDS)} {start + i}"
+        documents.append({
+            "_id": _id,
+            "name": name,
+            "name_normalized": normalize_name(name),
+            "release_date": datetime(2000 + rng.randrange(25), rng.randint(1, 12), rng.randint(1, 28)),
+        })
+    return documents
+
+
+def card_batch(rng, start, ids, collection_ids):
+    types = list(CardType)
+    rarities, weights = list(RARITY_WEIGHTS), list(RARITY_WEIGHTS.values())
+    documents = []
+    for i, _id in enumerate(ids):
+        card_type = rng.choice(types)
+        # O número garante nomes únicos (índice card_name_unique)
+        name = f"{card_type.value} {rng.choice(CARD_ADJECTIVES)} {start + i}"
+        documents.append({
+            "_id": _id,
+            "name": name,
+            "name_normalized": normalize_name(name),
+            "type": card_type.value,
+            "rarity": rng.choices(rarities, weights)[0].value,
+            "text": f"{name} é uma carta poderosa com habilidades únicas.",
+            "collection": DBRef("collections", rng.choice(collection_ids)),
+        })
+    return documents
+
+
+def deck_batch(rng, start, ids, user_ids, card_ids):
+    formats = list(DeckFormat)
+    documents = []
+    for i, _id in enumerate(ids):
+        deck_format = rng.choice(formats)
+        size = min(DECK_SIZES.get(deck_format, DEFAULT_DECK_SIZE), len(card_ids))
+        name = f"{rng.choice(DECK_WORDS)} {start + i}"
+        documents.append({
+            "_id": _id,
+            "name": name,
+            "name_normalized": normalize_name(name),
+            "format": deck_format.value,
+            "created_at": datetime(2024, 1, 1) + timedelta(minutes=rng.randrange(525600)),
+            "owner": DBRef("users", rng.choice(user_ids)),
+            "cards": [DBRef("cards", card_id) for card_id in rng.sample(card_ids, size)],
+        })
+    return documents
+
+
+async def insert_parallel(model, kind: str, ids: list, offset: int, build, seed: int, batch_size: int, workers: int) -> dict:
+    """
+    Gera e grava os documentos em lotes com insert_many, mantendo até
+    ``workers`` lotes em voo (cada um usa uma conexão do pool).
+    """
+    collection = model.get_pymongo_collection()
+    slots = asyncio.Semaphore(workers)
+    tasks = set()
+    started = time.perf_counter()
+
+    async def write(documents):
+        try:
+            await collection.insert_many(documents, ordered=False)
+        finally:
+            slots.release()
+
+    for index, start, chunk in batches(ids, offset, batch_size):
+        await slots.acquire()
+        documents = build(batch_rng(seed, kind, index), start, chunk)
+        tasks.add(asyncio.create_task(write(documents)))
+    await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - started
+    rate = len(ids) / elapsed if elapsed else 0
+    print(f"→ {len(ids)} {kind} em {elapsed:.2f}s ({rate:,.0f} docs/s)")
+    return {"inserted": len(ids), "seconds": round(elapsed, 3), "docs_per_second": round(rate)}
+
+
+async def existing_ids(model) -> list:
+    cursor = model.get_pymongo_collection().find({}, {"_id": 1}, batch_size=10000, sort=[("_id", 1)])
+    return [row["_id"] async for row in cursor]
+
+
+async def next_suffix(model, field: str, pattern: str) -> int:
+    """
+    Próximo número livre para os nomes gerados: o maior sufixo numérico já
+    usado mais um. Contar os documentos repetiria sufixos depois de uma
+    exclusão (e card_name_unique/user_email_unique recusariam o lote).
+    """
+    rows = await model.aggregate([
+        {"$project": {"match": {"$regexFind": {"input": f"${field}", "regex": pattern}}}},
+        {"$match": {"match": {"$ne": None}}},
+        {"$group": {"_id": None, "max": {"$max": {"$toLong": {"$arrayElemAt": ["$match.captures", 0]}}}}},
+    ]).to_list()
+    return rows[0]["max"] + 1 if rows else 0
+
+
+async def seed_database(
+    users: int = 10,
+    collections: int = 10,
+    cards: int = 10,
+    decks: int = 10,
+    seed: int = 42,
+    append: bool = False,
+    batch_size: int = BATCH_SIZE,
+    workers: int = WORKERS,
+) -> dict:
+    print("🌱 Populando MongoDB com dados sintéticos...")
+
+    if not append:
+        # Limpa coleções
+        await Deck.delete_all()
+        await Card.delete_all()
+        await Collection.delete_all()
+        await User.delete_all()
+
+    # A numeração continua a partir do que já existe para manter nomes e
+    # e-mails únicos no modo append.
+    offsets = {
+        "users": await next_suffix(User, "email", r"^user(\d+)@seed\.local$"),
+        "collections": await next_suffix(Collection, "name", r" (\d+)$"),
+        "cards": await next_suffix(Card, "name", r" (\d+)$"),
+        "decks": await next_suffix(Deck, "name", r" (\d+)$"),
+    }
+
+    user_ids = seeded_ids(seed, "users", offsets["users"], users)
+    collection_ids = seeded_ids(seed, "collections", offsets["collections"], collections)
+    card_ids = seeded_ids(seed, "cards", offsets["cards"], cards)
+    deck_ids = seeded_ids(seed, "decks", offsets["decks"], decks)
+
+    # Decks e cartas só referenciam documentos reais: os novos e, no modo
+    # append, os que já estavam no banco.
+    user_pool, collection_pool, card_pool = user_ids, collection_ids, card_ids
+    if append:
+        if decks:
+            user_pool = user_ids + await existing_ids(User)
+            card_pool = card_ids + await existing_ids(Card)
+        if cards:
+            collection_pool = collection_ids + await existing_ids(Collection)
+
+    if cards and not collection_pool:
+        raise SystemExit("Não há collections para as cartas referenciarem")
+    if decks and (not user_pool or not card_pool):
+        raise SystemExit("Não há users e cartas para os decks referenciarem")
+
+    options = {"seed": seed, "batch_size": batch_size, "workers": workers}
+    started = time.perf_counter()
+    report = {
+        "users": await insert_parallel(User, "users", user_ids, offsets["users"], user_batch, **options),
+        "collections": await insert_parallel(
+            Collection, "collections", collection_ids, offsets["collections"], collection_batch, **options
+        ),
+        "cards": await insert_parallel(
+            Card, "cards", card_ids, offsets["cards"],
+            lambda rng, start, chunk: card_batch(rng, start, chunk, collection_pool), **options
+        ),
+        "decks": await insert_parallel(
+            Deck, "decks", deck_ids, offsets["decks"],
+            lambda rng, start, chunk: deck_batch(rng, start, chunk, user_pool, card_pool), **options
+        ),
+    }
+
+    if decks:
+        # Os lotes gravam só as referências; o resumo vem de um $lookup no servidor
+        await rebuild_deck_summaries()
+    await rebuild_stats()
+    # O índice de similaridade é gravado em disco e a API o carrega no
+    # startup; a co-ocorrência é remontada para conferir o meta gerado
+    # (cada processo da API remonta a sua no startup).
+    await similarity.rebuild()
+    await cooccurrence.rebuild()
+    print(f"→ índice de similaridade com {similarity.info()['decks']} decks em {similarity.path}")
+    print(f"→ co-ocorrência: {cooccurrence.info()['formats']}")
+    elapsed = time.perf_counter() - started
+    total = sum(item["inserted"] for item in report.values())
+    print(f"✅ Banco populado: {total} documentos em {elapsed:.2f}s ({total / elapsed:,.0f} docs/s)")
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Popula o MongoDB com dados sintéticos de TCG")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--collections", type=int, default=10)
+    parser.add_argument("--cards", type=int, default=10)
+    parser.add_argument("--decks", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador (mesma semente, mesmos dados)")
+    parser.add_argument("--append", action="store_true", help="Não apaga os dados existentes")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Lotes gravados em paralelo")
+    return parser.parse_args()
 
 
 async def main():
+    args = parse_args()
     await init_db()
     try:
-        await seed_database()
+        await seed_database(
+            users=args.users,
+            collections=args.collections,
+            cards=args.cards,
+            decks=args.decks,
+            seed=args.seed,
+            append=args.append,
+            batch_size=args.batch_size,
+            workers=args.workers,
+        )
     finally:
         await close_db()
 
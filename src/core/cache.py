@@ -0,0 +1,267 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import bson
+from beanie import Document
+from beanie.odm.utils.dump import get_dict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class LRUCache:
+    """
+    Cache em memória do processo, LRU com TTL por entrada.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            if self._data.pop(key, None) is not None:
+                self.stats.invalidations += 1
+
+    async def info(self) -> dict:
+        return {"backend": self.name, "entries": len(self._data), **self.stats.as_dict()}
+
+    async def close(self) -> None:
+        self._data.clear()
+
+
+class RedisCache:
+    """
+    Cache compartilhado em um servidor compatível com o protocolo Redis.
+    Requer o pacote opcional ``redis``.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL, ttl: float = CACHE_TTL_SECONDS):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requer o pacote 'redis' instalado") from e
+
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._client = Redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self._client.get(key)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        if not keys:
+            return []
+        values = await self._client.mget(keys)
+        hits = sum(1 for value in values if value is not None)
+        self.stats.hits += hits
+        self.stats.misses += len(values) - hits
+        return values
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self._client.set(key, value, px=int(self.ttl * 1000))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            self.stats.invalidations += await self._client.delete(*keys)
+
+    async def info(self) -> dict:
+        server = await self._client.info("stats")
+        return {
+            "backend": self.name,
+            "entries": await self._client.dbsize(),
+            **self.stats.as_dict(),
+            "evictions": server.get("evicted_keys", 0) + server.get("expired_keys", 0),
+        }
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class NullCache:
+    name = "none"
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        self.stats.misses += 1
+        return None
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        self.stats.misses += len(keys)
+        return [None] * len(keys)
+
+    async def set(self, key: str, value: bytes) -> None:
+        pass
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    async def info(self) -> dict:
+        return {"backend": self.name, "entries": 0, **self.stats.as_dict()}
+
+    async def close(self) -> None:
+        pass
+
+
+def build_cache(backend: str = CACHE_BACKEND):
+    if backend == "redis":
+        return RedisCache()
+    if backend == "none":
+        return NullCache()
+    return LRUCache()
+
+
+cache = build_cache()
+
+
+def _id_key(model: type[Document], doc_id) -> str:
+    return f"{model.get_collection_name()}:id:{doc_id}"
+
+
+def _name_key(model: type[Document], name: str) -> str:
+    return f"{model.get_collection_name()}:name:{name}"
+
+
+def _dump(document: Document) -> bytes:
+    return bson.encode(get_dict(document, to_db=True))
+
+
+def _load(model: type[Document], raw: bytes) -> Document:
+    return model.model_validate(bson.decode(raw))
+
+
+async def _store(model: type[Document], document: Document) -> None:
+    raw = _dump(document)
+    await cache.set(_id_key(model, document.id), raw)
+    if getattr(document, "name", None) is not None:
+        await cache.set(_name_key(model, document.name), raw)
+
+
+async def get_cached(model: type[Document], doc_id) -> Optional[Document]:
+    """
+    Busca um documento por ID passando pelo cache (read-through).
+    Resultados inexistentes não são cacheados.
+    """
+    raw = await cache.get(_id_key(model, doc_id))
+    if raw is not None:
+        return _load(model, raw)
+
+    document = await model.get(doc_id)
+    if document is not None:
+        await _store(model, document)
+    return document
+
+
+async def get_cached_by_name(model: type[Document], name: str) -> Optional[Document]:
+    raw = await cache.get(_name_key(model, name))
+    if raw is not None:
+        return _load(model, raw)
+
+    document = await model.find_one({"name": name})
+    if document is not None:
+        await _store(model, document)
+    return document
+
+
+async def get_many_cached(model: type[Document], ids: Iterable) -> dict:
+    """
+    Busca vários documentos por ID: o que estiver no cache é reaproveitado
+    e o restante é lido com uma única query $in.
+    """
+    ids = list(ids)
+    found, missing = {}, []
+    values = await cache.get_many([_id_key(model, doc_id) for doc_id in ids])
+    for doc_id, raw in zip(ids, values):
+        if raw is None:
+            missing.append(doc_id)
+        else:
+            found[doc_id] = _load(model, raw)
+
+    if missing:
+        for document in await model.find({"_id": {"$in": missing}}).to_list():
+            found[document.id] = document
+            await _store(model, document)
+    return found
+
+
+async def invalidate(model: type[Document], doc_id, *names: str) -> None:
+    """
+    Remove do cache as entradas de um documento (por ID e pelos nomes informados).
+    """
+    await cache.delete(_id_key(model, doc_id), *(_name_key(model, name) for name in names if name))
+
+
+async def invalidate_many(model: type[Document], documents: Iterable[tuple]) -> None:
+    """
+    Remove do cache vários documentos de uma vez, a partir de pares (ID, nome).
+    """
+    keys = []
+    for doc_id, name in documents:
+        keys.append(_id_key(model, doc_id))
+        if name:
+            keys.append(_name_key(model, name))
+    if keys:
+        await cache.delete(*keys)
@@ -0,0 +1,216 @@
+import os
+from collections import Counter
+from enum import Enum
+from typing import Awaitable, Callable, Iterable, Optional
+
+from dotenv import load_dotenv
+
+from src.core import stats
+from src.core.cache import invalidate, invalidate_many
+from src.core.cooccurrence import engine as cooccurrence
+from src.core.database import start_session
+from src.core.deck_summary import remove_cards_pipeline
+from src.core.similarity import index as similarity
+from src.models.card import Card
+from src.models.collection import Collection
+from src.models.deck import Deck
+from src.models.enums.enums import DeckFormat
+from src.models.user import User
+
+load_dotenv()
+
+
+class DeletePolicy(str, Enum):
+    cascade = "cascade"
+    restrict = "restrict"
+
+
+# Política padrão por entidade quando a rota não recebe ?policy=
+DELETE_POLICY_CARD = DeletePolicy(os.getenv("DELETE_POLICY_CARD", "cascade"))
+DELETE_POLICY_COLLECTION = DeletePolicy(os.getenv("DELETE_POLICY_COLLECTION", "cascade"))
+DELETE_POLICY_USER = DeletePolicy(os.getenv("DELETE_POLICY_USER", "cascade"))
+# Agrupa as escritas de cada exclusão numa transação (exige replica set)
+DELETE_USE_TRANSACTION = os.getenv("DELETE_USE_TRANSACTION", "false").lower() in ("1", "true", "yes")
+# IDs de cartas por update_many ao tirar as cartas de uma coleção dos decks
+CASCADE_BATCH_SIZE = int(os.getenv("CASCADE_BATCH_SIZE", "10000"))
+
+
+class DeleteRestricted(Exception):
+    """
+    A exclusão foi bloqueada pela política restrict: ainda há documentos
+    que referenciam o alvo (contagens em ``references``).
+    """
+
+    def __init__(self, message: str, references: dict):
+        super().__init__(message)
+        self.message = message
+        self.references = references
+
+
+async def run_writes(operation: Callable[[Optional[object]], Awaitable[dict]]) -> dict:
+    """
+    Executa as escritas de uma exclusão, numa transação quando
+    DELETE_USE_TRANSACTION está ligado (com retry de erros transitórios
+    pelo with_transaction do driver). Sem transação, a ordem das escritas
+    garante que uma falha no meio não deixa referências quebradas: os
+    vínculos são desfeitos antes de o alvo ser apagado.
+
+    A checagem da política restrict fica dentro de ``operation``: com
+    transação, checagem e escritas valem sobre o mesmo snapshot.
+    """
+    if not DELETE_USE_TRANSACTION:
+        return await operation(None)
+    async with start_session() as session:
+        return await session.with_transaction(operation)
+
+
+async def _affected_decks(decks, card_filter: dict, session) -> list:
+    cursor = decks.find(card_filter, {"_id": 1}, session=session)
+    return [deck["_id"] async for deck in cursor]
+
+
+async def _refresh_similarity(deck_ids: Iterable) -> None:
+    """
+    Recalcula no índice de similaridade as assinaturas dos decks que
+    perderam cartas (o índice guarda só o MinHash, não as cartas).
+    """
+    deck_ids = list(deck_ids)
+    if similarity.status == "pending":
+        return
+    decks = Deck.get_pymongo_collection()
+    for start in range(0, len(deck_ids), CASCADE_BATCH_SIZE):
+        cursor = decks.find({"_id": {"$in": deck_ids[start:start + CASCADE_BATCH_SIZE]}}, {"format": 1, "cards": 1})
+        async for deck in cursor:
+            card_ids = [ref.id for ref in deck.get("cards", [])]
+            similarity.on_deck_changed(deck["_id"], DeckFormat(deck["format"]), card_ids)
+
+
+async def delete_card(card: Card, policy: DeletePolicy) -> dict:
+    decks = Deck.get_pymongo_collection()
+    deck_filter = {"cards.$id": card.id}
+    affected: list = []
+
+    async def operation(session) -> dict:
+        if policy == DeletePolicy.restrict:
+            in_decks = await decks.count_documents(deck_filter, session=session)
+            if in_decks:
+                raise DeleteRestricted("A carta está em decks", {"decks": in_decks})
+        affected[:] = await _affected_decks(decks, deck_filter, session)
+        pulled = await decks.update_many(deck_filter, remove_cards_pipeline([card.id]), session=session)
+        deleted = await Card.get_pymongo_collection().delete_one({"_id": card.id}, session=session)
+        return {"cards": deleted.deleted_count, "decks_updated": pulled.modified_count}
+
+    result = await run_writes(operation)
+    await invalidate(Card, card.id, card.name)
+    await stats.on_card_deleted(card)
+    cooccurrence.on_card_deleted(card.id)
+    await _refresh_similarity(affected)
+    return result
+
+
+async def delete_collection(
+    collection: Collection,
+    policy: DeletePolicy,
+    on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+) -> dict:
+    """
+    ``on_progress(processadas, total)`` é chamado a cada lote de cartas
+    retiradas dos decks (usado pelos jobs em background).
+
+    Cada lote é retirado dos decks e apagado pelos próprios IDs; o scan se
+    repete até não sobrar carta na coleção, então uma carta inserida no meio
+    da exclusão também sai dos decks, do cache e das estatísticas.
+    """
+    cards = Card.get_pymongo_collection()
+    decks = Deck.get_pymongo_collection()
+    card_filter = {"collection.$id": collection.id}
+
+    removed: list[tuple] = []
+    affected: set = set()
+    rarities, types = Counter(), Counter()
+    total = await cards.count_documents(card_filter) if on_progress is not None else 0
+
+    async def operation(session) -> dict:
+        if policy == DeletePolicy.restrict:
+            in_collection = await cards.count_documents(card_filter, session=session)
+            if in_collection:
+                raise DeleteRestricted("A coleção ainda tem cartas", {"cards": in_collection})
+
+        # Refeito do zero se o with_transaction tentar de novo
+        removed.clear()
+        affected.clear()
+        rarities.clear()
+        types.clear()
+        decks_updated = deleted_cards = 0
+
+        async def pull(ids: list) -> None:
+            nonlocal decks_updated, deleted_cards
+            deck_filter = {"cards.$id": {"$in": ids}}
+            affected.update(await _affected_decks(decks, deck_filter, session))
+            result = await decks.update_many(deck_filter, remove_cards_pipeline(ids), session=session)
+            deleted = await cards.delete_many({"_id": {"$in": ids}}, session=session)
+            decks_updated += result.modified_count
+            deleted_cards += deleted.deleted_count
+            if on_progress is not None:
+                await on_progress(len(removed), max(total, len(removed)))
+
+        while True:
+            scanned = len(removed)
+            batch = []
+            cursor = cards.find(
+                card_filter, {"name": 1, "type": 1, "rarity": 1}, batch_size=CASCADE_BATCH_SIZE, session=session
+            )
+            async for card in cursor:
+                batch.append(card["_id"])
+                removed.append((card["_id"], card["name"]))
+                rarities[card["rarity"]] += 1
+                types[card["type"]] += 1
+                if len(batch) >= CASCADE_BATCH_SIZE:
+                    await pull(batch)
+                    batch = []
+            if batch:
+                await pull(batch)
+            if len(removed) == scanned:
+                break
+
+        deleted = await Collection.get_pymongo_collection().delete_one({"_id": collection.id}, session=session)
+        return {
+            "collections": deleted.deleted_count,
+            "cards": deleted_cards,
+            "decks_updated": decks_updated,
+        }
+
+    result = await run_writes(operation)
+    await invalidate(Collection, collection.id, collection.name)
+    await invalidate_many(Card, removed)
+    await stats.on_collection_deleted(collection)
+    await stats.on_cards_deleted(rarities, types)
+    for card_id, _ in removed:
+        cooccurrence.on_card_deleted(card_id)
+    await _refresh_similarity(affected)
+    return result
+
+
+async def delete_user(user: User, policy: DeletePolicy) -> dict:
+    decks = Deck.get_pymongo_collection()
+    deck_filter = {"owner.$id": user.id}
+    removed: list[dict] = []
+
+    async def operation(session) -> dict:
+        if policy == DeletePolicy.restrict:
+            owned = await decks.count_documents(deck_filter, session=session)
+            if owned:
+                raise DeleteRestricted("O usuário ainda tem decks", {"decks": owned})
+        # Formato e cartas dos decks apagados, para as estatísticas e os índices em memória
+        removed[:] = await decks.find(deck_filter, {"format": 1, "cards": 1}, session=session).to_list()
+        deleted_decks = await decks.delete_many(deck_filter, session=session)
+        deleted = await User.get_pymongo_collection().delete_one({"_id": user.id}, session=session)
+        return {"users": deleted.deleted_count, "decks": deleted_decks.deleted_count}
+
+    result = await run_writes(operation)
+    await stats.on_decks_deleted(Counter(deck["format"] for deck in removed))
+    for deck in removed:
+        card_ids = [ref.id for ref in deck.get("cards", [])]
+        cooccurrence.on_deck_changed(deck["_id"], DeckFormat(deck["format"]), card_ids, None, [])
+        similarity.on_deck_changed(deck["_id"], None, [])
+    return result
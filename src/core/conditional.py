@@ -0,0 +1,80 @@
+import hashlib
+from typing import Optional
+
+from beanie import Document
+from beanie.odm.actions import ActionDirections, ActionRegistry, EventTypes
+from beanie.odm.utils.dump import get_dict
+from fastapi import HTTPException, Request, Response
+from fastapi_pagination.bases import AbstractPage
+
+
+def make_etag(*parts) -> str:
+    """
+    ETag forte a partir de identificadores e revisões; nunca do corpo da
+    resposta, que não precisa ser montado para responder um 304.
+    """
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest() + '"'
+
+
+def document_etag(document: Document) -> str:
+    return make_etag(document.get_collection_name(), document.id, document.revision)
+
+
+def page_etag(page: AbstractPage, collection_name: str) -> str:
+    """
+    ETag fraco de uma página do fastapi_pagination, calculado sobre a
+    própria página que vai no corpo: total, posição e (_id, revision) dos
+    itens. É fraco porque não cobre o corpo byte a byte, só a identidade e
+    a versão do que está nele.
+    """
+    revisions = [(item.id, item.revision) for item in page.items]
+    return "W/" + make_etag(collection_name, page.page, page.size, page.total, revisions)
+
+
+def _header_tags(value: str) -> list[str]:
+    return [tag.strip() for tag in value.split(",") if tag.strip()]
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Grava o ETag na resposta e, se o If-None-Match do cliente casa com ele
+    (comparação fraca, como manda a RFC 9110), devolve o 304 a retornar.
+    """
+    response.headers["ETag"] = etag
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return None
+    tags = [tag.removeprefix("W/") for tag in _header_tags(header)]
+    if "*" in tags or etag.removeprefix("W/") in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+async def save_if_match(request: Request, document: Document) -> None:
+    """
+    Grava um documento alterado por um PUT. Sem If-Match é o save() comum.
+    Com If-Match, exige que a tag case com a revisão lida (senão 412) e
+    grava com uma única escrita condicional, filtrada por essa revisão: se
+    qualquer outra escrita (com ou sem If-Match, inclusive os $inc diretos
+    em decks) avançou a revisão desde a leitura, nada é gravado e a
+    resposta é 412.
+    """
+    header = request.headers.get("if-match")
+    if header is None:
+        await document.save()
+        return
+    tags = _header_tags(header)
+    if "*" not in tags and document_etag(document) not in tags:
+        raise HTTPException(412, "O recurso foi alterado desde a versão informada em If-Match")
+
+    # Documentos gravados antes do campo existir não têm revision
+    expected = document.revision or {"$in": [0, None]}
+    # Os mesmos hooks do save(): revisão, nome normalizado, resumo do deck...
+    await ActionRegistry.run_actions(document, EventTypes.SAVE, ActionDirections.BEFORE, [])
+    result = await type(document).get_pymongo_collection().update_one(
+        {"_id": document.id, "revision": expected},
+        {"$set": get_dict(document, to_db=True, exclude={"_id"}, keep_nulls=document.get_settings().keep_nulls)},
+    )
+    if not result.matched_count:
+        raise HTTPException(412, "O recurso foi alterado desde a versão informada em If-Match")
+    await ActionRegistry.run_actions(document, EventTypes.SAVE, ActionDirections.AFTER, [])
@@ -0,0 +1,119 @@
+import os
+from typing import Literal, Optional, Union
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field, field_validator
+from pymongo import ReadPreference
+
+load_dotenv()
+
+ENV_PREFIX = "MONGODB_"
+
+ReadPreferenceName = Literal["primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"]
+
+_READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+class MongoSettings(BaseModel):
+    """
+    Configuração do cliente MongoDB. Cada campo é lido da variável de
+    ambiente ``MONGODB_<CAMPO EM MAIÚSCULAS>`` (ou do .env).
+    """
+
+    url: Optional[str] = None
+    database: Optional[str] = None
+    index_mode: Literal["sync", "background", "verify"] = "sync"
+    app_name: str = "tcg-api"
+
+    # Pool de conexões
+    max_pool_size: int = Field(100, ge=1)
+    min_pool_size: int = Field(0, ge=0)
+    max_idle_time_ms: Optional[int] = Field(None, ge=0)
+    wait_queue_timeout_ms: Optional[int] = Field(None, ge=0)
+    max_connecting: int = Field(2, ge=1)
+    connect_timeout_ms: int = Field(20000, ge=0)
+    server_selection_timeout_ms: int = Field(30000, ge=0)
+
+    # Rede
+    compressors: list[Literal["zstd", "snappy", "zlib"]] = []
+
+    # Leitura: perfil padrão (escritas e leituras que precisam do dado mais
+    # recente) e perfis para relatórios e listagens, que toleram atraso.
+    read_preference: ReadPreferenceName = "primary"
+    stats_read_preference: ReadPreferenceName = "primary"
+    list_read_preference: ReadPreferenceName = "primary"
+    max_staleness_seconds: Optional[int] = Field(None, ge=90)
+
+    # Escrita
+    write_concern_w: Union[int, str] = 1
+    write_concern_journal: Optional[bool] = None
+    write_concern_timeout_ms: Optional[int] = Field(None, ge=0)
+
+    @field_validator("compressors", mode="before")
+    @classmethod
+    def split_compressors(cls, value):
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(",") if item.strip()]
+        return value
+
+    @field_validator("write_concern_w", mode="before")
+    @classmethod
+    def parse_write_concern_w(cls, value):
+        if isinstance(value, str) and value.isdigit():
+            return int(value)
+        return value
+
+    @classmethod
+    def from_env(cls) -> "MongoSettings":
+        values = {}
+        for name in cls.model_fields:
+            raw = os.getenv(f"{ENV_PREFIX}{name.upper()}")
+            if raw is not None and raw != "":
+                values[name] = raw
+        return cls.model_validate(values)
+
+    def read_preference_for(self, profile: str):
+        name = {
+            "stats": self.stats_read_preference,
+            "lists": self.list_read_preference,
+        }.get(profile, self.read_preference)
+        mode = _READ_PREFERENCES[name]
+        if self.max_staleness_seconds is not None and name != "primary":
+            mode = type(mode)(max_staleness=self.max_staleness_seconds)
+        return mode
+
+    def client_options(self) -> dict:
+        """
+        Argumentos para o AsyncMongoClient (têm precedência sobre a URL).
+        Opções opcionais não definidas ficam de fora e valem as da URL.
+        """
+        options = {
+            "appname": self.app_name,
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxConnecting": self.max_connecting,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "read_preference": self.read_preference_for("default"),
+            "w": self.write_concern_w,
+        }
+        if self.max_idle_time_ms is not None:
+            options["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.wait_queue_timeout_ms is not None:
+            options["waitQueueTimeoutMS"] = self.wait_queue_timeout_ms
+        if self.compressors:
+            options["compressors"] = ",".join(self.compressors)
+        if self.write_concern_journal is not None:
+            options["journal"] = self.write_concern_journal
+        if self.write_concern_timeout_ms is not None:
+            options["wTimeoutMS"] = self.write_concern_timeout_ms
+        return options
+
+
+settings = MongoSettings.from_env()
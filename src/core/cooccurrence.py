@@ -0,0 +1,461 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import time
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Iterable, Optional
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import ReadPreference
+
+from src.models.deck import Deck
+from src.models.enums.enums import DeckFormat
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover - numpy/scipy são opcionais
+    np = sparse = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+COOCCURRENCE_ENABLED = os.getenv("COOCCURRENCE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Intervalo do rebuild completo; corrige mudanças feitas por outros processos
+# da API (os eventos incrementais só chegam ao processo que fez a escrita).
+COOCCURRENCE_REFRESH_SECONDS = float(os.getenv("COOCCURRENCE_REFRESH_SECONDS", "3600"))
+COOCCURRENCE_BATCH_SIZE = int(os.getenv("COOCCURRENCE_BATCH_SIZE", "2000"))
+
+
+class FormatIndex:
+    """
+    Frequência das cartas e matriz de co-ocorrência esparsa de um formato.
+
+    As cartas são internadas como inteiros; ``pairs[a][b]`` é o número de
+    decks com ``a`` e ``b`` e a diagonal (``pairs[a][a]``) é a frequência
+    de ``a``. A matriz tem duas partes:
+
+    - base: montada no rebuild como ``XᵀX`` (X = incidência decks × cartas)
+      em uma scipy.sparse CSR, quando numpy/scipy estão instalados;
+    - delta: Counters com as mudanças incrementais desde o rebuild (e a
+      matriz inteira, sem numpy/scipy).
+
+    As consultas somam as duas partes e ficam em cache até a próxima mudança.
+    """
+
+    __slots__ = ("decks", "base_counts", "base_pairs", "counts", "pairs", "_totals", "_top", "_similar")
+
+    def __init__(self, decks: int = 0, base_pairs=None):
+        self.decks = decks
+        self.base_pairs = base_pairs
+        self.base_counts = base_pairs.diagonal() if base_pairs is not None else None
+        self.counts: Counter = Counter()
+        self.pairs: defaultdict[int, Counter] = defaultdict(Counter)
+        self._invalidate()
+
+    def add(self, cards: list[int]) -> None:
+        self.decks += 1
+        self.counts.update(cards)
+        for card in cards:
+            # Counter.update roda em C: um deck inteiro por linha da matriz
+            self.pairs[card].update(cards)
+        self._invalidate()
+
+    def remove(self, cards: list[int]) -> None:
+        self.decks -= 1
+        self.counts.subtract(cards)
+        for card in cards:
+            row = self.pairs[card]
+            row.subtract(cards)
+            for other in cards:
+                if row[other] == 0:
+                    del row[other]
+            if not row:
+                del self.pairs[card]
+            if self.counts[card] == 0:
+                del self.counts[card]
+        self._invalidate()
+
+    def _bump(self, card: int, other: int, amount: int) -> None:
+        row = self.pairs[card]
+        value = row[other] + amount
+        if value:
+            row[other] = value
+        else:
+            del row[other]
+            if not row:
+                del self.pairs[card]
+
+    def drop_card(self, card: int) -> None:
+        """
+        Zera a linha e a coluna da carta (carta excluída): os decks que a
+        tinham continuam contados, só sem ela.
+        """
+        row = self.row(card)
+        for other, together in row.items():
+            if together:
+                self._bump(card, other, -together)
+                if other != card:
+                    self._bump(other, card, -together)
+        total = row.get(card, 0)
+        if total:
+            self.counts[card] -= total
+            if not self.counts[card]:
+                del self.counts[card]
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._totals = None
+        self._top = {}
+        self._similar = {}
+
+    def _base_size(self) -> int:
+        return 0 if self.base_counts is None else len(self.base_counts)
+
+    def count(self, card: int) -> int:
+        return self.totals().get(card, 0)
+
+    def totals(self) -> dict[int, int]:
+        """
+        Frequência de todas as cartas do formato (base + delta).
+        """
+        if self._totals is None:
+            totals = {}
+            if self.base_counts is not None:
+                present = np.flatnonzero(self.base_counts)
+                totals = dict(zip(present.tolist(), self.base_counts[present].tolist()))
+            for card, amount in self.counts.items():
+                totals[card] = totals.get(card, 0) + amount
+            self._totals = {card: amount for card, amount in totals.items() if amount > 0}
+        return self._totals
+
+    def top(self, k: int) -> list[tuple[int, int]]:
+        cached = self._top.get(k)
+        if cached is None:
+            cached = self._top[k] = heapq.nsmallest(
+                k, self.totals().items(), key=lambda item: (-item[1], item[0])
+            )
+        return cached
+
+    def row(self, card: int) -> dict[int, int]:
+        row = self._base_row(card)
+        for other, amount in self.pairs.get(card, {}).items():
+            row[other] = row.get(other, 0) + amount
+        return row
+
+    def similar(self, card: int) -> list[tuple[int, int, float]]:
+        """
+        Cartas que mais aparecem junto com ``card``, ordenadas pela
+        similaridade de cosseno (juntas / √(decks de a · decks de b)), que
+        não favorece só as cartas populares em todo o formato.
+        """
+        cached = self._similar.get(card)
+        if cached is None:
+            totals = self.totals()
+            total = totals[card]
+            cached = self._similar[card] = sorted(
+                (
+                    (other, together, together / math.sqrt(total * totals[other]))
+                    for other, together in self.row(card).items()
+                    if other != card and together > 0 and totals.get(other, 0) > 0
+                ),
+                key=lambda item: (-item[2], -item[1], item[0]),
+            )
+        return cached
+
+    def _base_row(self, card: int) -> dict[int, int]:
+        if card >= self._base_size():
+            return {}
+        start, end = self.base_pairs.indptr[card], self.base_pairs.indptr[card + 1]
+        return dict(zip(self.base_pairs.indices[start:end].tolist(), self.base_pairs.data[start:end].tolist()))
+
+    def pair_count(self) -> int:
+        """
+        Quantidade de pares distintos de cartas que já apareceram juntos.
+        """
+        if self.base_pairs is None:
+            return sum(len(row) - 1 for row in self.pairs.values()) // 2
+
+        pairs = int(self.base_pairs.nnz - np.count_nonzero(self.base_counts)) // 2
+        for card, row in self.pairs.items():
+            base_row = self._base_row(card)
+            for other, amount in row.items():
+                if other > card:
+                    before = base_row.get(other, 0)
+                    pairs += (before + amount > 0) - (before > 0)
+        return pairs
+
+
+class FormatBuilder:
+    """
+    Acumula os decks de um formato durante o rebuild. Com numpy/scipy cada
+    lote vira uma matriz de incidência esparsa e a co-ocorrência do lote é
+    ``XᵀX``, somada à dos lotes anteriores; sem eles, os decks vão direto
+    para os Counters do FormatIndex.
+    """
+
+    def __init__(self):
+        self.decks = 0
+        self.matrix = None
+        self.fallback = FormatIndex() if sparse is None else None
+
+    def add_batch(self, batch: list[list[int]], size: int) -> None:
+        if self.fallback is not None:
+            for cards in batch:
+                self.fallback.add(cards)
+            return
+
+        lengths = np.fromiter((len(cards) for cards in batch), dtype=np.int64, count=len(batch))
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        indices = np.fromiter(chain.from_iterable(batch), dtype=np.int32, count=int(indptr[-1]))
+        incidence = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), indices, indptr), shape=(len(batch), size)
+        )
+        partial = (incidence.T @ incidence).tocsr()
+        if self.matrix is None:
+            self.matrix = partial
+        else:
+            self.matrix.resize((size, size))
+            self.matrix = self.matrix + partial
+        self.decks += len(batch)
+
+    def build(self) -> FormatIndex:
+        if self.fallback is not None:
+            return self.fallback
+        return FormatIndex(self.decks, self.matrix)
+
+
+class CooccurrenceEngine:
+    """
+    Popularidade das cartas e co-ocorrência entre decks, por formato, em
+    memória. Um job em background reconstrói tudo periodicamente e as rotas
+    de decks aplicam as mudanças de forma incremental entre os rebuilds.
+    """
+
+    def __init__(self):
+        self._ids: list[ObjectId] = []
+        self._interned: dict[ObjectId, int] = {}
+        self.formats: dict[DeckFormat, FormatIndex] = {}
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.built_at: Optional[float] = None
+        self.build_seconds: Optional[float] = None
+        # Durante um rebuild: último _id lido pelo scan, decks alterados
+        # (versão que o scan contou e versão final) e cartas excluídas, para
+        # reaplicar no índice novo (ver _rebuild).
+        self._scan_position: Optional[ObjectId] = None
+        self._changed: dict[ObjectId, list] = {}
+        self._dropped: list[int] = []
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def _intern(self, ids: Iterable[ObjectId]) -> list[int]:
+        interned = []
+        for card_id in ids:
+            index = self._interned.get(card_id)
+            if index is None:
+                index = self._interned[card_id] = len(self._ids)
+                self._ids.append(card_id)
+            interned.append(index)
+        return interned
+
+    def _lookup(self, card_id: ObjectId) -> Optional[int]:
+        return self._interned.get(card_id)
+
+    @staticmethod
+    def _apply(formats: dict, previous_format, previous: list[int], deck_format, current: list[int]) -> None:
+        if previous_format is not None:
+            formats.setdefault(previous_format, FormatIndex()).remove(previous)
+        if deck_format is not None:
+            formats.setdefault(deck_format, FormatIndex()).add(current)
+
+    def on_deck_changed(
+        self,
+        deck_id: ObjectId,
+        previous_format: Optional[DeckFormat],
+        previous_ids: Iterable[ObjectId],
+        deck_format: Optional[DeckFormat],
+        card_ids: Iterable[ObjectId],
+    ) -> None:
+        """
+        Aplica a mudança de um deck (formato/cartas antes e depois; ``None``
+        no formato indica deck inexistente naquele lado).
+        """
+        if not COOCCURRENCE_ENABLED or self.status == "pending":
+            return
+        previous = (previous_format, self._intern(dict.fromkeys(previous_ids)))
+        current = (deck_format, self._intern(dict.fromkeys(card_ids)))
+        self._apply(self.formats, *previous, *current)
+        if self._scan_position is None:
+            return
+        entry = self._changed.get(deck_id)
+        if entry is None:
+            # Se o scan já passou pelo deck, ele contou o estado anterior
+            scanned = previous if deck_id <= self._scan_position else None
+            self._changed[deck_id] = [scanned, current]
+        else:
+            entry[1] = current
+
+    def on_card_deleted(self, card_id: ObjectId) -> None:
+        """
+        Tira uma carta excluída de todos os formatos. Idempotente, então é
+        sempre reaplicada ao fim de um rebuild em andamento.
+        """
+        card = self._lookup(card_id)
+        if not COOCCURRENCE_ENABLED or self.status == "pending" or card is None:
+            return
+
+        self._drop(self.formats, card)
+        if self._scan_position is not None:
+            self._dropped.append(card)
+
+    @staticmethod
+    def _drop(formats: dict, card: int) -> None:
+        for index in formats.values():
+            index.drop_card(card)
+
+    @staticmethod
+    def _flush(builders: dict, batches: dict, size: int) -> None:
+        for deck_format, batch in batches.items():
+            builders[deck_format].add_batch(batch, size)
+
+    async def rebuild(self) -> None:
+        """
+        Lê todos os decks em ordem de _id (só formato e referências) e monta
+        os índices novos, trocando-os de uma vez ao final.
+        """
+        async with self._lock:
+            await self._rebuild()
+
+    async def _rebuild(self) -> None:
+        """
+        Os decks alterados durante o scan são contados pela versão que o
+        scan leu (que pode ser uma cópia já buscada no lote do cursor antes
+        da mudança) e, no fim, essa versão é trocada pela final. Cartas
+        excluídas no meio são zeradas de novo; as duas correções são
+        idempotentes em relação ao que o scan viu.
+        """
+        started = time.perf_counter()
+        self.status = "building" if self.built_at is None else "refreshing"
+        self._changed = {}
+        self._dropped = []
+        self._scan_position = ObjectId("0" * 24)
+        builders: defaultdict[DeckFormat, FormatBuilder] = defaultdict(FormatBuilder)
+        try:
+            # Do primário: um secundário atrasado devolveria versões anteriores
+            # às mudanças que as rotas já aplicaram em memória.
+            cursor = Deck.get_pymongo_collection().with_options(
+                read_preference=ReadPreference.PRIMARY
+            ).find(
+                {}, {"format": 1, "cards": 1}, batch_size=COOCCURRENCE_BATCH_SIZE
+            ).sort("_id", 1)
+            scanned = 0
+            batches: defaultdict[DeckFormat, list] = defaultdict(list)
+            async for deck in cursor:
+                deck_format = DeckFormat(deck["format"])
+                cards = self._intern(dict.fromkeys(ref.id for ref in deck.get("cards", [])))
+                batches[deck_format].append(cards)
+                self._scan_position = deck["_id"]
+                entry = self._changed.get(deck["_id"])
+                if entry is not None:
+                    entry[0] = (deck_format, cards)
+                scanned += 1
+                if scanned % COOCCURRENCE_BATCH_SIZE == 0:
+                    # O cálculo de cada lote roda numa thread para não travar o event loop
+                    await asyncio.to_thread(self._flush, builders, batches, len(self._ids))
+                    batches = defaultdict(list)
+            await asyncio.to_thread(self._flush, builders, batches, len(self._ids))
+
+            formats = {deck_format: builder.build() for deck_format, builder in builders.items()}
+            for seen, current in self._changed.values():
+                self._apply(formats, *(seen or (None, [])), *current)
+            for card in self._dropped:
+                self._drop(formats, card)
+            self.formats = formats
+            self.status = "ready"
+            self.error = None
+            self.built_at = time.time()
+            self.build_seconds = round(time.perf_counter() - started, 3)
+            logger.info(f"Co-ocorrência de cartas montada: {scanned} decks em {self.build_seconds}s")
+        except Exception as e:
+            self.status = "failed" if self.built_at is None else "ready"
+            self.error = str(e)
+            logger.error(f"Erro ao montar a co-ocorrência de cartas: {e}")
+            raise
+        finally:
+            self._scan_position = None
+            self._changed = {}
+            self._dropped = []
+
+    def top_cards(self, deck_format: DeckFormat, k: int) -> list[dict]:
+        index = self.formats.get(deck_format)
+        if index is None:
+            return []
+        return [
+            {"card_id": self._ids[card], "decks": count, "share": round(count / index.decks, 4)}
+            for card, count in index.top(k)
+        ]
+
+    def similar_cards(self, deck_format: DeckFormat, card_id: ObjectId, k: int) -> Optional[list[dict]]:
+        """
+        Cartas jogadas junto com ``card_id`` no formato; ``None`` se a carta
+        não aparece em nenhum deck do formato.
+        """
+        index = self.formats.get(deck_format)
+        card = self._lookup(card_id)
+        if index is None or card is None or index.count(card) <= 0:
+            return None
+        return [
+            {"card_id": self._ids[other], "together": together, "score": round(score, 4)}
+            for other, together, score in index.similar(card)[:k]
+        ]
+
+    def info(self) -> dict:
+        return {
+            "enabled": COOCCURRENCE_ENABLED,
+            "engine": "scipy" if sparse is not None else "python",
+            "status": self.status,
+            "error": self.error,
+            "built_at": self.built_at,
+            "build_seconds": self.build_seconds,
+            "cards": len(self._ids),
+            "formats": {
+                deck_format.value: {
+                    "decks": index.decks,
+                    "cards": len(index.totals()),
+                    "pairs": index.pair_count(),
+                }
+                for deck_format, index in self.formats.items()
+            },
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.rebuild()
+            except Exception:
+                pass
+            if COOCCURRENCE_REFRESH_SECONDS <= 0:
+                return
+            await asyncio.sleep(COOCCURRENCE_REFRESH_SECONDS)
+
+    def start(self) -> None:
+        if COOCCURRENCE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+engine = CooccurrenceEngine()
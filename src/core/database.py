@@ -1,18 +1,24 @@
-from dotenv import load_dotenv
+import asyncio
+
 from pymongo import AsyncMongoClient
-from beanie import init_beanie
-import os
+from pymongo.asynchronous.collection import AsyncCollection
+from beanie import Document, init_beanie
 import logging
 
 from src.models.user import User
 from src.models.card import Card
 from src.models.collection import Collection
 from src.models.deck import Deck
+from src.models.stats import StatsCounter
+from src.models.job import Job
+from src.core.indexes import cancel_index_build, ensure_indexes
+from src.core.config import settings
+from src.core.metrics import CommandMetrics, pool_metrics
 
 
-load_dotenv()
-DATABASE_URL = os.getenv("MONGODB_URL")
-DBNAME = os.getenv("MONGODB_DATABASE")
+DATABASE_URL = settings.url
+DBNAME = settings.database
+INDEX_MODE = settings.index_mode
 
 
 
@@ -24,31 +30,76 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 _client: AsyncMongoClient | None = None
 
+DOCUMENT_MODELS = [
+    User,
+    Card,
+    Collection,
+    Deck,
+    StatsCounter,
+    Job
+]
+
 
 
 
 async def init_db() -> None:
     """
-    Inicializa o Beanie com os Documents registrados
+    Inicializa o Beanie com os Documents registrados e garante os índices
+    declarados conforme MONGODB_INDEX_MODE (sync, background ou verify).
+    O cliente é configurado a partir de src.core.config.settings.
     """
 
     global _client
-    _client = AsyncMongoClient(DATABASE_URL)
+    _client = AsyncMongoClient(
+        DATABASE_URL,
+        event_listeners=[CommandMetrics(), pool_metrics],
+        **settings.client_options(),
+    )
     db = _client[DBNAME]
 
     await init_beanie(
         database=db,
-        document_models=[
-            User,
-            Card,
-            Collection,
-            Deck
-        ],
+        document_models=DOCUMENT_MODELS,
+        skip_indexes=True,
     )
+    await ensure_indexes(DOCUMENT_MODELS, INDEX_MODE)
 
 async def close_db():
     global _client
+    await cancel_index_build()
     if _client is not None:
-        _client.close()
+        await _client.close()
         logger.info(f"Conexão com o banco de dados {DATABASE_URL} fechada.")
-        _client = None
\ No newline at end of file
+        _client = None
+
+
+def read_collection(model: type[Document], profile: str) -> AsyncCollection:
+    """
+    Collection do model com a read preference do perfil informado
+    ("stats" ou "lists"); escritas continuam indo para o primário.
+    """
+    return model.get_pymongo_collection().with_options(
+        read_preference=settings.read_preference_for(profile)
+    )
+
+
+def start_session():
+    """
+    Sessão do cliente atual, usada para agrupar escritas em transações
+    (exige replica set ou cluster shardado).
+    """
+    return _client.start_session()
+
+
+def pool_stats() -> dict:
+    return {"max_pool_size": settings.max_pool_size, **pool_metrics.as_dict()}
+
+
+async def ping_db(timeout: float) -> None:
+    """
+    Envia um ping ao servidor, falhando se o cliente não existir ou se a
+    resposta não vier dentro de ``timeout`` segundos.
+    """
+    if _client is None:
+        raise RuntimeError("Cliente MongoDB não inicializado")
+    await asyncio.wait_for(_client[DBNAME].command("ping"), timeout)
@@ -0,0 +1,138 @@
+from src.core.database import read_collection
+from src.models.card import Card
+from src.models.collection import Collection
+from src.models.deck import CollectionSpread, Deck, DeckAnalytics, DeckLegality
+from src.models.enums.enums import CardRarity, DeckFormat
+
+# Regras de construção por formato: tamanho do deck e raridades permitidas.
+# Formatos sem "rarities" aceitam qualquer raridade.
+DECK_FORMAT_RULES = {
+    DeckFormat.Standard: {"min_cards": 60},
+    DeckFormat.Modern: {"min_cards": 60},
+    DeckFormat.Commander: {"min_cards": 100, "max_cards": 100},
+    DeckFormat.Pauper: {"min_cards": 60, "rarities": {CardRarity.Common}},
+}
+
+
+def _group_count(key) -> list[dict]:
+    return [
+        {"$group": {"_id": key, "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+    ]
+
+
+def analytics_pipeline(deck_ids: list) -> list[dict]:
+    """
+    Uma agregação para N decks: o $lookup pelas cartas de cada deck roda um
+    $facet com os $group por tipo, raridade e coleção, de modo que só as
+    contagens (e não as cartas) saem do banco.
+    """
+    collection_id = {"$getField": {"field": {"$literal": "$id"}, "input": "$collection"}}
+    return [
+        {"$match": {"_id": {"$in": deck_ids}}},
+        {
+            "$lookup": {
+                "from": Card.get_collection_name(),
+                "localField": "cards.$id",
+                "foreignField": "_id",
+                "pipeline": [
+                    {"$project": {"_id": 0, "type": 1, "rarity": 1, "collection_id": collection_id}},
+                    {
+                        "$facet": {
+                            "found": [{"$count": "total"}],
+                            "types": _group_count("$type"),
+                            "rarities": _group_count("$rarity"),
+                            "collections": [
+                                *_group_count("$collection_id"),
+                                {
+                                    "$lookup": {
+                                        "from": Collection.get_collection_name(),
+                                        "localField": "_id",
+                                        "foreignField": "_id",
+                                        "pipeline": [{"$project": {"_id": 0, "name": 1}}],
+                                        "as": "collection",
+                                    }
+                                },
+                                {
+                                    "$project": {
+                                        "_id": 0,
+                                        "collection_id": "$_id",
+                                        "name": {"$first": "$collection.name"},
+                                        "count": 1,
+                                    }
+                                },
+                            ],
+                        }
+                    },
+                ],
+                "as": "analysis",
+            }
+        },
+        {
+            "$project": {
+                "name": 1,
+                "format": 1,
+                "card_count": {"$size": "$cards"},
+                "analysis": {"$first": "$analysis"},
+            }
+        },
+    ]
+
+
+def check_legality(deck_format: DeckFormat, card_count: int, missing_cards: int, rarities: dict) -> DeckLegality:
+    rules = DECK_FORMAT_RULES.get(deck_format, {})
+    issues = []
+
+    min_cards, max_cards = rules.get("min_cards"), rules.get("max_cards")
+    if min_cards is not None and min_cards == max_cards and card_count != min_cards:
+        issues.append(f"{deck_format.value} exige exatamente {min_cards} cartas (deck tem {card_count})")
+    else:
+        if min_cards is not None and card_count < min_cards:
+            issues.append(f"{deck_format.value} exige no mínimo {min_cards} cartas (deck tem {card_count})")
+        if max_cards is not None and card_count > max_cards:
+            issues.append(f"{deck_format.value} permite no máximo {max_cards} cartas (deck tem {card_count})")
+
+    allowed = rules.get("rarities")
+    if allowed is not None:
+        allowed_values = {rarity.value for rarity in allowed}
+        for rarity, count in rarities.items():
+            if rarity not in allowed_values:
+                issues.append(f"{deck_format.value} não permite cartas {rarity} ({count} no deck)")
+
+    if missing_cards:
+        issues.append(f"{missing_cards} carta(s) referenciada(s) não existem mais")
+
+    return DeckLegality(legal=not issues, issues=issues)
+
+
+def _to_analytics(row: dict) -> DeckAnalytics:
+    analysis = row.get("analysis") or {}
+    found = analysis.get("found") or [{"total": 0}]
+    card_count = row["card_count"]
+    missing_cards = card_count - found[0]["total"]
+    types = {item["_id"]: item["count"] for item in analysis.get("types", [])}
+    rarities = {item["_id"]: item["count"] for item in analysis.get("rarities", [])}
+    deck_format = DeckFormat(row["format"])
+
+    return DeckAnalytics(
+        deck_id=row["_id"],
+        name=row["name"],
+        format=deck_format,
+        card_count=card_count,
+        missing_cards=missing_cards,
+        type_distribution=types,
+        rarity_distribution=rarities,
+        collections=[CollectionSpread(**item) for item in analysis.get("collections", [])],
+        legality=check_legality(deck_format, card_count, missing_cards, rarities),
+    )
+
+
+async def analyze_decks(deck_ids: list) -> dict:
+    """
+    Análise de composição e legalidade dos decks, indexada pelo ID. Lê com o
+    perfil "stats", como os demais relatórios.
+    """
+    if not deck_ids:
+        return {}
+    cursor = await read_collection(Deck, "stats").aggregate(analytics_pipeline(list(deck_ids)))
+    return {row["_id"]: _to_analytics(row) async for row in cursor}
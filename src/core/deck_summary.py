@@ -0,0 +1,193 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+from src.models.card import Card
+from src.models.deck import Deck
+
+logger = logging.getLogger(__name__)
+
+
+# Decks gravados antes do resumo existir não têm o campo; um $filter sobre
+# campo ausente devolve null, que o modelo Deck não aceita.
+CARD_SUMMARY = {"$ifNull": ["$card_summary", []]}
+
+
+def counts_expression(field: str) -> dict:
+    """
+    Expressão de agregação que conta os itens de ``card_summary`` por
+    ``field`` (type ou rarity), no formato {valor: quantidade}.
+    """
+    return {
+        "$arrayToObject": {
+            "$map": {
+                "input": {"$setUnion": [{"$ifNull": [f"$card_summary.{field}", []]}]},
+                "as": "value",
+                "in": {
+                    "k": "$$value",
+                    "v": {
+                        "$size": {
+                            "$filter": {
+                                "input": CARD_SUMMARY,
+                                "as": "card",
+                                "cond": {"$eq": [f"$$card.{field}", "$$value"]},
+                            }
+                        }
+                    },
+                },
+            }
+        }
+    }
+
+
+RECOMPUTE_COUNTS = {
+    "$set": {
+        "type_counts": counts_expression("type"),
+        "rarity_counts": counts_expression("rarity"),
+    }
+}
+
+# Estágio de pipeline equivalente ao {"$inc": {"revision": 1}} das demais
+# escritas diretas em decks: toda mudança no deck muda o ETag.
+BUMP_REVISION = {"$set": {"revision": {"$add": [{"$ifNull": ["$revision", 0]}, 1]}}}
+
+
+def _count_increments(cards: list[Card], amount: int) -> dict:
+    increments = defaultdict(int)
+    for card in cards:
+        increments[f"type_counts.{card.type.value}"] += amount
+        increments[f"rarity_counts.{card.rarity.value}"] += amount
+    return dict(increments)
+
+
+def summary_document(card: Card) -> dict:
+    return {"id": card.id, "name": card.name, "type": card.type.value, "rarity": card.rarity.value}
+
+
+def add_cards_update(cards: list[Card]) -> dict:
+    """
+    Operadores que acrescentam as cartas ao resumo e às contagens do deck.
+    """
+    return {
+        "$push": {"card_summary": {"$each": [summary_document(card) for card in cards]}},
+        "$inc": {**_count_increments(cards, 1), "revision": 1},
+    }
+
+
+def remove_cards_pipeline(card_ids: list) -> list[dict]:
+    """
+    Update em pipeline que tira as cartas de ``cards`` e de ``card_summary``
+    e recalcula as contagens a partir do resumo restante, numa única
+    escrita atômica (não depende de as cartas ainda existirem).
+    """
+    ref_id = {"$getField": {"field": {"$literal": "$id"}, "input": "$$ref"}}
+    return [
+        {
+            "$set": {
+                "cards": {
+                    "$filter": {"input": "$cards", "as": "ref", "cond": {"$not": [{"$in": [ref_id, card_ids]}]}}
+                },
+                "card_summary": {
+                    "$filter": {
+                        "input": CARD_SUMMARY,
+                        "as": "card",
+                        "cond": {"$not": [{"$in": ["$$card.id", card_ids]}]},
+                    }
+                },
+            }
+        },
+        RECOMPUTE_COUNTS,
+        BUMP_REVISION,
+    ]
+
+
+async def on_card_updated(previous: Card, card: Card) -> int:
+    """
+    Propaga nome, tipo e raridade de uma carta para o resumo de todos os
+    decks que a contêm, com um único update_many (arrayFilters).
+    """
+    if (previous.name, previous.type, previous.rarity) == (card.name, card.type, card.rarity):
+        return 0
+
+    update = {
+        "$set": {
+            "card_summary.$[card].name": card.name,
+            "card_summary.$[card].type": card.type.value,
+            "card_summary.$[card].rarity": card.rarity.value,
+        }
+    }
+    increments = {"revision": 1}
+    if previous.type != card.type:
+        increments[f"type_counts.{previous.type.value}"] = -1
+        increments[f"type_counts.{card.type.value}"] = 1
+    if previous.rarity != card.rarity:
+        increments[f"rarity_counts.{previous.rarity.value}"] = -1
+        increments[f"rarity_counts.{card.rarity.value}"] = 1
+    update["$inc"] = increments
+
+    result = await Deck.get_pymongo_collection().update_many(
+        {"card_summary.id": card.id},
+        update,
+        array_filters=[{"card.id": card.id}],
+    )
+    return result.modified_count
+
+
+async def rebuild_deck_summaries(missing_only: bool = False) -> None:
+    """
+    Recalcula card_summary e as contagens de todos os decks no servidor:
+    um $lookup pelas cartas referenciadas e $merge de volta em decks.
+    Usado no backfill de decks gravados antes dos campos existirem
+    (``missing_only`` limita aos decks sem card_summary).
+    """
+    match = [{"$match": {"card_summary": {"$exists": False}}}] if missing_only else []
+    await Deck.get_pymongo_collection().aggregate([
+        *match,
+        {
+            "$lookup": {
+                "from": Card.get_collection_name(),
+                "localField": "cards.$id",
+                "foreignField": "_id",
+                "pipeline": [{"$project": {"_id": 0, "id": "$_id", "name": 1, "type": 1, "rarity": 1}}],
+                "as": "card_summary",
+            }
+        },
+        {"$project": {"card_summary": 1, "revision": 1}},
+        RECOMPUTE_COUNTS,
+        BUMP_REVISION,
+        {
+            "$merge": {
+                "into": Deck.get_collection_name(),
+                "on": "_id",
+                "whenMatched": "merge",
+                "whenNotMatched": "discard",
+            }
+        },
+    ])
+    logger.info("Resumo de cartas dos decks recalculado.")
+
+
+async def ensure_deck_summaries() -> None:
+    """
+    Faz o backfill no startup dos decks que ainda não têm card_summary, para
+    que os $push e os updates em pipeline partam de um resumo completo.
+    """
+    missing = await Deck.get_pymongo_collection().count_documents({"card_summary": {"$exists": False}})
+    if missing:
+        logger.info(f"{missing} decks sem resumo de cartas; recalculando...")
+        await rebuild_deck_summaries(missing_only=True)
+
+
+async def main():
+    from src.core.database import close_db, init_db
+
+    await init_db()
+    try:
+        await rebuild_deck_summaries()
+        print("Resumo de cartas dos decks recalculado")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
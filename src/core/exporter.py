@@ -0,0 +1,97 @@
+import os
+from enum import Enum
+from typing import AsyncIterator, Callable
+
+from dotenv import load_dotenv
+
+from src.core.database import read_collection
+from src.core.responses import dumps
+from src.models.card import Card
+from src.models.deck import Deck
+
+load_dotenv()
+
+# Documentos pedidos ao servidor por getMore e linhas por row group no
+# formato colunar; a memória do export fica limitada a um lote.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    columnar = "columnar"
+
+
+def _ref_id(ref) -> str | None:
+    return str(ref.id) if ref is not None else None
+
+
+# Cada export: projeção lida do banco, colunas de saída e conversão por
+# documento. As linhas de cartas têm os campos do POST /cards/bulk, então
+# um export NDJSON pode ser reimportado.
+CARD_EXPORT = (
+    {"name": 1, "type": 1, "rarity": 1, "text": 1, "collection": 1},
+    ("id", "name", "type", "rarity", "text", "collection_id"),
+    lambda doc: (
+        str(doc["_id"]), doc["name"], doc["type"], doc["rarity"], doc.get("text"), _ref_id(doc.get("collection"))
+    ),
+)
+
+DECK_EXPORT = (
+    {"name": 1, "format": 1, "created_at": 1, "owner": 1, "cards": 1},
+    ("id", "name", "format", "created_at", "owner_id", "card_ids"),
+    lambda doc: (
+        str(doc["_id"]), doc["name"], doc["format"], doc["created_at"], _ref_id(doc.get("owner")),
+        [str(ref.id) for ref in doc.get("cards", [])],
+    ),
+)
+
+
+def _ndjson_chunk(columns: tuple, rows: list[tuple]) -> bytes:
+    return b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def _columnar_chunk(columns: tuple, rows: list[tuple]) -> bytes:
+    """
+    Um row group por linha: {"rows": n, "columns": {coluna: [valores]}}. Os
+    nomes dos campos aparecem uma vez por lote em vez de uma vez por
+    documento, e cada linha pode ser lida isoladamente.
+    """
+    return dumps({"rows": len(rows), "columns": dict(zip(columns, map(list, zip(*rows))))}) + b"\n"
+
+
+async def export_documents(
+    model, query_filter: dict, spec: tuple, export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    """
+    Lê a collection com um cursor em lotes de EXPORT_BATCH_SIZE (perfil de
+    leitura "lists") e devolve um pedaço de saída por lote. Não há sort: a
+    ordem natural evita que o servidor ordene o resultado inteiro em memória.
+    """
+    projection, columns, convert = spec
+    encode: Callable = _ndjson_chunk if export_format == ExportFormat.ndjson else _columnar_chunk
+    if export_format == ExportFormat.columnar:
+        yield dumps({"columns": columns}) + b"\n"
+
+    cursor = read_collection(model, "lists").find(query_filter, projection, batch_size=EXPORT_BATCH_SIZE)
+    rows = []
+    try:
+        async for document in cursor:
+            rows.append(convert(document))
+            if len(rows) >= EXPORT_BATCH_SIZE:
+                yield encode(columns, rows)
+                rows = []
+        if rows:
+            yield encode(columns, rows)
+    finally:
+        # O cliente pode desconectar no meio do download
+        await cursor.close()
+
+
+def export_cards(query_filter: dict, export_format: ExportFormat) -> AsyncIterator[bytes]:
+    return export_documents(Card, query_filter, CARD_EXPORT, export_format)
+
+
+def export_decks(export_format: ExportFormat) -> AsyncIterator[bytes]:
+    return export_documents(Deck, {}, DECK_EXPORT, export_format)
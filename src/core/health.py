@@ -0,0 +1,91 @@
+import asyncio
+import os
+import time
+
+from dotenv import load_dotenv
+
+from src.core.database import ping_db, pool_stats
+from src.core.indexes import index_status
+
+load_dotenv()
+
+HEALTH_PING_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PING_TIMEOUT_SECONDS", "1.0"))
+HEALTH_SLOW_PING_SECONDS = float(os.getenv("HEALTH_SLOW_PING_SECONDS", "0.25"))
+HEALTH_POOL_SATURATION = float(os.getenv("HEALTH_POOL_SATURATION", "0.9"))
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "2.0"))
+
+OK = "ok"
+DEGRADED = "degraded"
+DOWN = "down"
+
+_SEVERITY = {OK: 0, DEGRADED: 1, DOWN: 2}
+
+_lock = asyncio.Lock()
+_cached: tuple[float, dict] | None = None
+
+
+async def check_database() -> dict:
+    started = time.perf_counter()
+    try:
+        await ping_db(HEALTH_PING_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return {"status": DOWN, "error": f"ping sem resposta em {HEALTH_PING_TIMEOUT_SECONDS}s"}
+    except Exception as e:
+        return {"status": DOWN, "error": str(e)}
+
+    latency = time.perf_counter() - started
+    return {
+        "status": DEGRADED if latency > HEALTH_SLOW_PING_SECONDS else OK,
+        "latency_ms": round(latency * 1000, 3),
+    }
+
+
+def check_pool() -> dict:
+    pool = pool_stats()
+    saturation = pool["checked_out"] / pool["max_pool_size"]
+    result = {
+        "status": OK,
+        "saturation": round(saturation, 3),
+        "checked_out": pool["checked_out"],
+        "waiters": pool["waiters"],
+    }
+    if saturation >= HEALTH_POOL_SATURATION or pool["waiters"] > 0:
+        result["status"] = DEGRADED
+    return result
+
+
+def check_indexes() -> dict:
+    state = index_status()
+    missing = sum(len(result["missing"]) for result in state["report"].values())
+    result = {"status": OK, "build": state["status"], "missing": missing}
+    if state["status"] not in ("ready", "verified") or missing:
+        # Sem os índices as consultas funcionam, mas com scans completos
+        result["status"] = DEGRADED
+    if state["error"]:
+        result["error"] = state["error"]
+    return result
+
+
+async def run_checks() -> dict:
+    checks = {
+        "database": await check_database(),
+        "pool": check_pool(),
+        "indexes": check_indexes(),
+    }
+    overall = max((check["status"] for check in checks.values()), key=_SEVERITY.__getitem__)
+    return {"status": overall, "checks": checks}
+
+
+async def readiness() -> dict:
+    """
+    Resultado das verificações de prontidão, reaproveitado por até
+    HEALTH_CACHE_SECONDS: probes concorrentes esperam a mesma verificação
+    em vez de cada uma mandar seu próprio ping ao banco.
+    """
+    global _cached
+    async with _lock:
+        now = time.monotonic()
+        if _cached is None or now - _cached[0] > HEALTH_CACHE_SECONDS:
+            _cached = (now, await run_checks())
+        checked_at, result = _cached
+    return {**result, "age_seconds": round(time.monotonic() - checked_at, 3)}
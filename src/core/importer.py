@@ -0,0 +1,185 @@
+import csv
+import json
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from src.core import stats
+from src.core.cache import get_many_cached
+from src.core.search import normalize_name
+from src.models.card import Card, CardCreate
+from src.models.collection import Collection
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Quebra o corpo da requisição em linhas à medida que os bytes chegam,
+    sem carregar o upload inteiro em memória.
+    """
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8", errors="replace").rstrip("\r")
+
+
+async def iter_ndjson_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    row = 0
+    async for line in iter_lines(stream):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row, None, f"JSON inválido: {e.msg}"
+            continue
+        if not isinstance(data, dict):
+            yield row, None, "Cada linha deve ser um objeto JSON"
+            continue
+        yield row, data, None
+
+
+async def iter_csv_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    Lê CSV com cabeçalho. Campos entre aspas podem conter quebras de linha:
+    as linhas são acumuladas até o número de aspas do registro ficar par.
+    """
+    header = None
+    record = ""
+    row = 0
+    async for line in iter_lines(stream):
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"Esperadas {len(header)} colunas, recebidas {len(values)}"
+            continue
+        data = {key: (value if value != "" else None) for key, value in zip(header, values)}
+        yield row, data, None
+
+    if record:
+        yield row + 1, None, "Registro CSV incompleto (aspas não fechadas)"
+
+
+class ImportReport:
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def error(self, row: int, message) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def _import_chunk(chunk: list[tuple[int, CardCreate]], report: ImportReport) -> None:
+    """
+    Importa um lote já validado: resolve coleções e nomes existentes com
+    uma query $in cada e grava com insert_many não ordenado.
+    """
+    names = [card.name for _, card in chunk]
+    existing_names = set(await Card.distinct("name", {"name": {"$in": names}}))
+    collections = await get_many_cached(Collection, {card.collection_id for _, card in chunk})
+
+    rows, documents = [], []
+    names_in_chunk = set()
+    for row, data in chunk:
+        if data.name in existing_names or data.name in names_in_chunk:
+            report.error(row, f"Carta com o nome '{data.name}' já existe")
+            continue
+        collection = collections.get(data.collection_id)
+        if collection is None:
+            report.error(row, f"Collection com ID {data.collection_id} não existe")
+            continue
+
+        names_in_chunk.add(data.name)
+        rows.append(row)
+        documents.append(Card(
+            name=data.name,
+            type=data.type,
+            rarity=data.rarity,
+            text=data.text,
+            collection=collection,
+            name_normalized=normalize_name(data.name),
+        ))
+
+    if not documents:
+        return
+
+    failed_indexes = set()
+    try:
+        await Card.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            index = write_error["index"]
+            failed_indexes.add(index)
+            if write_error.get("code") == 11000:
+                report.error(rows[index], f"Carta com o nome '{documents[index].name}' já existe")
+            else:
+                report.error(rows[index], write_error.get("errmsg", "Erro ao inserir"))
+
+    delta = stats.StatsDelta()
+    for index, document in enumerate(documents):
+        if index not in failed_indexes:
+            report.inserted += 1
+            stats.card_delta(delta, document, 1)
+    await delta.apply()
+
+
+async def import_cards(rows: AsyncIterator[tuple[int, dict | None, str | None]]) -> dict:
+    """
+    Valida as linhas contra CardCreate e importa em lotes de IMPORT_CHUNK_SIZE.
+    """
+    report = ImportReport()
+    chunk: list[tuple[int, CardCreate]] = []
+
+    async for row, data, error in rows:
+        report.received += 1
+        if error is not None:
+            report.error(row, error)
+            continue
+        try:
+            chunk.append((row, CardCreate(**data)))
+        except ValidationError as e:
+            report.error(row, [
+                {"field": ".".join(str(loc) for loc in err["loc"]), "message": err["msg"]}
+                for err in e.errors()
+            ])
+            continue
+
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            await _import_chunk(chunk, report)
+            chunk = []
+
+    if chunk:
+        await _import_chunk(chunk, report)
+    return report.as_dict()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from typing import Sequence
+
+from beanie import Document
+
+logger = logging.getLogger(__name__)
+
+INDEX_MODES = ("sync", "background", "verify")
+
+# Estado do build de índices, consultado pelo relatório e pelo readiness
+_index_state: dict = {"status": "pending", "error": None, "report": {}}
+_build_task: asyncio.Task | None = None
+
+
+def _declared_indexes(model: type[Document]) -> list:
+    return [index.index for index in model.get_settings().indexes]
+
+
+def _comparable_options(document: dict) -> dict:
+    return {k: v for k, v in document.items() if k not in ("key", "name", "v", "ns", "background")}
+
+
+async def build_indexes(models: Sequence[type[Document]]) -> None:
+    """
+    Cria os índices declarados em Settings.indexes de cada Document.
+    """
+    _index_state["status"] = "building"
+    try:
+        for model in models:
+            indexes = _declared_indexes(model)
+            if indexes:
+                await model.get_pymongo_collection().create_indexes(indexes)
+                logger.info(f"Índices de '{model.get_collection_name()}' garantidos ({len(indexes)})")
+        _index_state["status"] = "ready"
+        _index_state["error"] = None
+    except Exception as e:
+        _index_state["status"] = "failed"
+        _index_state["error"] = str(e)
+        logger.error(f"Erro ao criar índices: {e}")
+        raise
+
+
+async def index_report(models: Sequence[type[Document]]) -> dict:
+    """
+    Compara os índices declarados com os existentes no banco.
+
+    Retorna, por collection, os índices ausentes (``missing``) e os que existem
+    com o mesmo nome ou campos mas com chave/opções diferentes (``drifted``).
+    """
+    report = {}
+    for model in models:
+        existing = await model.get_pymongo_collection().index_information()
+        missing, drifted = [], []
+
+        for index in _declared_indexes(model):
+            declared = index.document
+            declared_key = list(declared["key"].items())
+
+            current = existing.get(declared["name"])
+            if current is None:
+                same_fields = next(
+                    (name for name, info in existing.items() if list(info["key"]) == declared_key),
+                    None,
+                )
+                if same_fields is None:
+                    missing.append(declared["name"])
+                else:
+                    drifted.append({"name": declared["name"], "reason": f"existe como '{same_fields}'"})
+                continue
+
+            current_key = [(field, int(direction) if isinstance(direction, float) else direction)
+                           for field, direction in current["key"]]
+            if current_key != declared_key:
+                drifted.append({"name": declared["name"], "reason": f"chave {current_key} != {declared_key}"})
+            elif _comparable_options(current) != _comparable_options(declared):
+                drifted.append({
+                    "name": declared["name"],
+                    "reason": f"opções {_comparable_options(current)} != {_comparable_options(declared)}",
+                })
+
+        report[model.get_collection_name()] = {"missing": missing, "drifted": drifted}
+
+    _index_state["report"] = report
+    return report
+
+
+def log_index_report(report: dict) -> None:
+    problems = False
+    for collection, result in report.items():
+        for name in result["missing"]:
+            problems = True
+            logger.warning(f"Índice ausente em '{collection}': {name}")
+        for item in result["drifted"]:
+            problems = True
+            logger.warning(f"Índice divergente em '{collection}': {item['name']} ({item['reason']})")
+    if not problems:
+        logger.info("Todos os índices declarados estão presentes e consistentes.")
+
+
+async def ensure_indexes(models: Sequence[type[Document]], mode: str = "sync") -> None:
+    """
+    Garante os índices de acordo com o modo escolhido:
+
+    - ``sync``: cria os índices antes de liberar a aplicação;
+    - ``background``: cria os índices em uma task sem bloquear o startup;
+    - ``verify``: não cria nada, apenas gera o relatório de divergências.
+    """
+    global _build_task
+
+    if mode not in INDEX_MODES:
+        raise ValueError(f"Modo de índices inválido: {mode} (use {', '.join(INDEX_MODES)})")
+
+    if mode == "sync":
+        await build_indexes(models)
+        log_index_report(await index_report(models))
+    elif mode == "background":
+        async def _run():
+            try:
+                await build_indexes(models)
+            except Exception:
+                # Já registrado em _index_state e no log por build_indexes
+                return
+            try:
+                log_index_report(await index_report(models))
+            except Exception as e:
+                _index_state["error"] = str(e)
+                logger.exception("Erro ao gerar o relatório de índices")
+
+        _build_task = asyncio.create_task(_run())
+    else:
+        _index_state["status"] = "verified"
+        log_index_report(await index_report(models))
+
+
+async def cancel_index_build() -> None:
+    global _build_task
+    if _build_task is not None and not _build_task.done():
+        _build_task.cancel()
+        try:
+            await _build_task
+        except asyncio.CancelledError:
+            pass
+    _build_task = None
+
+
+def index_status() -> dict:
+    return dict(_index_state)
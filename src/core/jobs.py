@@ -0,0 +1,334 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from beanie import PydanticObjectId
+from beanie.odm.queries.update import UpdateResponse
+from dotenv import load_dotenv
+
+from src.core import cascade, deck_summary, stats
+from src.core.cooccurrence import engine as cooccurrence
+from src.core.deck_analytics import analyze_decks
+from src.core.similarity import index as similarity
+from src.models.collection import Collection
+from src.models.enums.enums import JobStatus
+from src.models.job import Job
+from src.models.user import User
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+JOBS_CONCURRENCY = int(os.getenv("JOBS_CONCURRENCY", "2"))
+# Intervalo mínimo entre gravações de progresso de um mesmo job
+JOBS_PROGRESS_INTERVAL_SECONDS = float(os.getenv("JOBS_PROGRESS_INTERVAL_SECONDS", "1.0"))
+# Cada instância renova o heartbeat dos seus jobs em execução nesse
+# intervalo; um job running sem heartbeat há JOBS_STALE_SECONDS tem o dono
+# como morto e é marcado como falho por qualquer instância.
+JOBS_HEARTBEAT_SECONDS = float(os.getenv("JOBS_HEARTBEAT_SECONDS", "15"))
+JOBS_STALE_SECONDS = float(os.getenv("JOBS_STALE_SECONDS", "60"))
+
+class JobContext:
+    """
+    Passado para o handler: permite reportar progresso (gravado no job com
+    no máximo uma escrita por JOBS_PROGRESS_INTERVAL_SECONDS).
+    """
+
+    def __init__(self, job: Job):
+        self.job = job
+        self._last_write = 0.0
+
+    async def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        now = time.monotonic()
+        if now - self._last_write < JOBS_PROGRESS_INTERVAL_SECONDS and fraction < 1:
+            return
+        self._last_write = now
+        update = {"progress": round(min(max(fraction, 0.0), 1.0), 4)}
+        if message is not None:
+            update["message"] = message
+        await Job.find_one(Job.id == self.job.id).update({"$set": update})
+
+
+JobHandler = Callable[[JobContext, dict], Awaitable[Optional[dict]]]
+
+JOB_HANDLERS: dict[str, tuple[JobHandler, str]] = {}
+
+
+def job_handler(kind: str, description: str):
+    """
+    Registra um tipo de job. O handler recebe o contexto e os parâmetros e
+    devolve o resultado (dict) gravado no job; exceções viram status failed.
+    """
+
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = (handler, description)
+        return handler
+
+    return register
+
+
+class UnknownJobKind(Exception):
+    pass
+
+
+def _object_id(params: dict, key: str) -> PydanticObjectId:
+    try:
+        return PydanticObjectId(params[key])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Parâmetro {key} ausente ou inválido")
+
+
+@job_handler("stats.rebuild", "Recalcula as estatísticas materializadas")
+async def _rebuild_stats(context: JobContext, params: dict) -> dict:
+    return {"entries": await stats.rebuild_stats()}
+
+
+@job_handler("decks.summaries.rebuild", "Recalcula o resumo de cartas de todos os decks")
+async def _rebuild_deck_summaries(context: JobContext, params: dict) -> None:
+    await deck_summary.rebuild_deck_summaries()
+
+
+@job_handler("meta.rebuild", "Remonta a popularidade e a co-ocorrência das cartas")
+async def _rebuild_cooccurrence(context: JobContext, params: dict) -> dict:
+    await cooccurrence.rebuild()
+    return cooccurrence.info()
+
+
+@job_handler("decks.similarity.rebuild", "Remonta o índice de similaridade de decks")
+async def _rebuild_similarity(context: JobContext, params: dict) -> dict:
+    await similarity.rebuild()
+    return similarity.info()
+
+
+@job_handler("collections.delete", "Exclui uma coleção (params: collection_id, policy)")
+async def _delete_collection(context: JobContext, params: dict) -> dict:
+    collection = await Collection.get(_object_id(params, "collection_id"))
+    if not collection:
+        raise ValueError("Coleção não encontrada")
+
+    async def on_progress(processed: int, total: int) -> None:
+        await context.progress(processed / total if total else 1.0, f"{processed} de {total} cartas retiradas dos decks")
+
+    policy = cascade.DeletePolicy(params.get("policy", cascade.DELETE_POLICY_COLLECTION))
+    try:
+        return await cascade.delete_collection(collection, policy, on_progress)
+    except cascade.DeleteRestricted as e:
+        raise ValueError(f"{e.message}: {e.references}")
+
+
+@job_handler("users.delete", "Exclui um usuário e seus decks (params: user_id, policy)")
+async def _delete_user(context: JobContext, params: dict) -> dict:
+    user = await User.get(_object_id(params, "user_id"))
+    if not user:
+        raise ValueError("Usuário não encontrado")
+    policy = cascade.DeletePolicy(params.get("policy", cascade.DELETE_POLICY_USER))
+    try:
+        return await cascade.delete_user(user, policy)
+    except cascade.DeleteRestricted as e:
+        raise ValueError(f"{e.message}: {e.references}")
+
+
+# Decks por agregação no job de análise, o mesmo limite de POST /decks/analytics
+ANALYTICS_JOB_BATCH_SIZE = 500
+# O resultado fica no documento do job (limite de 16 MB do MongoDB)
+ANALYTICS_JOB_MAX_DECKS = int(os.getenv("ANALYTICS_JOB_MAX_DECKS", "5000"))
+
+
+@job_handler("decks.analytics", "Analisa composição e legalidade de muitos decks (params: deck_ids)")
+async def _analyze_decks(context: JobContext, params: dict) -> dict:
+    deck_ids = [PydanticObjectId(deck_id) for deck_id in params.get("deck_ids", [])]
+    if len(deck_ids) > ANALYTICS_JOB_MAX_DECKS:
+        raise ValueError(f"No máximo {ANALYTICS_JOB_MAX_DECKS} decks por job (recebidos {len(deck_ids)})")
+    results = {}
+    for start in range(0, len(deck_ids), ANALYTICS_JOB_BATCH_SIZE):
+        batch = await analyze_decks(deck_ids[start:start + ANALYTICS_JOB_BATCH_SIZE])
+        results.update((str(deck_id), analysis.model_dump(mode="json")) for deck_id, analysis in batch.items())
+        processed = min(start + ANALYTICS_JOB_BATCH_SIZE, len(deck_ids))
+        await context.progress(processed / len(deck_ids), f"{processed} de {len(deck_ids)} decks analisados")
+    return {"decks": results, "missing": [str(deck_id) for deck_id in deck_ids if str(deck_id) not in results]}
+
+
+class JobScheduler:
+    """
+    Agendador em processo: uma fila asyncio e JOBS_CONCURRENCY workers.
+    Os jobs são gravados na collection jobs antes de entrar na fila, então
+    o estado sobrevive ao processo: no start, os que estavam na fila voltam
+    para ela.
+
+    Cada job em execução registra a instância dona e um heartbeat. Um laço
+    em background renova o heartbeat, cancela as tasks de jobs cancelados
+    por outro processo e marca como falhos os jobs de instâncias que pararam
+    de responder, sem tocar nos jobs que outros processos vivos executam.
+    """
+
+    def __init__(self, concurrency: int = JOBS_CONCURRENCY):
+        self.concurrency = concurrency
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._running: dict[PydanticObjectId, asyncio.Task] = {}
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        await self._reclaim_stale()
+        async for job in Job.find({"status": JobStatus.queued}).sort("created_at"):
+            self._queue.put_nowait(job.id)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for task in list(self._running.values()):
+            task.cancel()
+        tasks = self._workers + ([self._heartbeat] if self._heartbeat is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+
+    async def submit(self, kind: str, params: dict) -> Job:
+        if kind not in JOB_HANDLERS:
+            raise UnknownJobKind(kind)
+        job = Job(kind=kind, params=params)
+        await job.insert()
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def cancel(self, job_id: PydanticObjectId) -> Optional[Job]:
+        """
+        Cancela um job na fila (o worker o descarta) ou em execução (a task
+        recebe CancelledError no próximo await). Jobs já encerrados não mudam.
+        Se o job roda em outro processo, a instância dona cancela a task no
+        seu próximo heartbeat.
+        """
+        job = await Job.find_one(
+            {"_id": job_id, "status": {"$in": [JobStatus.queued, JobStatus.running]}}
+        ).update(
+            {"$set": {"status": JobStatus.cancelled, "finished_at": datetime.utcnow()}},
+            response_type=UpdateResponse.NEW_DOCUMENT,
+        )
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        return job or await Job.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                # Um erro do banco ao iniciar ou encerrar o job não derruba o worker
+                logger.exception(f"Erro no worker ao executar o job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(JOBS_HEARTBEAT_SECONDS)
+            try:
+                await self._beat()
+                await self._reclaim_stale()
+            except Exception as e:
+                logger.error(f"Erro no heartbeat dos jobs: {e}")
+
+    async def _beat(self) -> None:
+        running = list(self._running)
+        if not running:
+            return
+        await Job.find({"_id": {"$in": running}, "status": JobStatus.running}).update_many(
+            {"$set": {"heartbeat_at": datetime.utcnow()}}
+        )
+        # Cancelamentos feitos por outros processos da API
+        async for job in Job.find({"_id": {"$in": running}, "status": JobStatus.cancelled}):
+            task = self._running.get(job.id)
+            if task is not None:
+                task.cancel()
+
+    async def _reclaim_stale(self) -> None:
+        """
+        Marca como falhos os jobs running cujo dono não renova o heartbeat
+        há JOBS_STALE_SECONDS (processo encerrado ou travado). Jobs gravados
+        antes do heartbeat existir também entram, por não terem o campo.
+        """
+        now = datetime.utcnow()
+        await Job.find({
+            "status": JobStatus.running,
+            "$or": [
+                {"heartbeat_at": None},
+                {"heartbeat_at": {"$lt": now - timedelta(seconds=JOBS_STALE_SECONDS)}},
+            ],
+        }).update_many({
+            "$set": {
+                "status": JobStatus.failed,
+                "error": "Interrompido: o processo que executava o job parou de responder",
+                "finished_at": now,
+            }
+        })
+
+    async def _run(self, job_id: PydanticObjectId) -> None:
+        # Só o worker que trocar queued -> running executa o job
+        now = datetime.utcnow()
+        job = await Job.find_one({"_id": job_id, "status": JobStatus.queued}).update(
+            {"$set": {"status": JobStatus.running, "started_at": now, "owner": self.instance_id, "heartbeat_at": now}},
+            response_type=UpdateResponse.NEW_DOCUMENT,
+        )
+        if job is None:
+            return
+
+        handler, _ = JOB_HANDLERS[job.kind]
+        task = asyncio.create_task(handler(JobContext(job), job.params))
+        self._running[job.id] = task
+        update = {}
+        try:
+            result = await task
+            update.update(status=JobStatus.succeeded, progress=1.0, result=result)
+        except asyncio.CancelledError:
+            if self._stopping:
+                task.cancel()
+                update.update(status=JobStatus.failed, error="Interrompido pelo desligamento da aplicação")
+                await asyncio.shield(self._finish(job.id, update))
+                raise
+            update.update(status=JobStatus.cancelled)
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) falhou: {e}")
+            update.update(status=JobStatus.failed, error=str(e))
+        finally:
+            self._running.pop(job.id, None)
+        await self._finish(job.id, update)
+
+    @staticmethod
+    async def _finish(job_id: PydanticObjectId, update: dict) -> None:
+        # Não sobrescreve um cancelamento já gravado pelo cancel()
+        update["finished_at"] = datetime.utcnow()
+        running = {"_id": job_id, "status": JobStatus.running}
+        try:
+            await Job.find_one(running).update({"$set": update})
+        except Exception as e:
+            # Ex.: resultado acima do limite de 16 MB; o job não pode ficar running
+            logger.error(f"Erro ao gravar o fim do job {job_id}: {e}")
+            await Job.find_one(running).update({"$set": {
+                "status": JobStatus.failed,
+                "error": f"Não foi possível gravar o resultado: {e}",
+                "finished_at": update["finished_at"],
+            }})
+
+    def info(self) -> dict:
+        return {
+            "instance": self.instance_id,
+            "concurrency": self.concurrency,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": [str(job_id) for job_id in self._running],
+        }
+
+
+scheduler = JobScheduler()
@@ -0,0 +1,323 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Optional
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+# Rota usada para comandos emitidos fora de uma requisição (startup, jobs, índices)
+NO_ROUTE = "-"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple, float] = defaultdict(int)
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] += amount
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, _labels(self.labels, labels), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self._values[labels] -= amount
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._counts: dict[tuple, list[int]] = {}
+        self._sums: dict[tuple, float] = defaultdict(float)
+
+    def observe(self, value: float, *labels) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def samples(self):
+        for labels, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", _labels(self.labels + ("le",), labels + (bound,)), cumulative
+            cumulative += counts[-1]
+            yield f"{self.name}_bucket", _labels(self.labels + ("le",), labels + ("+Inf",)), cumulative
+            yield f"{self.name}_sum", _labels(self.labels, labels), self._sums[labels]
+            yield f"{self.name}_count", _labels(self.labels, labels), cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Exporta todas as métricas no formato texto do Prometheus (0.0.4).
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "Requisições HTTP atendidas", ("method", "route", "status")
+))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP", ("method", "route")
+))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Tamanho do corpo das respostas HTTP", ("method", "route"), SIZE_BUCKETS
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento"
+))
+mongo_commands = registry.register(Counter(
+    "mongodb_commands_total", "Comandos MongoDB por rota de origem", ("route", "command", "status")
+))
+mongo_latency = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "Latência dos comandos MongoDB por rota de origem", ("route", "command")
+))
+mongo_commands_per_request = registry.register(Histogram(
+    "mongodb_commands_per_request", "Comandos MongoDB emitidos por requisição", ("route",), COUNT_BUCKETS
+))
+singleflight_calls = registry.register(Counter(
+    "singleflight_calls_total", "Leituras deduplicadas: leader executou, coalesced reaproveitou", ("name", "result")
+))
+singleflight_in_flight = registry.register(Gauge(
+    "singleflight_in_flight", "Leituras deduplicáveis em andamento"
+))
+
+
+class RequestScope:
+    """
+    Estado da requisição atual, compartilhado com o monitor de comandos
+    através de ``current_request``. O roteador grava a rota no scope ASGI
+    antes de chamar o handler, então ela já está resolvida quando os
+    comandos do handler terminam.
+    """
+
+    __slots__ = ("scope", "commands")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.commands = 0
+
+    @property
+    def route(self) -> str:
+        return _route_template(self.scope)
+
+
+current_request: ContextVar[Optional[RequestScope]] = ContextVar("current_request", default=None)
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede latência, tamanho da resposta e requisições em
+    andamento por rota (o template, ex.: /cards/{card_id}, não a URL concreta).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestScope(scope)
+        token = current_request.set(request)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            current_request.reset(token)
+
+            route = request.route
+            method = scope["method"]
+            http_requests.inc(method, route, status)
+            http_latency.observe(elapsed, method, route)
+            http_response_size.observe(size, method, route)
+            mongo_commands_per_request.observe(request.commands, route)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Monitor de comandos do PyMongo. Os eventos são disparados na task que
+    executou o comando, então ``current_request`` aponta para a requisição
+    que o originou; comandos fora de requisições ficam com a rota "-".
+    """
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def _record(self, event, status: str) -> None:
+        request = current_request.get()
+        if request is None:
+            route = NO_ROUTE
+        else:
+            request.commands += 1
+            route = request.route
+        mongo_commands.inc(route, event.command_name, status)
+        mongo_latency.observe(event.duration_micros / 1_000_000, route, event.command_name)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event, "error")
+
+
+pool_checked_out = registry.register(Gauge(
+    "mongodb_pool_checked_out_connections", "Conexões do pool em uso"
+))
+pool_open = registry.register(Gauge(
+    "mongodb_pool_open_connections", "Conexões abertas no pool"
+))
+pool_waiters = registry.register(Gauge(
+    "mongodb_pool_wait_queue", "Operações aguardando uma conexão do pool"
+))
+pool_wait = registry.register(Histogram(
+    "mongodb_pool_wait_seconds", "Tempo de espera por uma conexão do pool", ("status",)
+))
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Acompanha o uso do pool de conexões (todas as instâncias somadas).
+    """
+
+    def __init__(self):
+        self.checked_out = 0
+        self.open = 0
+        self.waiters = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _waited(self, duration: float, status: str) -> None:
+        self.waiters -= 1
+        pool_waiters.dec()
+        self.wait_seconds_total += duration
+        self.wait_seconds_max = max(self.wait_seconds_max, duration)
+        pool_wait.observe(duration, status)
+
+    def connection_check_out_started(self, event) -> None:
+        self.waiters += 1
+        pool_waiters.inc()
+
+    def connection_checked_out(self, event) -> None:
+        self._waited(event.duration, "ok")
+        self.checkouts += 1
+        self.checked_out += 1
+        pool_checked_out.inc()
+
+    def connection_check_out_failed(self, event) -> None:
+        self._waited(event.duration, "failed")
+        self.checkout_failures += 1
+
+    def connection_checked_in(self, event) -> None:
+        self.checked_out -= 1
+        pool_checked_out.dec()
+
+    def connection_created(self, event) -> None:
+        self.open += 1
+        pool_open.inc()
+
+    def connection_closed(self, event) -> None:
+        self.open -= 1
+        pool_open.dec()
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def as_dict(self) -> dict:
+        return {
+            "checked_out": self.checked_out,
+            "open": self.open,
+            "waiters": self.waiters,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "avg_wait_ms": round(self.wait_seconds_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.wait_seconds_max * 1000, 3),
+        }
+
+
+pool_metrics = PoolMetrics()
@@ -0,0 +1,131 @@
+import base64
+import inspect
+from typing import Any, Awaitable, Callable, Generic, List, Optional, TypeVar
+
+from beanie import Document
+from beanie.odm.queries.find import FindMany
+from bson import json_util
+from fastapi import HTTPException, Query
+from fastapi_pagination.ext.pymongo import apaginate as apaginate_collection
+from pydantic import BaseModel, Field
+
+from src.core.database import read_collection
+
+T = TypeVar("T")
+
+
+class CursorPage(BaseModel, Generic[T]):
+    items: List[T]
+    size: int = Field(..., title="Tamanho da Página")
+    next_cursor: Optional[str] = Field(
+        None,
+        title="Próximo Cursor",
+        description="Cursor opaco para a próxima página (nulo na última página)",
+    )
+    total: Optional[int] = Field(
+        None,
+        title="Total",
+        description="Total de itens, calculado apenas quando include_total=true",
+    )
+
+
+class CursorParams(BaseModel):
+    cursor: Optional[str] = None
+    size: int = 50
+    include_total: bool = False
+
+
+def cursor_params(
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado pela página anterior"),
+    size: int = Query(50, ge=1, le=100, description="Quantidade de itens por página"),
+    include_total: bool = Query(False, description="Calcula o total de itens (executa um count)"),
+) -> CursorParams:
+    return CursorParams(cursor=cursor, size=size, include_total=include_total)
+
+
+def encode_cursor(sort_value: Any, last_id: Any) -> str:
+    raw = json_util.dumps({"v": sort_value, "id": last_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return data["v"], data["id"]
+    except Exception:
+        raise HTTPException(400, "Cursor inválido")
+
+
+async def keyset_paginate(
+    query: FindMany,
+    params: CursorParams,
+    sort_field: str = "_id",
+    descending: bool = False,
+    transformer: Optional[Callable[[list], Awaitable[list] | list]] = None,
+) -> CursorPage:
+    """
+    Paginação por cursor (keyset) sobre uma query do Beanie.
+
+    Em vez de count + skip, filtra a partir da última chave vista
+    (``sort_field`` com desempate por ``_id``), então a página N custa o
+    mesmo que a primeira. O total só é calculado quando pedido.
+    """
+    total = await query.clone().count() if params.include_total else None
+
+    page_query = query.clone()
+    if params.cursor:
+        last_value, last_id = decode_cursor(params.cursor)
+        op = "$lt" if descending else "$gt"
+        if sort_field == "_id":
+            page_query = page_query.find({"_id": {op: last_id}})
+        else:
+            page_query = page_query.find({
+                "$or": [
+                    {sort_field: {op: last_value}},
+                    {sort_field: last_value, "_id": {op: last_id}},
+                ]
+            })
+
+    direction = -1 if descending else 1
+    sort = [(sort_field, direction)]
+    if sort_field != "_id":
+        sort.append(("_id", direction))
+
+    items = await page_query.sort(sort).limit(params.size + 1).to_list()
+
+    next_cursor = None
+    if len(items) > params.size:
+        items = items[: params.size]
+        last = items[-1]
+        sort_value = last.id if sort_field == "_id" else getattr(last, sort_field)
+        next_cursor = encode_cursor(sort_value, last.id)
+
+    if transformer is not None:
+        result = transformer(items)
+        items = await result if inspect.isawaitable(result) else result
+
+    return CursorPage(items=items, size=params.size, next_cursor=next_cursor, total=total)
+
+
+async def apaginate_profile(
+    model: type[Document],
+    profile: str,
+    projection_model: Optional[type[BaseModel]] = None,
+    query_filter: Optional[dict] = None,
+    sort: Optional[list] = None,
+):
+    """
+    Paginação por offset (fastapi_pagination) lendo direto da collection com
+    a read preference do perfil, para listagens que podem ir a secundários.
+    Com ``projection_model``, só os campos de ``Settings.projection`` são lidos.
+    """
+    target = projection_model or model
+    projection = getattr(getattr(projection_model, "Settings", None), "projection", None)
+    return await apaginate_collection(
+        read_collection(model, profile),
+        query_filter or {},
+        projection,
+        sort=sort,
+        transformer=lambda rows: [target.model_validate(row) for row in rows],
+    )
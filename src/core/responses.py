@@ -0,0 +1,103 @@
+import functools
+import json
+import os
+from datetime import date
+from typing import Any, Callable
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+load_dotenv()
+
+# "fast": serializa direto para JSON sem revalidar contra o response_model.
+# "validated": comportamento padrão do FastAPI (útil para depurar schemas).
+RESPONSE_MODE = os.getenv("RESPONSE_MODE", "fast")
+
+_adapters: dict[Any, TypeAdapter] = {}
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def render(response_model, content) -> bytes:
+    """
+    Serializa ``content`` no schema de ``response_model`` sem validá-lo de
+    novo, pelo serializer em Rust do pydantic direto para bytes. É o mesmo
+    serializer do caminho validado do FastAPI, então field serializers,
+    computed fields, exclusões e o formato dos Links do Beanie são os mesmos.
+    """
+    adapter = _adapters.get(response_model)
+    if adapter is None:
+        adapter = _adapters[response_model] = TypeAdapter(response_model)
+    return adapter.dump_json(content, by_alias=True)
+
+
+def _model_class(response_model):
+    if isinstance(response_model, type) and issubclass(response_model, BaseModel):
+        # Page[Deck] e CursorPage[Card]: aceita instâncias do genérico de origem
+        return response_model.__pydantic_generic_metadata__.get("origin") or response_model
+    return None
+
+
+def _fast_endpoint(endpoint: Callable, response_model, status_code: int) -> Callable:
+    model_class = _model_class(response_model)
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        result = await endpoint(*args, **kwargs)
+        # Só pula a validação quando o handler já devolveu o model declarado;
+        # documentos que precisam ser convertidos (ex.: Card -> CardRead)
+        # seguem pelo caminho normal do FastAPI.
+        if isinstance(result, model_class):
+            response = Response(render(response_model, result), status_code=status_code, media_type="application/json")
+            # Status e cabeçalhos que o handler gravou no parâmetro Response
+            # (ex.: ETag); o FastAPI só os copia quando ele mesmo monta a resposta.
+            sub_response = next((value for value in kwargs.values() if isinstance(value, Response)), None)
+            if sub_response is not None:
+                if sub_response.status_code:
+                    response.status_code = sub_response.status_code
+                response.headers.raw.extend(sub_response.headers.raw)
+            return response
+        return result
+
+    return wrapper
+
+
+class FastJSONRoute(APIRoute):
+    """
+    Rota que, com RESPONSE_MODE=fast, devolve o corpo já serializado quando o
+    handler retorna uma instância do response_model: o FastAPI não revalida
+    a resposta e o OpenAPI continua gerado a partir do response_model.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        response_model = kwargs.get("response_model")
+        if (
+            RESPONSE_MODE == "fast"
+            and response_model is not None
+            and not isinstance(response_model, DefaultPlaceholder)
+            and _model_class(response_model) is not None
+        ):
+            status_code = kwargs.get("status_code") or 200
+            endpoint = _fast_endpoint(endpoint, response_model, status_code)
+        super().__init__(path, endpoint, **kwargs)
@@ -0,0 +1,79 @@
+import asyncio
+import re
+import unicodedata
+
+from beanie import Document
+from pymongo import UpdateOne
+
+from src.models.enums.enums import SearchMode
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def normalize_name(value: str) -> str:
+    """
+    Normaliza um nome para busca por prefixo: remove acentos, colapsa
+    espaços e converte para minúsculas (``"Dragão  Azul"`` -> ``"dragao azul"``).
+    """
+    decomposed = unicodedata.normalize("NFKD", value)
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(folded.casefold().split())
+
+
+def build_name_filter(query: str, mode: SearchMode = SearchMode.contains) -> dict:
+    """
+    Monta o filtro de busca por nome de acordo com o modo escolhido.
+
+    - ``contains``: regex case-insensitive em ``name`` com a entrada escapada;
+    - ``prefix``: regex ancorada em ``name_normalized``, que usa o índice;
+    - ``text``: busca no índice de texto (palavras inteiras, sem acentos).
+    """
+    if mode == SearchMode.text:
+        return {"$text": {"$search": query}}
+    if mode == SearchMode.prefix:
+        return {"name_normalized": {"$regex": f"^{re.escape(normalize_name(query))}"}}
+    return {"name": {"$regex": re.escape(query), "$options": "i"}}
+
+
+async def backfill_normalized_names(model: type[Document]) -> int:
+    """
+    Preenche ``name_normalized`` nos documentos gravados antes do campo existir.
+    """
+    collection = model.get_pymongo_collection()
+    cursor = collection.find(
+        {"name_normalized": None},
+        {"name": 1},
+        batch_size=BACKFILL_BATCH_SIZE,
+    )
+
+    total = 0
+    operations = []
+    async for doc in cursor:
+        operations.append(
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"name_normalized": normalize_name(doc["name"])}})
+        )
+        if len(operations) >= BACKFILL_BATCH_SIZE:
+            total += (await collection.bulk_write(operations, ordered=False)).modified_count
+            operations = []
+    if operations:
+        total += (await collection.bulk_write(operations, ordered=False)).modified_count
+    return total
+
+
+async def main():
+    from src.core.database import close_db, init_db
+    from src.models.card import Card
+    from src.models.collection import Collection
+    from src.models.deck import Deck
+
+    await init_db()
+    try:
+        for model in (Card, Collection, Deck):
+            total = await backfill_normalized_names(model)
+            print(f"{model.get_collection_name()}: {total} documentos atualizados")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
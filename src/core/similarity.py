@@ -0,0 +1,359 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import struct
+import time
+from array import array
+from collections import OrderedDict, defaultdict
+from operator import eq
+from pathlib import Path
+from typing import Iterable, Optional
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import ReadPreference
+
+from src.models.deck import Deck
+from src.models.enums.enums import DeckFormat
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DECK_SIMILARITY_ENABLED = os.getenv("DECK_SIMILARITY_ENABLED", "true").lower() in ("1", "true", "yes")
+DECK_SIMILARITY_PATH = Path(os.getenv("DECK_SIMILARITY_PATH", "data/deck_similarity.idx"))
+# 64 hashes em 16 bandas de 4: pares com Jaccard ~0.5 caem no mesmo bucket
+# em ~64% das vezes, e com Jaccard ~0.8 em ~99,9%.
+DECK_SIMILARITY_PERMUTATIONS = int(os.getenv("DECK_SIMILARITY_PERMUTATIONS", "64"))
+DECK_SIMILARITY_BANDS = int(os.getenv("DECK_SIMILARITY_BANDS", "16"))
+DECK_SIMILARITY_MAX_CANDIDATES = int(os.getenv("DECK_SIMILARITY_MAX_CANDIDATES", "2000"))
+DECK_SIMILARITY_SAVE_SECONDS = float(os.getenv("DECK_SIMILARITY_SAVE_SECONDS", "300"))
+# Rebuild completo a partir do banco: logo após carregar o arquivo e depois
+# nesse intervalo. Corrige decks escritos com a API fora do ar, pelo seeder
+# ou por outros processos (os eventos incrementais são só do processo local).
+DECK_SIMILARITY_REFRESH_SECONDS = float(os.getenv("DECK_SIMILARITY_REFRESH_SECONDS", "3600"))
+# Consultas (deck, k, formato) guardadas em LRU até a próxima mudança
+DECK_SIMILARITY_RESULT_CACHE_SIZE = int(os.getenv("DECK_SIMILARITY_RESULT_CACHE_SIZE", "10000"))
+DECK_SIMILARITY_BATCH_SIZE = int(os.getenv("DECK_SIMILARITY_BATCH_SIZE", "2000"))
+
+_FORMATS = list(DeckFormat)
+_FILE_MAGIC = b"DSIM1\n"
+
+
+@functools.lru_cache(maxsize=200_000)
+def _card_hashes(card_id: bytes, size: int) -> array:
+    return array("I", hashlib.shake_128(card_id).digest(size))
+
+
+def minhash(card_ids: Iterable[ObjectId], permutations: int = DECK_SIMILARITY_PERMUTATIONS) -> Optional[array]:
+    """
+    Assinatura MinHash do conjunto de cartas. Cada carta gera ``permutations``
+    hashes independentes de 32 bits (palavras de um SHAKE-128 do ID) e a
+    assinatura é o mínimo de cada posição entre as cartas do deck; a fração
+    de posições iguais entre dois decks estima o Jaccard dos conjuntos.
+    """
+    size = permutations * 4
+    hashes = [_card_hashes(card_id.binary, size) for card_id in set(card_ids)]
+    if not hashes:
+        return None
+    return array("I", map(min, zip(*hashes)))
+
+
+class SimilarityIndex:
+    """
+    Índice MinHash/LSH dos decks em memória, persistido em disco.
+
+    A assinatura de cada deck é dividida em bandas; decks com alguma banda
+    idêntica caem no mesmo bucket e viram candidatos, ranqueados pelo
+    Jaccard estimado. Uma consulta só toca os buckets do deck, nunca a
+    collection de decks.
+    """
+
+    def __init__(
+        self,
+        path: Path = DECK_SIMILARITY_PATH,
+        permutations: int = DECK_SIMILARITY_PERMUTATIONS,
+        bands: int = DECK_SIMILARITY_BANDS,
+    ):
+        if permutations % bands:
+            raise ValueError("DECK_SIMILARITY_PERMUTATIONS deve ser múltiplo de DECK_SIMILARITY_BANDS")
+        self.path = path
+        self.permutations = permutations
+        self.bands = bands
+        self.rows = permutations // bands
+        self.signatures: dict[ObjectId, array] = {}
+        self.formats: dict[ObjectId, DeckFormat] = {}
+        self.buckets: list[defaultdict[tuple, set]] = [defaultdict(set) for _ in range(bands)]
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.built_at: Optional[float] = None
+        self.saved_at: Optional[float] = None
+        self.dirty = False
+        self._results: OrderedDict[tuple, list] = OrderedDict()
+        # Mudanças feitas durante um rebuild, reaplicadas no índice novo
+        self._pending: Optional[dict[ObjectId, tuple]] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _bands(self, signature: array) -> list[tuple]:
+        rows = self.rows
+        return [tuple(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def _insert(self, deck_id: ObjectId, deck_format: DeckFormat, signature: array) -> None:
+        self.signatures[deck_id] = signature
+        self.formats[deck_id] = deck_format
+        for buckets, key in zip(self.buckets, self._bands(signature)):
+            buckets[key].add(deck_id)
+
+    def _discard(self, deck_id: ObjectId) -> None:
+        signature = self.signatures.pop(deck_id, None)
+        self.formats.pop(deck_id, None)
+        if signature is None:
+            return
+        for buckets, key in zip(self.buckets, self._bands(signature)):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(deck_id)
+                if not bucket:
+                    del buckets[key]
+
+    def _set(self, deck_id: ObjectId, deck_format: Optional[DeckFormat], card_ids: list) -> None:
+        self._discard(deck_id)
+        signature = minhash(card_ids, self.permutations) if deck_format is not None else None
+        if signature is not None:
+            self._insert(deck_id, deck_format, signature)
+
+    def on_deck_changed(self, deck_id: ObjectId, deck_format: Optional[DeckFormat], card_ids: Iterable[ObjectId]) -> None:
+        """
+        Atualiza a assinatura do deck (``deck_format=None`` remove o deck).
+        Decks sem cartas ficam fora do índice.
+        """
+        if not DECK_SIMILARITY_ENABLED or self.status == "pending":
+            return
+        card_ids = list(card_ids)
+        self._set(deck_id, deck_format, card_ids)
+        if self._pending is not None:
+            self._pending[deck_id] = (deck_format, card_ids)
+        self._results.clear()
+        self.dirty = True
+
+    def similar(self, deck_id: ObjectId, k: int, deck_format: Optional[DeckFormat] = None) -> Optional[list[dict]]:
+        """
+        Os ``k`` decks mais parecidos com ``deck_id`` pelo Jaccard estimado;
+        ``None`` se o deck não está no índice.
+        """
+        signature = self.signatures.get(deck_id)
+        if signature is None:
+            return None
+
+        key = (deck_id, k, deck_format)
+        cached = self._results.get(key)
+        if cached is not None:
+            self._results.move_to_end(key)
+            return cached
+
+        candidates = set()
+        for buckets, band in zip(self.buckets, self._bands(signature)):
+            candidates |= buckets.get(band, set())
+            if len(candidates) > DECK_SIMILARITY_MAX_CANDIDATES:
+                break
+        candidates.discard(deck_id)
+        if deck_format is not None:
+            candidates = {other for other in candidates if self.formats[other] == deck_format}
+
+        size = self.permutations
+        scored = sorted(
+            ((sum(map(eq, signature, self.signatures[other])) / size, other) for other in candidates),
+            key=lambda item: (-item[0], item[1]),
+        )[:k]
+        result = self._results[key] = [
+            {"deck_id": str(other), "format": self.formats[other].value, "score": round(score, 4)}
+            for score, other in scored
+        ]
+        while len(self._results) > DECK_SIMILARITY_RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+        return result
+
+    def _clear(self) -> None:
+        self.signatures = {}
+        self.formats = {}
+        self.buckets = [defaultdict(set) for _ in range(self.bands)]
+        self._results.clear()
+
+    async def rebuild(self) -> None:
+        """
+        Recalcula as assinaturas de todos os decks a partir do banco e
+        grava o índice em disco.
+        """
+        async with self._lock:
+            started = time.perf_counter()
+            self.status = "building" if self.built_at is None else "refreshing"
+            self._pending = {}
+            fresh = SimilarityIndex(self.path, self.permutations, self.bands)
+            try:
+                # Do primário: um secundário atrasado devolveria versões anteriores
+                # a mudanças já aplicadas, e o _pending só cobre as feitas
+                # durante o rebuild.
+                cursor = Deck.get_pymongo_collection().with_options(
+                    read_preference=ReadPreference.PRIMARY
+                ).find(
+                    {}, {"format": 1, "cards": 1}, batch_size=DECK_SIMILARITY_BATCH_SIZE
+                )
+                batch = []
+                async for deck in cursor:
+                    batch.append((deck["_id"], DeckFormat(deck["format"]), [ref.id for ref in deck.get("cards", [])]))
+                    if len(batch) >= DECK_SIMILARITY_BATCH_SIZE:
+                        # Os hashes de cada lote são calculados numa thread
+                        await asyncio.to_thread(fresh._set_many, batch)
+                        batch = []
+                await asyncio.to_thread(fresh._set_many, batch)
+
+                for deck_id, (deck_format, card_ids) in self._pending.items():
+                    fresh._set(deck_id, deck_format, card_ids)
+                self.signatures, self.formats, self.buckets = fresh.signatures, fresh.formats, fresh.buckets
+                self._results.clear()
+                self.status = "ready"
+                self.error = None
+                self.built_at = time.time()
+                logger.info(
+                    f"Índice de similaridade de decks montado: {len(self.signatures)} decks "
+                    f"em {time.perf_counter() - started:.3f}s"
+                )
+            except Exception as e:
+                self.status = "failed" if self.built_at is None else "ready"
+                self.error = str(e)
+                logger.error(f"Erro ao montar o índice de similaridade de decks: {e}")
+                raise
+            finally:
+                self._pending = None
+        await self.save()
+
+    def _set_many(self, batch: list[tuple]) -> None:
+        for deck_id, deck_format, card_ids in batch:
+            self._set(deck_id, deck_format, card_ids)
+
+    def _dump(self) -> bytes:
+        header = json.dumps({"permutations": self.permutations, "decks": len(self.signatures)}).encode()
+        parts = [_FILE_MAGIC, struct.pack("<I", len(header)), header]
+        for deck_id, signature in self.signatures.items():
+            parts.append(deck_id.binary)
+            parts.append(struct.pack("<B", _FORMATS.index(self.formats[deck_id])))
+            parts.append(signature.tobytes())
+        return b"".join(parts)
+
+    def _restore(self, data: bytes) -> bool:
+        if not data.startswith(_FILE_MAGIC):
+            return False
+        offset = len(_FILE_MAGIC)
+        (header_size,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        header = json.loads(data[offset:offset + header_size])
+        offset += header_size
+        if header["permutations"] != self.permutations:
+            return False
+
+        self._clear()
+        record = 12 + 1 + self.permutations * 4
+        for start in range(offset, offset + header["decks"] * record, record):
+            signature = array("I")
+            signature.frombytes(data[start + 13:start + record])
+            self._insert(ObjectId(data[start:start + 12]), _FORMATS[data[start + 12]], signature)
+        return True
+
+    async def save(self) -> None:
+        """
+        Grava o índice em disco (arquivo temporário + rename, para nunca
+        deixar um arquivo pela metade).
+        """
+        data = self._dump()
+        self.dirty = False
+
+        def write():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, self.path)
+
+        try:
+            await asyncio.to_thread(write)
+            self.saved_at = time.time()
+        except OSError as e:
+            self.dirty = True
+            logger.error(f"Erro ao gravar o índice de similaridade em {self.path}: {e}")
+
+    async def load(self) -> bool:
+        """
+        Carrega o índice do disco; ``False`` se o arquivo não existe ou foi
+        gerado com outra quantidade de hashes.
+        """
+        if not self.path.exists():
+            return False
+        data = await asyncio.to_thread(self.path.read_bytes)
+        if not await asyncio.to_thread(self._restore, data):
+            logger.warning(f"Índice de similaridade em {self.path} incompatível; será reconstruído")
+            return False
+        self.status = "ready"
+        self.built_at = self.saved_at = self.path.stat().st_mtime
+        logger.info(f"Índice de similaridade de decks carregado de {self.path}: {len(self.signatures)} decks")
+        return True
+
+    def info(self) -> dict:
+        return {
+            "enabled": DECK_SIMILARITY_ENABLED,
+            "status": self.status,
+            "error": self.error,
+            "path": str(self.path),
+            "decks": len(self.signatures),
+            "permutations": self.permutations,
+            "bands": self.bands,
+            "buckets": sum(len(buckets) for buckets in self.buckets),
+            "built_at": self.built_at,
+            "saved_at": self.saved_at,
+            "dirty": self.dirty,
+        }
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.rebuild()
+            except Exception:
+                pass  # rebuild() já registrou o erro e mantém o índice anterior
+            if DECK_SIMILARITY_REFRESH_SECONDS <= 0:
+                return
+            await asyncio.sleep(DECK_SIMILARITY_REFRESH_SECONDS)
+
+    async def _save_loop(self) -> None:
+        while DECK_SIMILARITY_SAVE_SECONDS > 0:
+            await asyncio.sleep(DECK_SIMILARITY_SAVE_SECONDS)
+            if self.dirty:
+                await self.save()
+
+    async def _run(self) -> None:
+        # O arquivo só adianta as consultas no startup; o rebuild em seguida
+        # reconcilia o índice com o banco.
+        try:
+            await self.load()
+        except Exception as e:
+            logger.error(f"Erro ao carregar o índice de similaridade de {self.path}: {e}")
+        await asyncio.gather(self._refresh_loop(), self._save_loop())
+
+    def start(self) -> None:
+        if DECK_SIMILARITY_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self.dirty:
+            await self.save()
+
+
+index = SimilarityIndex()
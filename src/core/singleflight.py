@@ -0,0 +1,82 @@
+import asyncio
+import functools
+import os
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from dotenv import load_dotenv
+
+from src.core.metrics import singleflight_calls, singleflight_in_flight
+
+load_dotenv()
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class SingleFlight:
+    """
+    Deduplica leituras idênticas em andamento no processo: a primeira
+    chamada com uma chave executa a função e as que chegarem enquanto ela
+    não terminou aguardam o mesmo resultado (ou a mesma exceção). Nada é
+    guardado depois que a chamada termina; isso é papel do cache.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, name: str, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Executa ``call`` ou aguarda a execução em andamento com a mesma
+        chave; com SINGLEFLIGHT_ENABLED desligado, sempre executa.
+        """
+        if not SINGLEFLIGHT_ENABLED:
+            return await call()
+        flight_key = (name, key)
+        task = self._calls.get(flight_key)
+        if task is None:
+            # A leitura roda numa task própria: se o cliente que a iniciou
+            # desconectar, os demais continuam esperando o resultado.
+            task = asyncio.create_task(call())
+            self._calls[flight_key] = task
+            singleflight_in_flight.inc()
+            task.add_done_callback(functools.partial(self._done, flight_key))
+            singleflight_calls.inc(name, "leader")
+        else:
+            singleflight_calls.inc(name, "coalesced")
+        return await asyncio.shield(task)
+
+    def _done(self, flight_key: tuple, task: asyncio.Task) -> None:
+        if self._calls.get(flight_key) is task:
+            del self._calls[flight_key]
+        singleflight_in_flight.dec()
+        if not task.cancelled():
+            # Marca a exceção como lida mesmo que todos os chamadores tenham desistido
+            task.exception()
+
+    def info(self) -> dict:
+        return {"enabled": SINGLEFLIGHT_ENABLED, "in_flight": len(self._calls)}
+
+
+flights = SingleFlight()
+
+
+def _all_arguments(**kwargs) -> Hashable:
+    return tuple(sorted(kwargs.items()))
+
+
+def coalesce(name: str, key: Optional[Callable[..., Hashable]] = None):
+    """
+    Decorator de rota: requisições simultâneas com a mesma chave dividem
+    uma execução do handler. ``key`` recebe os parâmetros do handler por
+    nome e devolve a chave; por padrão todos os parâmetros formam a chave.
+    Só serve para leituras cujo resultado não depende de quem pede.
+    """
+    key_function = key or _all_arguments
+
+    def decorator(endpoint: Callable) -> Callable:
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            return await flights.do(name, key_function(**kwargs), lambda: endpoint(**kwargs))
+
+        return wrapper
+
+    return decorator
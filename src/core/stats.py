@@ -0,0 +1,231 @@
+import logging
+from collections import defaultdict
+
+from beanie import Link
+from pymongo import UpdateOne
+
+from src.core.database import read_collection
+from src.models.card import Card
+from src.models.collection import Collection
+from src.models.deck import Deck
+from src.models.stats import StatsCounter
+
+logger = logging.getLogger(__name__)
+
+CARDS_BY_RARITY = "cards.by_rarity"
+CARDS_BY_TYPE = "cards.by_type"
+DECKS_BY_FORMAT = "decks.by_format"
+COLLECTIONS_BY_YEAR = "collections.by_year"
+COLLECTIONS_WITH_CARDS = "collections.with_cards"
+
+ALL_STATS = (CARDS_BY_RARITY, CARDS_BY_TYPE, DECKS_BY_FORMAT, COLLECTIONS_BY_YEAR, COLLECTIONS_WITH_CARDS)
+
+
+class StatsDelta:
+    """
+    Acumula incrementos e atribuições para os documentos de estatística e os
+    aplica com um único bulk_write (um round-trip, independente de quantos
+    contadores mudaram).
+    """
+
+    def __init__(self):
+        self._inc: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._set: dict[str, dict] = defaultdict(dict)
+        self._unset: dict[str, set] = defaultdict(set)
+
+    def inc(self, key: str, field: str, amount: int = 1) -> "StatsDelta":
+        self._inc[key][f"values.{field}"] += amount
+        return self
+
+    def set(self, key: str, field: str, value) -> "StatsDelta":
+        self._set[key][f"values.{field}"] = value
+        return self
+
+    def unset(self, key: str, field: str) -> "StatsDelta":
+        self._unset[key].add(f"values.{field}")
+        return self
+
+    def operations(self) -> list[UpdateOne]:
+        operations = []
+        for key in set(self._inc) | set(self._set) | set(self._unset):
+            update = {}
+            increments = {field: amount for field, amount in self._inc[key].items() if amount}
+            if increments:
+                update["$inc"] = increments
+            if self._set[key]:
+                update["$set"] = self._set[key]
+            if self._unset[key]:
+                update["$unset"] = {field: "" for field in self._unset[key]}
+            if update:
+                operations.append(UpdateOne({"_id": key}, update, upsert=True))
+        return operations
+
+    async def apply(self) -> None:
+        operations = self.operations()
+        if not operations:
+            return
+        try:
+            await StatsCounter.get_pymongo_collection().bulk_write(operations, ordered=False)
+        except Exception as e:
+            # As estatísticas são derivadas: uma falha aqui não deve desfazer a
+            # escrita principal. O rebuild em /admin/stats/rebuild corrige o desvio.
+            logger.error(f"Erro ao atualizar estatísticas materializadas: {e}")
+
+
+def _year(value) -> str:
+    return str(value.year)
+
+
+def _link_id(value):
+    return value.ref.id if isinstance(value, Link) else value.id
+
+
+def card_delta(delta: StatsDelta, card: Card, amount: int) -> StatsDelta:
+    delta.inc(CARDS_BY_RARITY, card.rarity.value, amount)
+    delta.inc(CARDS_BY_TYPE, card.type.value, amount)
+    delta.inc(COLLECTIONS_WITH_CARDS, f"{_link_id(card.collection)}.total_cards", amount)
+    return delta
+
+
+async def on_card_created(card: Card) -> None:
+    await card_delta(StatsDelta(), card, 1).apply()
+
+
+async def on_card_deleted(card: Card) -> None:
+    await card_delta(StatsDelta(), card, -1).apply()
+
+
+async def on_cards_deleted(rarities: dict, types: dict) -> None:
+    """
+    Desconta cartas removidas em massa (ex.: exclusão em cascata de uma
+    coleção), a partir das contagens por raridade e por tipo.
+    """
+    delta = StatsDelta()
+    for rarity, total in rarities.items():
+        delta.inc(CARDS_BY_RARITY, rarity, -total)
+    for card_type, total in types.items():
+        delta.inc(CARDS_BY_TYPE, card_type, -total)
+    await delta.apply()
+
+
+async def on_card_updated(previous: Card, card: Card) -> None:
+    delta = StatsDelta()
+    card_delta(delta, previous, -1)
+    card_delta(delta, card, 1)
+    await delta.apply()
+
+
+async def on_collection_created(collection: Collection) -> None:
+    await (
+        StatsDelta()
+        .inc(COLLECTIONS_BY_YEAR, _year(collection.release_date))
+        .set(COLLECTIONS_WITH_CARDS, f"{collection.id}.name", collection.name)
+        .set(COLLECTIONS_WITH_CARDS, f"{collection.id}.total_cards", 0)
+        .apply()
+    )
+
+
+async def on_collection_updated(previous_release_date, collection: Collection) -> None:
+    delta = StatsDelta()
+    if _year(previous_release_date) != _year(collection.release_date):
+        delta.inc(COLLECTIONS_BY_YEAR, _year(previous_release_date), -1)
+        delta.inc(COLLECTIONS_BY_YEAR, _year(collection.release_date), 1)
+    delta.set(COLLECTIONS_WITH_CARDS, f"{collection.id}.name", collection.name)
+    await delta.apply()
+
+
+async def on_collection_deleted(collection: Collection) -> None:
+    await (
+        StatsDelta()
+        .inc(COLLECTIONS_BY_YEAR, _year(collection.release_date), -1)
+        .unset(COLLECTIONS_WITH_CARDS, str(collection.id))
+        .apply()
+    )
+
+
+async def on_deck_created(deck: Deck) -> None:
+    await StatsDelta().inc(DECKS_BY_FORMAT, deck.format.value).apply()
+
+
+async def on_deck_updated(previous_format, deck: Deck) -> None:
+    if previous_format == deck.format:
+        return
+    await (
+        StatsDelta()
+        .inc(DECKS_BY_FORMAT, previous_format.value, -1)
+        .inc(DECKS_BY_FORMAT, deck.format.value, 1)
+        .apply()
+    )
+
+
+async def on_decks_deleted(formats: dict) -> None:
+    delta = StatsDelta()
+    for deck_format, total in formats.items():
+        delta.inc(DECKS_BY_FORMAT, deck_format, -total)
+    await delta.apply()
+
+
+async def read_stats(key: str) -> dict:
+    """
+    Lê um relatório materializado (uma leitura por _id, com o perfil de
+    leitura "stats").
+    """
+    counter = await read_collection(StatsCounter, "stats").find_one({"_id": key}, {"values": 1})
+    return counter["values"] if counter else {}
+
+
+async def rebuild_stats() -> dict:
+    """
+    Recalcula todas as estatísticas a partir das collections de origem e
+    substitui os documentos materializados.
+    """
+    by_rarity = await Card.aggregate([{"$group": {"_id": "$rarity", "total": {"$sum": 1}}}]).to_list()
+    by_type = await Card.aggregate([{"$group": {"_id": "$type", "total": {"$sum": 1}}}]).to_list()
+    by_format = await Deck.aggregate([{"$group": {"_id": "$format", "total": {"$sum": 1}}}]).to_list()
+    by_year = await Collection.aggregate([
+        {"$group": {"_id": {"$year": "$release_date"}, "total": {"$sum": 1}}}
+    ]).to_list()
+    with_cards = await Collection.aggregate([
+        {
+            "$lookup": {
+                "from": "cards",
+                "localField": "_id",
+                "foreignField": "collection.$id",
+                "pipeline": [{"$count": "total"}],
+                "as": "cards"
+            }
+        },
+        {
+            "$project": {
+                "name": 1,
+                "total_cards": {"$ifNull": [{"$first": "$cards.total"}, 0]}
+            }
+        }
+    ]).to_list()
+
+    values = {
+        CARDS_BY_RARITY: {row["_id"]: row["total"] for row in by_rarity},
+        CARDS_BY_TYPE: {row["_id"]: row["total"] for row in by_type},
+        DECKS_BY_FORMAT: {row["_id"]: row["total"] for row in by_format},
+        COLLECTIONS_BY_YEAR: {str(row["_id"]): row["total"] for row in by_year},
+        COLLECTIONS_WITH_CARDS: {
+            str(row["_id"]): {"name": row["name"], "total_cards": row["total_cards"]}
+            for row in with_cards
+        },
+    }
+
+    for key, value in values.items():
+        await StatsCounter.get_pymongo_collection().replace_one(
+            {"_id": key}, {"_id": key, "values": value}, upsert=True
+        )
+    logger.info("Estatísticas materializadas recalculadas.")
+    return {key: len(value) for key, value in values.items()}
+
+
+async def ensure_stats() -> None:
+    """
+    Faz o rebuild inicial quando o banco ainda não tem estatísticas materializadas.
+    """
+    existing = await StatsCounter.find({"_id": {"$in": list(ALL_STATS)}}).count()
+    if existing < len(ALL_STATS):
+        await rebuild_stats()
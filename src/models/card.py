@@ -1,8 +1,13 @@
 from typing import Optional, List
-from beanie import Document, Link, PydanticObjectId
-from pydantic import BaseModel, Field
+from beanie import Document, Insert, Link, PydanticObjectId, Replace, Save, before_event
+from pymongo import ASCENDING, TEXT, IndexModel
+from bson import DBRef
+from pydantic import AliasChoices, BaseModel, Field, model_serializer, model_validator
+from pydantic.json_schema import SkipJsonSchema
 from src.models.enums.enums import CardType, CardRarity
 from src.models.collection import Collection
+from src.core.search import normalize_name
+from src.models.internal import without_internal_fields
 
 class Card(Document):
     name: str
@@ -10,9 +15,30 @@ class Card(Document):
     rarity: CardRarity
     text: Optional[str] = None
     collection: Link[Collection]
+    name_normalized: SkipJsonSchema[Optional[str]] = None
+    # Incrementada a cada gravação; base do ETag (ver src/core/conditional.py)
+    revision: SkipJsonSchema[int] = 0
+
+    @before_event(Insert, Replace, Save)
+    def set_name_normalized(self):
+        self.name_normalized = normalize_name(self.name)
+
+    @before_event(Replace, Save)
+    def bump_revision(self):
+        self.revision += 1
+
+    @model_serializer(mode="wrap")
+    def hide_internal_fields(self, handler):
+        return without_internal_fields(handler(self))
 
     class Settings:
         name = "cards"
+        indexes = [
+            IndexModel([("name", ASCENDING)], name="card_name_unique", unique=True),
+            IndexModel([("name_normalized", ASCENDING)], name="card_name_normalized"),
+            IndexModel([("name", TEXT)], name="card_name_text", default_language="none"),
+            IndexModel([("collection.$id", ASCENDING)], name="card_collection"),
+        ]
 
 class RemoveCardsRequest(BaseModel):
     card_ids: List[str] = Field(
@@ -94,4 +120,23 @@ class CardRead(BaseModel):
         if 'collection' in data and data['collection']:
             link = data.pop('collection')
             data['collection_id'] = link.id if hasattr(link, 'id') else link.ref.id
-        super().__init__(**data)
\ No newline at end of file
+        super().__init__(**data)
+
+
+class CardReadProjection(CardRead):
+    """
+    Projeção de leitura para as listagens: traz apenas os campos do CardRead
+    e extrai o collection_id direto do DBRef, sem $lookup em collections.
+    """
+    id: PydanticObjectId = Field(..., validation_alias=AliasChoices("_id", "id"), title="ID da Carta")
+
+    @model_validator(mode="before")
+    @classmethod
+    def collection_ref_to_id(cls, data):
+        if isinstance(data, dict) and isinstance(data.get("collection"), DBRef):
+            data = dict(data)
+            data["collection_id"] = data.pop("collection").id
+        return data
+
+    class Settings:
+        projection = {"_id": 1, "name": 1, "type": 1, "rarity": 1, "text": 1, "collection": 1}
@@ -1,8 +1,13 @@
 from datetime import date
-from beanie import Document
-from pydantic import BaseModel, Field
+from beanie import Document, Insert, Replace, Save, before_event
+from pymongo import ASCENDING, TEXT, IndexModel
+from pydantic import BaseModel, Field, model_serializer
+from pydantic.json_schema import SkipJsonSchema
 from typing import Optional
 
+from src.core.search import normalize_name
+from src.models.internal import without_internal_fields
+
 class CollectionCreate(BaseModel):
     name: str = Field(
         ..., 
@@ -49,6 +54,25 @@ class CollectionResponse(BaseModel):
 class Collection(Document):
     name : str
     release_date : date
+    name_normalized : SkipJsonSchema[Optional[str]] = None
+    revision : SkipJsonSchema[int] = 0
+
+    @before_event(Insert, Replace, Save)
+    def set_name_normalized(self):
+        self.name_normalized = normalize_name(self.name)
+
+    @before_event(Replace, Save)
+    def bump_revision(self):
+        self.revision += 1
+
+    @model_serializer(mode="wrap")
+    def hide_internal_fields(self, handler):
+        return without_internal_fields(handler(self))
 
     class Settings:
-        name = "collections"
\ No newline at end of file
+        name = "collections"
+        indexes = [
+            IndexModel([("release_date", ASCENDING)], name="collection_release_date"),
+            IndexModel([("name_normalized", ASCENDING)], name="collection_name_normalized"),
+            IndexModel([("name", TEXT)], name="collection_name_text", default_language="none"),
+        ]
\ No newline at end of file
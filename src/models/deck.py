@@ -1,9 +1,15 @@
+from collections import Counter
 from datetime import datetime
-from beanie import Document, Link
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from beanie import Document, Insert, Link, PydanticObjectId, Replace, Save, before_event
+from bson import DBRef
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from typing import Dict, List, Optional
+from pydantic import AliasChoices, BaseModel, Field, model_serializer, model_validator
+from pydantic.json_schema import SkipJsonSchema
+from src.core.search import normalize_name
 from src.models.card import Card
-from src.models.enums.enums import DeckFormat
+from src.models.enums.enums import CardRarity, CardType, DeckFormat
+from src.models.internal import without_internal_fields
 from src.models.user import User
 
 
@@ -14,15 +20,72 @@ class AddCardsRequest(BaseModel):
         examples=[["64f1b2b2e1b2b2e1b2b2e1b2"]]
     )
 
+class DeckCardSummary(BaseModel):
+    """
+    Cópia resumida de uma carta embutida no deck, mantida em sincronia pelas
+    rotas de decks e pelo update_card (ver src/core/deck_summary.py).
+    """
+    id: PydanticObjectId = Field(..., title="ID da Carta")
+    name: str = Field(..., title="Nome")
+    type: CardType = Field(..., title="Tipo")
+    rarity: CardRarity = Field(..., title="Raridade")
+
+    @classmethod
+    def from_card(cls, card: Card) -> "DeckCardSummary":
+        return cls(id=card.id, name=card.name, type=card.type, rarity=card.rarity)
+
+
+def summary_counts(summary: List[DeckCardSummary]) -> tuple[Dict[str, int], Dict[str, int]]:
+    return (
+        dict(Counter(card.type.value for card in summary)),
+        dict(Counter(card.rarity.value for card in summary)),
+    )
+
+
 class Deck(Document):
     name: str = Field(..., min_length=2, max_length=100)
     format: DeckFormat
     created_at: datetime = Field(default_factory=datetime.utcnow)
     owner: Link["User"] 
     cards: List[Link[Card]] = []
+    name_normalized: SkipJsonSchema[Optional[str]] = None
+    card_summary: List[DeckCardSummary] = []
+    type_counts: Dict[str, int] = {}
+    rarity_counts: Dict[str, int] = {}
+    # Também incrementada pelas escritas diretas em src/core/deck_summary.py
+    revision: SkipJsonSchema[int] = 0
+
+    @before_event(Insert, Replace, Save)
+    def set_name_normalized(self):
+        self.name_normalized = normalize_name(self.name)
+
+    @before_event(Replace, Save)
+    def bump_revision(self):
+        self.revision += 1
+
+    @before_event(Insert, Replace, Save)
+    def sync_card_summary(self):
+        # Com as cartas resolvidas (ex.: update_deck com fetch_links) o resumo
+        # é refeito a partir delas; com Links, o resumo atual é mantido.
+        if all(isinstance(card, Card) for card in self.cards):
+            self.card_summary = [DeckCardSummary.from_card(card) for card in self.cards]
+        self.type_counts, self.rarity_counts = summary_counts(self.card_summary)
+
+    @model_serializer(mode="wrap")
+    def hide_internal_fields(self, handler):
+        return without_internal_fields(handler(self))
 
     class Settings:
         name = "decks"
+        indexes = [
+            IndexModel([("name_normalized", ASCENDING)], name="deck_name_normalized"),
+            IndexModel([("name", TEXT)], name="deck_name_text", default_language="none"),
+            IndexModel([("owner.$id", ASCENDING), ("name", ASCENDING)], name="deck_owner_name"),
+            IndexModel([("format", ASCENDING), ("created_at", DESCENDING)], name="deck_format_created_at"),
+            IndexModel([("created_at", DESCENDING)], name="deck_created_at"),
+            IndexModel([("card_summary.id", ASCENDING)], name="deck_card_summary_id"),
+            IndexModel([("cards.$id", ASCENDING)], name="deck_cards"),
+        ]
 
 class DeckCreate(BaseModel):
     name: str = Field(
@@ -69,4 +132,76 @@ class DeckResponse(BaseModel):
     cards_ids: List[str]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class DeckSummary(BaseModel):
+    """
+    Listagem de decks servida só com os campos desnormalizados: uma query,
+    sem resolver o dono nem as cartas.
+    """
+    id: PydanticObjectId = Field(..., validation_alias=AliasChoices("_id", "id"), title="ID do Deck")
+    name: str = Field(..., title="Nome")
+    format: DeckFormat = Field(..., title="Formato")
+    created_at: datetime = Field(..., title="Data de Criação")
+    owner_id: PydanticObjectId = Field(..., title="ID do Dono")
+    card_count: int = Field(..., title="Quantidade de Cartas")
+    card_summary: List[DeckCardSummary] = Field([], title="Cartas")
+    type_counts: Dict[str, int] = Field({}, title="Cartas por Tipo")
+    rarity_counts: Dict[str, int] = Field({}, title="Cartas por Raridade")
+
+    @model_validator(mode="before")
+    @classmethod
+    def from_document(cls, data):
+        if isinstance(data, dict) and "owner_id" not in data:
+            data = dict(data)
+            owner = data.pop("owner", None)
+            data["owner_id"] = owner.id if isinstance(owner, DBRef) else owner
+            data["card_count"] = len(data.get("card_summary") or [])
+        return data
+
+    class Settings:
+        projection = {
+            "_id": 1, "name": 1, "format": 1, "created_at": 1, "owner": 1,
+            "card_summary": 1, "type_counts": 1, "rarity_counts": 1,
+        }
+
+
+class DeckAnalyticsRequest(BaseModel):
+    deck_ids: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=500,
+        title="IDs dos Decks",
+        description="Decks a serem analisados em uma única agregação",
+        examples=[["64f1b2b2e1b2b2e1b2b2e1b2"]]
+    )
+
+
+class CollectionSpread(BaseModel):
+    collection_id: Optional[PydanticObjectId] = Field(None, title="ID da Coleção")
+    name: Optional[str] = Field(None, title="Nome da Coleção")
+    count: int = Field(..., title="Quantidade de Cartas")
+
+
+class DeckLegality(BaseModel):
+    legal: bool = Field(..., title="Legal no Formato")
+    issues: List[str] = Field([], title="Problemas Encontrados")
+
+
+class DeckAnalytics(BaseModel):
+    deck_id: PydanticObjectId = Field(..., title="ID do Deck")
+    name: str = Field(..., title="Nome")
+    format: DeckFormat = Field(..., title="Formato")
+    card_count: int = Field(..., title="Quantidade de Cartas")
+    missing_cards: int = Field(..., title="Cartas Referenciadas Inexistentes")
+    type_distribution: Dict[str, int] = Field({}, title="Cartas por Tipo")
+    rarity_distribution: Dict[str, int] = Field({}, title="Cartas por Raridade")
+    collections: List[CollectionSpread] = Field([], title="Cartas por Coleção")
+    legality: DeckLegality = Field(..., title="Legalidade")
+
+
+class DeckAnalyticsBatch(BaseModel):
+    decks: List[DeckAnalytics]
+    not_found: List[str] = Field([], title="Decks Inexistentes")
+    invalid: List[str] = Field([], title="IDs Inválidos")
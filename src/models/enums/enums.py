@@ -19,3 +19,15 @@ class DeckFormat(str, Enum):
     Modern = "Modern"
     Commander = "Commander"
     Pauper = "Pauper"
+
+class SearchMode(str, Enum):
+    contains = "contains"
+    prefix = "prefix"
+    text = "text"
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
@@ -0,0 +1,13 @@
+"""
+Campos que os documentos gravam no banco só para uso interno: o nome
+normalizado das buscas por prefixo (src/core/search.py) e a revisão dos
+ETags (src/core/conditional.py). O encoder do Beanie os grava normalmente;
+o serializer do pydantic os tira do corpo das respostas.
+"""
+INTERNAL_FIELDS = ("name_normalized", "revision")
+
+
+def without_internal_fields(data: dict) -> dict:
+    for field in INTERNAL_FIELDS:
+        data.pop(field, None)
+    return data
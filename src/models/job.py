@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pydantic import BaseModel, Field
+from src.models.enums.enums import JobStatus
+
+
+class Job(Document):
+    """
+    Tarefa executada em background pelo agendador de src/core/jobs.py. O
+    estado fica no banco para ser consultado por qualquer processo da API;
+    ``owner`` é a instância do agendador que está executando o job, que
+    renova ``heartbeat_at`` enquanto ele roda.
+    """
+    kind: str
+    params: Dict[str, Any] = Field(default_factory=dict)
+    status: JobStatus = JobStatus.queued
+    progress: float = 0.0
+    message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    owner: Optional[str] = None
+    heartbeat_at: Optional[datetime] = None
+
+    class Settings:
+        name = "jobs"
+        indexes = [
+            IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="job_status_created_at"),
+            IndexModel([("created_at", DESCENDING)], name="job_created_at"),
+        ]
+
+
+class JobCreate(BaseModel):
+    kind: str = Field(
+        ...,
+        title="Tipo",
+        description="Tipo da tarefa (ver GET /jobs/kinds)",
+        examples=["stats.rebuild"]
+    )
+    params: Dict[str, Any] = Field(
+        default_factory=dict,
+        title="Parâmetros",
+        description="Parâmetros específicos do tipo de tarefa",
+        examples=[{}]
+    )
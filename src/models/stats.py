@@ -0,0 +1,15 @@
+from typing import Any, Dict
+from beanie import Document
+from pydantic import Field
+
+
+class StatsCounter(Document):
+    """
+    Estatística materializada: um documento por relatório (ex: "cards.by_rarity"),
+    com os contadores mantidos incrementalmente pelas rotas de escrita.
+    """
+    id: str
+    values: Dict[str, Any] = Field(default_factory=dict)
+
+    class Settings:
+        name = "stats"
@@ -1,16 +1,31 @@
 from datetime import datetime
 from typing import Optional
-from beanie import Document, PydanticObjectId
-from pydantic import BaseModel, Field, EmailStr # Adicione EmailStr se quiser validar email
+from beanie import Document, PydanticObjectId, Replace, Save, before_event
+from pymongo import ASCENDING, IndexModel
+from pydantic import AliasChoices, BaseModel, Field, EmailStr, model_serializer # Adicione EmailStr se quiser validar email
+from pydantic.json_schema import SkipJsonSchema
+from src.models.internal import without_internal_fields
 
 class User(Document):
     name: str
     email: str
     password: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    revision: SkipJsonSchema[int] = 0
+
+    @before_event(Replace, Save)
+    def bump_revision(self):
+        self.revision += 1
+
+    @model_serializer(mode="wrap")
+    def hide_internal_fields(self, handler):
+        return without_internal_fields(handler(self))
 
     class Settings:
         name = "users"
+        indexes = [
+            IndexModel([("email", ASCENDING)], name="user_email_unique", unique=True),
+        ]
 
 class UserCreate(BaseModel):
     name: str = Field(
@@ -58,4 +73,14 @@ class UserRead(BaseModel):
     id: PydanticObjectId = Field(..., title="ID do Usuário")
     name: str = Field(..., title="Nome")
     email: str = Field(..., title="E-mail")
-    created_at: datetime = Field(..., title="Data de Criação")
\ No newline at end of file
+    created_at: datetime = Field(..., title="Data de Criação")
+
+
+class UserReadProjection(UserRead):
+    """
+    Projeção de leitura para as listagens: só os campos públicos (sem senha).
+    """
+    id: PydanticObjectId = Field(..., validation_alias=AliasChoices("_id", "id"), title="ID do Usuário")
+
+    class Settings:
+        projection = {"_id": 1, "name": 1, "email": 1, "created_at": 1}
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, status
+
+from src.core import deck_summary, stats
+from src.core.cache import cache
+from src.core.cooccurrence import engine as cooccurrence
+from src.core.database import pool_stats
+from src.core.similarity import index as similarity
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"]
+)
+
+
+@router.get(
+    "/cache/stats",
+    status_code=status.HTTP_200_OK,
+    summary="Estatísticas do cache",
+    description="Retorna o backend em uso e os contadores de hits, misses, evictions e invalidações do cache.",
+    responses={
+        200: {"description": "Estatísticas retornadas com sucesso"}
+    }
+)
+async def cache_stats():
+    return await cache.info()
+
+
+@router.get(
+    "/db/pool",
+    status_code=status.HTTP_200_OK,
+    summary="Estatísticas do pool de conexões",
+    description="Retorna o uso do pool de conexões do MongoDB: conexões em uso e abertas, operações aguardando e tempo de espera.",
+    responses={
+        200: {"description": "Estatísticas retornadas com sucesso"}
+    }
+)
+async def db_pool_stats():
+    return pool_stats()
+
+
+@router.post(
+    "/stats/rebuild",
+    status_code=status.HTTP_200_OK,
+    summary="Recalcular estatísticas",
+    description="Recalcula do zero todas as estatísticas materializadas a partir das collections de origem.",
+    responses={
+        200: {"description": "Estatísticas recalculadas com sucesso"}
+    }
+)
+async def rebuild_stats():
+    rebuilt = await stats.rebuild_stats()
+    return {"message": "Estatísticas recalculadas com sucesso", "entries": rebuilt}
+
+
+@router.post(
+    "/decks/summaries/rebuild",
+    status_code=status.HTTP_200_OK,
+    summary="Recalcular resumo dos decks",
+    description="Recalcula, a partir das cartas, o resumo de cartas e as contagens por tipo e raridade de todos os decks.",
+    responses={
+        200: {"description": "Resumos recalculados com sucesso"}
+    }
+)
+async def rebuild_deck_summaries():
+    await deck_summary.rebuild_deck_summaries()
+    return {"message": "Resumo dos decks recalculado com sucesso"}
+
+
+@router.post(
+    "/meta/rebuild",
+    status_code=status.HTTP_200_OK,
+    summary="Recalcular co-ocorrência",
+    description="Remonta do zero a popularidade e a co-ocorrência das cartas a partir de todos os decks.",
+    responses={
+        200: {"description": "Índice remontado com sucesso"}
+    }
+)
+async def rebuild_cooccurrence():
+    await cooccurrence.rebuild()
+    return cooccurrence.info()
+
+
+@router.post(
+    "/decks/similarity/rebuild",
+    status_code=status.HTTP_200_OK,
+    summary="Recalcular índice de similaridade",
+    description="Recalcula as assinaturas MinHash de todos os decks e grava o índice em disco.",
+    responses={
+        200: {"description": "Índice remontado com sucesso"}
+    }
+)
+async def rebuild_similarity():
+    await similarity.rebuild()
+    return similarity.info()
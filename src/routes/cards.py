@@ -1,38 +1,48 @@
-import re
-from fastapi import APIRouter, HTTPException, status, Query, Path
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query, Path
+from fastapi.responses import StreamingResponse
 from beanie import PydanticObjectId
 from fastapi_pagination import Page
 from fastapi_pagination.ext.beanie import apaginate
+from pymongo.errors import DuplicateKeyError
 
-from src.models.card import Card, CardCreate, CardRead, CardUpdate
+from src.models.card import Card, CardCreate, CardRead, CardReadProjection, CardUpdate
 from src.models.collection import Collection
+from src.models.enums.enums import SearchMode
+from src.core.search import build_name_filter
+from src.core import cascade, deck_summary, stats
+from src.core.cascade import DeletePolicy
+from src.core.exporter import NDJSON_MEDIA_TYPE, ExportFormat, export_cards
+from src.core.importer import import_cards, iter_csv_rows, iter_ndjson_rows
+from src.core.cache import get_cached, get_cached_by_name, invalidate
+from src.core.pagination import CursorPage, CursorParams, apaginate_profile, cursor_params, keyset_paginate
+from src.core.responses import FastJSONRoute
+from src.core.singleflight import coalesce, flights
+from src.core.conditional import document_etag, not_modified, save_if_match
 
-router = APIRouter(prefix="/cards", tags=["Cards"])
+router = APIRouter(prefix="/cards", tags=["Cards"], route_class=FastJSONRoute)
 
 @router.get(
     "/search", 
     response_model=Page[CardRead], 
     status_code=status.HTTP_200_OK,
     summary="Buscar cartas por nome",
-    description="Realiza uma busca textual (case-insensitive) no nome das cartas.",
+    description="Realiza uma busca no nome das cartas: trecho (case-insensitive), prefixo sem acentos (indexado) ou índice de texto.",
     responses={
         200: {"description": "Busca realizada com sucesso"},
         422: {"description": "Erro de validação (ex: query muito curta)"}
     }
 )
 async def search_cards(
-    query: str = Query(..., min_length=2, description="Texto parcial para busca no nome da carta (ex: 'dragon')")
+    query: str = Query(..., min_length=2, description="Texto parcial para busca no nome da carta (ex: 'dragon')"),
+    mode: SearchMode = Query(SearchMode.contains, description="Modo de busca: contains, prefix ou text")
 ):
     """
     Busca cartas por nome (Case Insensitive) com paginação.
     """
-    regex = re.compile(query, re.IGNORECASE)
-    
     return await apaginate(
-        Card.find(
-            {"name": {"$regex": regex}},
-            fetch_links=True
-        )
+        Card.find(build_name_filter(query, mode)),
+        projection_model=CardReadProjection
     )
 
 @router.get(
@@ -44,14 +54,15 @@ async def search_cards(
         200: {"description": "Estatísticas geradas com sucesso"}
     }
 )
+@coalesce("cards.stats.by_rarity")
 async def cards_by_rarity_stats():
-    """Estatísticas: Contagem por raridade"""
-    pipeline = [
-        {"$group": {"_id": "$rarity", "total_cards": {"$sum": 1}}},
-        {"$sort": {"total_cards": -1}},
-        {"$project": {"rarity": "$_id", "total_cards": 1, "_id": 0}}
+    """Estatísticas: Contagem por raridade (lida do contador materializado)"""
+    counts = await stats.read_stats(stats.CARDS_BY_RARITY)
+    return [
+        {"total_cards": total, "rarity": rarity}
+        for rarity, total in sorted(counts.items(), key=lambda item: -item[1])
+        if total > 0
     ]
-    return await Card.aggregate(pipeline).to_list()
 
 @router.get(
     "/stats/by-type", 
@@ -62,14 +73,15 @@ async def cards_by_rarity_stats():
         200: {"description": "Estatísticas geradas com sucesso"}
     }
 )
+@coalesce("cards.stats.by_type")
 async def cards_by_type_stats():
-    """Estatísticas: Contagem por tipo"""
-    pipeline = [
-        {"$group": {"_id": "$type", "total_cards": {"$sum": 1}}},
-        {"$sort": {"total_cards": -1}},
-        {"$project": {"type": "$_id", "total_cards": 1, "_id": 0}}
+    """Estatísticas: Contagem por tipo (lida do contador materializado)"""
+    counts = await stats.read_stats(stats.CARDS_BY_TYPE)
+    return [
+        {"total_cards": total, "type": card_type}
+        for card_type, total in sorted(counts.items(), key=lambda item: -item[1])
+        if total > 0
     ]
-    return await Card.aggregate(pipeline).to_list()
 
 @router.get(
     "/", 
@@ -83,7 +95,22 @@ async def cards_by_type_stats():
 )
 async def list_cards():
     """Lista todas as cartas com paginação automática"""
-    return await apaginate(Card.find_all(fetch_links=True))
+    return await apaginate_profile(Card, "lists", projection_model=CardReadProjection)
+
+@router.get(
+    "/cursor", 
+    response_model=CursorPage[CardRead], 
+    status_code=status.HTTP_200_OK,
+    summary="Listar cartas (cursor)",
+    description="Lista todas as cartas com paginação por cursor: páginas profundas custam o mesmo que a primeira.",
+    responses={
+        200: {"description": "Listagem retornada com sucesso"},
+        400: {"description": "Cursor inválido"}
+    }
+)
+async def list_cards_cursor(params: CursorParams = Depends(cursor_params)):
+    """Lista todas as cartas com paginação por cursor"""
+    return await keyset_paginate(Card.find_all().project(CardReadProjection), params)
 
 
 
@@ -103,11 +130,11 @@ async def list_cards():
 )
 async def create_card(data: CardCreate):
     """Cria uma nova carta"""
-    existing = await Card.find_one(Card.name == data.name)
+    existing = await get_cached_by_name(Card, data.name)
     if existing:
         raise HTTPException(status_code=400, detail="Carta com esse nome já existe!")
     
-    collection = await Collection.get(data.collection_id)
+    collection = await get_cached(Collection, data.collection_id)
     if not collection:
         raise HTTPException(status_code=404, detail=f"Collection com ID {data.collection_id} não existe!")
     card = Card(
@@ -117,66 +144,138 @@ async def create_card(data: CardCreate):
         text=data.text,
         collection=collection
     )
-    await card.insert()
+    try:
+        await card.insert()
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Carta com esse nome já existe!")
+    await stats.on_card_created(card)
     
     return CardRead(**card.model_dump(exclude={'collection'}), collection=card.collection)
 
+@router.post(
+    "/bulk", 
+    status_code=status.HTTP_200_OK,
+    summary="Importar cartas em lote",
+    description=(
+        "Importa cartas a partir de um corpo NDJSON (application/x-ndjson) ou CSV com cabeçalho (text/csv), "
+        "lido em streaming e gravado em lotes. Retorna um relatório com os erros de cada linha rejeitada."
+    ),
+    responses={
+        200: {"description": "Importação processada (ver relatório de erros por linha)"},
+        415: {"description": "Content-Type não suportado"}
+    }
+)
+async def bulk_import_cards(request: Request):
+    """Importa cartas em lote (NDJSON ou CSV)"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines"):
+        rows = iter_ndjson_rows(request.stream())
+    elif content_type in ("text/csv", "application/csv"):
+        rows = iter_csv_rows(request.stream())
+    else:
+        raise HTTPException(415, "Use Content-Type application/x-ndjson ou text/csv")
+
+    return await import_cards(rows)
+
+@router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    summary="Exportar cartas",
+    description=(
+        "Exporta todas as cartas em streaming, lidas do banco em lotes. "
+        "ndjson: um objeto por linha; columnar: cabeçalho com as colunas e um lote de valores por coluna em cada linha."
+    ),
+    responses={
+        200: {"description": "Export enviado em streaming", "content": {NDJSON_MEDIA_TYPE: {}}}
+    }
+)
+async def export_all_cards(
+    format: ExportFormat = Query(ExportFormat.ndjson, description="Formato de saída: ndjson ou columnar")
+):
+    return StreamingResponse(
+        export_cards({}, format),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="cards.{format.value}.jsonl"'},
+    )
+
 @router.get(
     "/{card_id}", 
     response_model=CardRead, 
     status_code=status.HTTP_200_OK,
     summary="Buscar carta por ID",
-    description="Retorna os detalhes de uma carta específica.",
+    description="Retorna os detalhes de uma carta específica. Envia ETag e responde 304 a um If-None-Match que case com ele.",
     responses={
         200: {"description": "Carta encontrada e retornada"},
+        304: {"description": "A carta não mudou desde o ETag informado"},
         404: {"description": "Carta não encontrada"},
         422: {"description": "ID inválido (formato ObjectID incorreto)"}
     }
 )
 async def get_card_by_id(
+    request: Request,
+    response: Response,
     card_id: PydanticObjectId = Path(..., description="ID da carta a ser buscada")
 ):
     """Busca carta por ID"""
-    card = await Card.get(card_id, fetch_links=True)
+    card = await flights.do("cards.get", card_id, lambda: get_cached(Card, card_id))
     if not card:
         raise HTTPException(404, f"Carta com ID {card_id} não existe!")
+    unchanged = not_modified(request, response, document_etag(card))
+    if unchanged:
+        return unchanged
     return CardRead(**card.model_dump(exclude={'collection'}), collection=card.collection)
 
 @router.delete(
     "/{card_id}", 
-    status_code=status.HTTP_204_NO_CONTENT,
+    status_code=status.HTTP_200_OK,
     summary="Excluir carta",
-    description="Remove permanentemente uma carta do sistema.",
+    description=(
+        "Remove permanentemente uma carta. Com policy=cascade a carta é retirada de todos os decks "
+        "(um único update_many); com policy=restrict a exclusão é recusada se algum deck a contém."
+    ),
     responses={
-        204: {"description": "Carta excluída com sucesso (sem conteúdo de retorno)"},
+        200: {"description": "Carta excluída; retorna quantos documentos foram afetados"},
         404: {"description": "Carta não encontrada"},
+        409: {"description": "Política restrict: a carta ainda está em decks"},
         422: {"description": "ID inválido"}
     }
 )
 async def delete_card(
-    card_id: PydanticObjectId = Path(..., description="ID da carta a ser deletada")
+    card_id: PydanticObjectId = Path(..., description="ID da carta a ser deletada"),
+    policy: Optional[DeletePolicy] = Query(None, description="cascade ou restrict (padrão: DELETE_POLICY_CARD)")
 ):
     """Deleta uma carta"""
     card = await Card.get(card_id)
     if not card:
         raise HTTPException(404, f"Carta com ID {card_id} não existe!")
-    
-    await card.delete()
+
+    try:
+        deleted = await cascade.delete_card(card, policy or cascade.DELETE_POLICY_CARD)
+    except cascade.DeleteRestricted as e:
+        raise HTTPException(409, {"message": e.message, "references": e.references})
+    return {"message": "Carta removida com sucesso", "deleted": deleted}
 
 @router.put(
     "/{card_id}", 
     response_model=CardRead, 
     status_code=status.HTTP_200_OK,
     summary="Atualizar carta",
-    description="Atualiza campos de uma carta. Se o collection_id for alterado, a carta é movida para outra coleção.",
+    description=(
+        "Atualiza campos de uma carta. Se o collection_id for alterado, a carta é movida para outra coleção. "
+        "Com If-Match, só grava se a carta ainda estiver na versão do ETag informado."
+    ),
     responses={
         200: {"description": "Carta atualizada com sucesso"},
         400: {"description": "Erro de Requisição: Nenhum dado enviado para atualização"},
         404: {"description": "Recurso não encontrado: Carta ou nova Coleção não existem"},
+        412: {"description": "If-Match não confere: a carta foi alterada por outra requisição"},
         422: {"description": "Erro de Validação: Tipos de dados incorretos"}
     }
 )
 async def update_card(
+    request: Request,
+    response: Response,
     card_id: PydanticObjectId = Path(..., description="ID da carta a ser atualizada"), 
     updated_card: CardUpdate = None
 ):
@@ -189,8 +288,9 @@ async def update_card(
     if not card_dict:
         raise HTTPException(400, "Nenhum campo para atualizar")
 
+    previous = card.model_copy()
     if 'collection_id' in card_dict:
-        new_collection = await Collection.get(card_dict['collection_id'])
+        new_collection = await get_cached(Collection, card_dict['collection_id'])
         if not new_collection:
             raise HTTPException(404, f"Collection com ID {card_dict['collection_id']} não existe!")
         card.collection = new_collection
@@ -199,5 +299,12 @@ async def update_card(
     for key, value in card_dict.items():
         setattr(card, key, value)
     
-    await card.save()
+    try:
+        await save_if_match(request, card)
+    except DuplicateKeyError:
+        raise HTTPException(400, "Carta com esse nome já existe!")
+    await invalidate(Card, card.id, previous.name, card.name)
+    await stats.on_card_updated(previous, card)
+    await deck_summary.on_card_updated(previous, card)
+    response.headers["ETag"] = document_etag(card)
     return CardRead(**card.model_dump(exclude={'collection'}), collection=card.collection)
\ No newline at end of file
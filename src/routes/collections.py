@@ -1,9 +1,10 @@
+from typing import Optional
 from datetime import date, datetime
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
 from beanie import PydanticObjectId
 from fastapi_pagination import Page
 from fastapi_pagination.ext.beanie import apaginate
-import re
 
 from src.models.collection import (
     Collection,
@@ -12,10 +13,22 @@ from src.models.collection import (
     CollectionResponse
 )
 from src.models.card import Card
+from src.models.enums.enums import SearchMode
+from src.core.search import build_name_filter
+from src.core import cascade, stats
+from src.core.cascade import DeletePolicy
+from src.core.cache import get_cached, invalidate
+from src.core.database import read_collection
+from src.core.exporter import NDJSON_MEDIA_TYPE, ExportFormat, export_cards
+from src.core.pagination import CursorPage, CursorParams, apaginate_profile, cursor_params, keyset_paginate
+from src.core.responses import FastJSONRoute
+from src.core.singleflight import coalesce, flights
+from src.core.conditional import document_etag, not_modified, page_etag, save_if_match
 
 router = APIRouter(
     prefix="/collections",
-    tags=["Collections"]
+    tags=["Collections"],
+    route_class=FastJSONRoute
 )
 
 
@@ -31,16 +44,15 @@ router = APIRouter(
     }
 )
 async def search_collections(
-    query: str = Query(..., min_length=2, description="Texto para busca no nome da coleção")
+    query: str = Query(..., min_length=2, description="Texto para busca no nome da coleção"),
+    mode: SearchMode = Query(SearchMode.contains, description="Modo de busca: contains, prefix ou text")
 ):
     """
     Retorna uma lista paginada de collections cujo nome contenha a string de consulta.
     """
-    regex = re.compile(query, re.IGNORECASE)
-
     return await apaginate(
         Collection.find(
-            {"name": {"$regex": regex}}
+            build_name_filter(query, mode)
         )
     )
 
@@ -53,8 +65,9 @@ async def search_collections(
         200: {"description": "Contagem retornada com sucesso"}
     }
 )
+@coalesce("collections.count")
 async def count_collections():
-    total = await Collection.find_all().count()
+    total = await read_collection(Collection, "stats").count_documents({})
     return {"total": total}
 
 @router.get(
@@ -92,19 +105,15 @@ async def filter_by_year(
         200: {"description": "Estatísticas geradas com sucesso"}
     }
 )
+@coalesce("collections.stats.by_year")
 async def count_by_year():
-    pipeline = [
-        {
-            "$group": {
-                "_id": {"$year": "$release_date"},
-                "total": {"$sum": 1}
-            }
-        },
-        {"$sort": {"_id": 1}}
+    counts = await stats.read_stats(stats.COLLECTIONS_BY_YEAR)
+    return [
+        {"_id": int(year), "total": total}
+        for year, total in sorted(counts.items(), key=lambda item: int(item[0]))
+        if total > 0
     ]
 
-    return await Collection.aggregate(pipeline).to_list()
-
 @router.get(
     "/stats/with-cards",
     status_code=status.HTTP_200_OK,
@@ -114,41 +123,46 @@ async def count_by_year():
         200: {"description": "Relatório gerado com sucesso"}
     }
 )
+@coalesce("collections.stats.with_cards")
 async def collections_with_card_count():
-    pipeline = [
-        {
-            "$lookup": {
-                "from": "cards",
-                "localField": "_id",
-                "foreignField": "collection.$id",
-                "as": "cards"
-            }
-        },
-        {
-            "$project": {
-                "_id": {"$toString": "$_id"},  
-                "name": 1,
-                "total_cards": {"$size": "$cards"}
-            }
-        }
+    entries = await stats.read_stats(stats.COLLECTIONS_WITH_CARDS)
+    return [
+        {"_id": collection_id, "name": entry["name"], "total_cards": entry.get("total_cards", 0)}
+        for collection_id, entry in entries.items()
+        if "name" in entry
     ]
 
-    return await Collection.aggregate(pipeline).to_list()
-
 @router.get(
     "/", 
     response_model=Page[Collection],
     status_code=status.HTTP_200_OK,
     summary="Listar todas as coleções",
-    description="Retorna todas as coleções com paginação.",
+    description="Retorna todas as coleções com paginação. Envia ETag da página e responde 304 a um If-None-Match que case com ele.",
     responses={
-        200: {"description": "Lista recuperada com sucesso"}
+        200: {"description": "Lista recuperada com sucesso"},
+        304: {"description": "A página não mudou desde o ETag informado"}
     }
 )
-async def list_collections():
-    return await apaginate(
-        Collection.find_all()
-    )
+async def list_collections(request: Request, response: Response):
+    page = await apaginate_profile(Collection, "lists", sort=[("_id", 1)])
+    unchanged = not_modified(request, response, page_etag(page, Collection.get_collection_name()))
+    if unchanged:
+        return unchanged
+    return page
+
+@router.get(
+    "/cursor", 
+    response_model=CursorPage[Collection],
+    status_code=status.HTTP_200_OK,
+    summary="Listar coleções (cursor)",
+    description="Retorna todas as coleções com paginação por cursor.",
+    responses={
+        200: {"description": "Lista recuperada com sucesso"},
+        400: {"description": "Cursor inválido"}
+    }
+)
+async def list_collections_cursor(params: CursorParams = Depends(cursor_params)):
+    return await keyset_paginate(Collection.find_all(), params)
 
 
 @router.post(
@@ -169,6 +183,7 @@ async def create_collection(data : CollectionCreate):
     """
     collection = Collection(**data.model_dump())
     await collection.insert()
+    await stats.on_collection_created(collection)
 
     collection_inserted = await Collection.get(collection.id, fetch_links=True)
 
@@ -186,18 +201,23 @@ async def create_collection(data : CollectionCreate):
     response_model=CollectionResponse,
     status_code=status.HTTP_200_OK,
     summary="Buscar coleção por ID",
-    description="Retorna os detalhes de uma coleção específica.",
+    description="Retorna os detalhes de uma coleção específica. Envia ETag e responde 304 a um If-None-Match que case com ele.",
     responses={
         200: {"description": "Coleção encontrada"},
+        304: {"description": "A coleção não mudou desde o ETag informado"},
         404: {"description": "Coleção não encontrada"},
         422: {"description": "ID inválido"}
     }
 )
-async def get_collection(collection_id: str):
-    collection = await Collection.get(collection_id)
+async def get_collection(collection_id: str, request: Request, response: Response):
+    collection = await flights.do("collections.get", collection_id, lambda: get_cached(Collection, collection_id))
     if not collection:
         raise HTTPException(404, "Collection não encontrada")
 
+    unchanged = not_modified(request, response, document_etag(collection))
+    if unchanged:
+        return unchanged
+
     return CollectionResponse(
         id=str(collection.id),
         name=collection.name,
@@ -209,21 +229,83 @@ async def get_collection(collection_id: str):
     response_model=Page[Card],
     status_code=status.HTTP_200_OK,
     summary="Listar cartas da coleção",
-    description="Retorna todas as cartas pertencentes a uma coleção específica.",
+    description=(
+        "Retorna todas as cartas pertencentes a uma coleção específica. "
+        "Envia ETag da página e responde 304 a um If-None-Match que case com ele."
+    ),
     responses={
         200: {"description": "Cartas recuperadas com sucesso"},
+        304: {"description": "A página não mudou desde o ETag informado"},
         404: {"description": "Coleção não encontrada"},
         422: {"description": "ID inválido"}
     }
 )
-async def get_collection_cards(collection_id: str):
-    collection = await Collection.get(collection_id, fetch_links=True)
+async def get_collection_cards(collection_id: str, request: Request, response: Response):
+    collection = await get_cached(Collection, collection_id)
 
     if not collection:
         raise HTTPException(404, "Collection não encontrada")
 
-    return await apaginate(
-        Card.find({"collection.$id": collection.id})
+    page = await apaginate(
+        Card.find({"collection.$id": collection.id}).sort("_id")
+    )
+    unchanged = not_modified(request, response, page_etag(page, Card.get_collection_name()))
+    if unchanged:
+        return unchanged
+    return page
+
+@router.get(
+    "/{collection_id}/cards/cursor", 
+    response_model=CursorPage[Card],
+    status_code=status.HTTP_200_OK,
+    summary="Listar cartas da coleção (cursor)",
+    description="Retorna as cartas de uma coleção com paginação por cursor.",
+    responses={
+        200: {"description": "Cartas recuperadas com sucesso"},
+        400: {"description": "Cursor inválido"},
+        404: {"description": "Coleção não encontrada"},
+        422: {"description": "ID inválido"}
+    }
+)
+async def get_collection_cards_cursor(
+    collection_id: str,
+    params: CursorParams = Depends(cursor_params)
+):
+    collection = await get_cached(Collection, collection_id)
+
+    if not collection:
+        raise HTTPException(404, "Collection não encontrada")
+
+    return await keyset_paginate(
+        Card.find({"collection.$id": collection.id}),
+        params
+    )
+
+@router.get(
+    "/{collection_id}/cards/export",
+    status_code=status.HTTP_200_OK,
+    summary="Exportar cartas da coleção",
+    description=(
+        "Exporta todas as cartas da coleção em streaming, sem paginação nem count. "
+        "ndjson: um objeto por linha; columnar: cabeçalho com as colunas e um lote de valores por coluna em cada linha."
+    ),
+    responses={
+        200: {"description": "Export enviado em streaming", "content": {NDJSON_MEDIA_TYPE: {}}},
+        404: {"description": "Coleção não encontrada"}
+    }
+)
+async def export_collection_cards(
+    collection_id: str,
+    format: ExportFormat = Query(ExportFormat.ndjson, description="Formato de saída: ndjson ou columnar")
+):
+    collection = await get_cached(Collection, collection_id)
+    if not collection:
+        raise HTTPException(404, "Collection não encontrada")
+
+    return StreamingResponse(
+        export_cards({"collection.$id": collection.id}, format),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="collection-{collection.id}.{format.value}.jsonl"'},
     )
 
 @router.put(
@@ -231,23 +313,32 @@ async def get_collection_cards(collection_id: str):
     response_model=CollectionResponse,
     status_code=status.HTTP_200_OK,
     summary="Atualizar coleção",
-    description="Atualiza o nome ou data de lançamento da coleção.",
+    description=(
+        "Atualiza o nome ou data de lançamento da coleção. "
+        "Com If-Match, só grava se a coleção ainda estiver na versão do ETag informado."
+    ),
     responses={
         200: {"description": "Coleção atualizada com sucesso"},
         404: {"description": "Coleção não encontrada"},
+        412: {"description": "If-Match não confere: a coleção foi alterada por outra requisição"},
         422: {"description": "Dados de atualização inválidos"}
     }
 )
-async def update_collection(collection_id: str, data: CollectionUpdate):
+async def update_collection(collection_id: str, data: CollectionUpdate, request: Request, response: Response):
     collection = await Collection.get(collection_id)
     if not collection:
         raise HTTPException(404, "Collection não encontrada")
 
+    old_name = collection.name
+    old_release_date = collection.release_date
     update_data = data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(collection, field, value)
 
-    await collection.save()
+    await save_if_match(request, collection)
+    await invalidate(Collection, collection.id, old_name, collection.name)
+    await stats.on_collection_updated(old_release_date, collection)
+    response.headers["ETag"] = document_etag(collection)
 
     return CollectionResponse(
         id=str(collection.id),
@@ -259,17 +350,27 @@ async def update_collection(collection_id: str, data: CollectionUpdate):
     "/{collection_id}",
     status_code=status.HTTP_200_OK,
     summary="Excluir coleção",
-    description="Remove uma coleção do sistema.",
+    description=(
+        "Remove uma coleção. Com policy=cascade as cartas da coleção são apagadas (delete_many) e retiradas "
+        "dos decks (update_many em lotes); com policy=restrict a exclusão é recusada se a coleção tem cartas."
+    ),
     responses={
-        200: {"description": "Coleção removida com sucesso"},
+        200: {"description": "Coleção removida; retorna quantos documentos foram afetados"},
         404: {"description": "Coleção não encontrada"},
+        409: {"description": "Política restrict: a coleção ainda tem cartas"},
         422: {"description": "ID inválido"}
     }
 )
-async def delete_collection(collection_id: str):
+async def delete_collection(
+    collection_id: str,
+    policy: Optional[DeletePolicy] = Query(None, description="cascade ou restrict (padrão: DELETE_POLICY_COLLECTION)")
+):
     collection = await Collection.get(collection_id)
     if not collection:
         raise HTTPException(404, "Collection não encontrada")
 
-    await collection.delete()
-    return {"message": "Collection removida com sucesso"}
\ No newline at end of file
+    try:
+        deleted = await cascade.delete_collection(collection, policy or cascade.DELETE_POLICY_COLLECTION)
+    except cascade.DeleteRestricted as e:
+        raise HTTPException(409, {"message": e.message, "references": e.references})
+    return {"message": "Collection removida com sucesso", "deleted": deleted}
\ No newline at end of file
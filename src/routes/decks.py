@@ -1,69 +1,209 @@
-from src.models.card import Card
+from src.models.card import Card, RemoveCardsRequest
 from datetime import date, datetime
-from src.models.deck import Deck, AddCardsRequest, DeckCreate, DeckUpdate, DeckResponse
+from src.models.deck import (
+    Deck, AddCardsRequest, DeckAnalytics, DeckAnalyticsBatch, DeckAnalyticsRequest, DeckCreate, DeckUpdate,
+    DeckResponse, DeckSummary
+)
 from src.models.user import User
-from src.models.enums.enums import DeckFormat 
+from src.models.enums.enums import DeckFormat, SearchMode
+from src.core.search import build_name_filter
+from src.core import stats
+from src.core.cooccurrence import engine as cooccurrence
+from src.core.deck_analytics import analyze_decks
+from src.core.exporter import NDJSON_MEDIA_TYPE, ExportFormat, export_decks
+from src.core.deck_summary import add_cards_update, remove_cards_pipeline
+from src.core.similarity import index as similarity
+from src.core.cache import get_many_cached
+from src.core.database import read_collection
+from src.core.pagination import CursorPage, CursorParams, apaginate_profile, cursor_params, keyset_paginate
+from src.core.responses import FastJSONRoute
+from src.core.singleflight import coalesce
+from src.core.conditional import document_etag, not_modified, page_etag, save_if_match
 from fastapi_pagination import Page
-from fastapi import APIRouter, HTTPException, status, Query
-from beanie import PydanticObjectId
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
+from beanie import Link, PydanticObjectId
+from beanie.odm.queries.update import UpdateResponse
+from pymongo import ReturnDocument
+from bson import DBRef
+from bson.errors import InvalidId
 from collections import Counter
-import re
+from typing import Optional
+import asyncio
 from fastapi_pagination.ext.beanie import apaginate
 
 router = APIRouter(
     prefix="/decks",
-    tags=["Decks"]
+    tags=["Decks"],
+    route_class=FastJSONRoute
 )
 
 
+async def resolve_deck_links(decks: list[Deck]) -> list[Deck]:
+    """
+    Resolve o dono e as cartas de uma lista de decks em lote:
+    - uma única query $in para todos os donos
+    - uma única query $in para todas as cartas
+    Os documentos são reassociados em memória, então o custo não depende
+    do tamanho da página. As cartas passam pelo cache e só as ausentes
+    vão ao banco.
+    """
+    owner_ids = {deck.owner.ref.id for deck in decks if isinstance(deck.owner, Link)}
+    card_ids = {
+        link.ref.id
+        for deck in decks
+        for link in deck.cards
+        if isinstance(link, Link)
+    }
+
+    async def fetch_by_ids(model, ids):
+        if not ids:
+            return {}
+        docs = await model.find({"_id": {"$in": list(ids)}}).to_list()
+        return {doc.id: doc for doc in docs}
+
+    owners, cards = await asyncio.gather(
+        fetch_by_ids(User, owner_ids),
+        get_many_cached(Card, card_ids),
+    )
+
+    for deck in decks:
+        if isinstance(deck.owner, Link):
+            deck.owner = owners.get(deck.owner.ref.id, deck.owner)
+        deck.cards = [
+            cards.get(link.ref.id, link) if isinstance(link, Link) else link
+            for link in deck.cards
+        ]
+    return decks
+
+
+def deck_card_ids(deck: Deck) -> list[PydanticObjectId]:
+    return [card.ref.id if isinstance(card, Link) else card.id for card in deck.cards]
+
+
+def deck_changed(deck_id, previous_format, previous_ids: list, deck_format, card_ids: list) -> None:
+    """
+    Propaga a mudança de cartas/formato de um deck para os índices em memória.
+    """
+    cooccurrence.on_deck_changed(deck_id, previous_format, previous_ids, deck_format, card_ids)
+    similarity.on_deck_changed(deck_id, deck_format, card_ids)
+
+
+def parse_object_ids(ids: list[str]) -> tuple[list[PydanticObjectId], list[str]]:
+    """
+    Converte uma lista de strings em ObjectIds, separando os IDs inválidos.
+    """
+    parsed, invalid = [], []
+    for raw in ids:
+        try:
+            parsed.append(PydanticObjectId(str(raw)))
+        except (InvalidId, TypeError):
+            invalid.append(str(raw))
+    return parsed, invalid
+
+
 async def add_cards_to_deck_helper(deck, card_ids: list[str]):
     """
     Adiciona cartas a um deck existente garantindo:
     - apenas 1 cópia de cada carta
-    - existência das cartas
+    - existência das cartas (validadas pelo cache, com uma única query $in
+      para as ausentes)
+    Todos os IDs inexistentes ou duplicados são reportados de uma vez e a
+    escrita é um único update atômico que também acrescenta as cartas ao
+    resumo e às contagens do deck, sem regravar o documento inteiro.
     """
-    existing_ids = {str(c.id) for c in deck.cards}  
+    parsed, invalid = parse_object_ids(card_ids)
+
+    existing_ids = {c.ref.id if isinstance(c, Link) else c.id for c in deck.cards}
+    seen = set()
+    duplicates, to_add = [], []
+    for cid in parsed:
+        if cid in existing_ids or cid in seen:
+            duplicates.append(str(cid))
+        else:
+            to_add.append(cid)
+        seen.add(cid)
+
+    cards = await get_many_cached(Card, to_add) if to_add else {}
+    missing = [str(cid) for cid in to_add if cid not in cards]
+
+    if invalid or duplicates or missing:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "Não foi possível adicionar as cartas ao deck",
+                "invalid": invalid,
+                "duplicates": duplicates,
+                "missing": missing,
+            }
+        )
 
-    for cid in card_ids:
-        cid_str = str(cid)
+    if not to_add:
+        return deck
 
-        if cid_str in existing_ids:
-            raise HTTPException(
-                status_code=400,
-                detail=f"A carta {cid_str} já está no deck"
-            )
+    # O filtro $nin impede que uma requisição concorrente que já adicionou
+    # alguma destas cartas as duplique no resumo e nas contagens.
+    update = add_cards_update([cards[cid] for cid in to_add])
+    update["$push"]["cards"] = {"$each": [DBRef(Card.get_collection_name(), cid) for cid in to_add]}
+    updated = await Deck.find_one({"_id": deck.id, "cards.$id": {"$nin": to_add}}).update(
+        update,
+        response_type=UpdateResponse.NEW_DOCUMENT,
+    )
+    if not updated:
+        in_deck = set(await Deck.distinct("cards.$id", {"_id": deck.id}))
+        if not in_deck and not await Deck.find({"_id": deck.id}).count():
+            raise HTTPException(404, "Deck não encontrado")
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "Não foi possível adicionar as cartas ao deck",
+                "invalid": [],
+                "duplicates": [str(cid) for cid in to_add if cid in in_deck],
+                "missing": [],
+            }
+        )
+    deck_changed(deck.id, deck.format, deck_card_ids(deck), updated.format, deck_card_ids(updated))
+    return updated
 
-        card = await Card.get(PydanticObjectId(cid_str))
-        if not card:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Carta {cid_str} não encontrada"
-            )
 
-        deck.cards.append(card)
-        existing_ids.add(cid_str)  
+async def remove_cards_from_deck_helper(deck_id: PydanticObjectId, card_ids: list[str]):
+    """
+    Remove cartas de um deck com um $pull condicional, sem carregar o deck.
 
-    await deck.save()
-    return deck
+    O filtro só casa se o deck existir e contiver todas as cartas pedidas;
+    o update em pipeline tira as cartas também do resumo e recalcula as
+    contagens na mesma escrita. Quando nada casa, uma leitura leve do deck
+    decide entre deck inexistente e cartas fora do deck (todas listadas).
+    """
+    parsed, invalid = parse_object_ids(card_ids)
+    ids = list(dict.fromkeys(parsed))
+
+    updated = None
+    if ids and not invalid:
+        raw = await Deck.get_pymongo_collection().find_one_and_update(
+            {"_id": deck_id, "cards.$id": {"$all": ids}},
+            remove_cards_pipeline(ids),
+            return_document=ReturnDocument.AFTER,
+        )
+        updated = Deck.model_validate(raw) if raw else None
 
+    if updated is None:
+        in_deck = await Deck.distinct("cards.$id", {"_id": deck_id})
+        if not in_deck and not await Deck.find({"_id": deck_id}).count():
+            raise HTTPException(404, "Deck não encontrado")
 
-async def remove_card_from_deck_helper(deck, card_id: str):
-    """
-    Remove uma carta de um deck existente.
-    """
-    card_str = str(card_id)
-    
-    card_in_deck = next((c for c in deck.cards if str(c.id) == card_str), None)
-    if not card_in_deck:
+        in_deck = set(in_deck)
+        not_in_deck = invalid + [str(cid) for cid in ids if cid not in in_deck]
         raise HTTPException(
             status_code=404,
-            detail=f"A carta {card_str} não está no deck"
+            detail={
+                "message": "Uma ou mais cartas não estão no deck",
+                "not_in_deck": not_in_deck,
+            }
         )
-
-    deck.cards.remove(card_in_deck)
-    
-    await deck.save()
-    return deck
+    remaining = deck_card_ids(updated)
+    deck_changed(deck_id, updated.format, remaining + ids, updated.format, remaining)
+    return updated
 
 
 @router.get(
@@ -78,17 +218,15 @@ async def remove_card_from_deck_helper(deck, card_id: str):
     }
 )
 async def search_decks(
-    query: str = Query(..., min_length=2, description="Nome parcial do deck")
+    query: str = Query(..., min_length=2, description="Nome parcial do deck"),
+    mode: SearchMode = Query(SearchMode.contains, description="Modo de busca: contains, prefix ou text")
 ):
-    regex = re.compile(query, re.IGNORECASE)
-
     page = await apaginate(
         Deck.find(
-            {"name": {"$regex": regex}}
+            build_name_filter(query, mode)
         )
     )
-    for deck in page.items:
-        await deck.fetch_all_links()
+    await resolve_deck_links(page.items)
     return page
 
 @router.get(
@@ -100,8 +238,9 @@ async def search_decks(
         200: {"description": "Contagem retornada com sucesso"}
     }
 )
+@coalesce("decks.count")
 async def count_decks():
-    total = await Deck.find_all().count()
+    total = await read_collection(Deck, "stats").count_documents({})
     return {"total": total}
 
 @router.get(
@@ -113,16 +252,14 @@ async def count_decks():
         200: {"description": "Estatísticas geradas com sucesso"}
     }
 )
+@coalesce("decks.stats.by_format")
 async def decks_by_format_stats():
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$format",
-                "total": {"$sum": 1}
-            }
-        }
+    counts = await stats.read_stats(stats.DECKS_BY_FORMAT)
+    return [
+        {"_id": deck_format, "total": total}
+        for deck_format, total in counts.items()
+        if total > 0
     ]
-    return await Deck.aggregate(pipeline).to_list()
 
 @router.get(
     "/by-format/{format}", 
@@ -141,8 +278,7 @@ async def decks_by_format(format: DeckFormat):
             {"format": format}
         )
     )
-    for deck in page.items:
-        await deck.fetch_all_links()
+    await resolve_deck_links(page.items)
 
     return page
 
@@ -171,8 +307,7 @@ async def decks_by_date(
             }
         )
     )
-    for deck in page.items:
-        await deck.fetch_all_links()
+    await resolve_deck_links(page.items)
 
     return page
 
@@ -187,11 +322,58 @@ async def decks_by_date(
     }
 )
 async def list_decks():
-    page = await apaginate(Deck.find())
-    for deck in page.items:
-        await deck.fetch_all_links()
+    page = await apaginate_profile(Deck, "lists")
+    await resolve_deck_links(page.items)
     return page
 
+@router.get(
+    "/summary", 
+    response_model=Page[DeckSummary],
+    status_code=status.HTTP_200_OK,
+    summary="Listar resumo dos decks",
+    description="Retorna os decks com o resumo das cartas e as contagens por tipo e raridade, sem resolver o dono nem as cartas.",
+    responses={
+        200: {"description": "Lista retornada com sucesso"}
+    }
+)
+async def list_deck_summaries():
+    return await apaginate_profile(Deck, "lists", projection_model=DeckSummary)
+
+@router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    summary="Exportar decks",
+    description=(
+        "Exporta todos os decks (com os IDs das cartas) em streaming, lidos do banco em lotes. "
+        "ndjson: um objeto por linha; columnar: cabeçalho com as colunas e um lote de valores por coluna em cada linha."
+    ),
+    responses={
+        200: {"description": "Export enviado em streaming", "content": {NDJSON_MEDIA_TYPE: {}}}
+    }
+)
+async def export_all_decks(
+    format: ExportFormat = Query(ExportFormat.ndjson, description="Formato de saída: ndjson ou columnar")
+):
+    return StreamingResponse(
+        export_decks(format),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="decks.{format.value}.jsonl"'},
+    )
+
+@router.get(
+    "/cursor", 
+    response_model=CursorPage[Deck],
+    status_code=status.HTTP_200_OK,
+    summary="Listar todos os decks (cursor)",
+    description="Retorna todos os decks com paginação por cursor.",
+    responses={
+        200: {"description": "Lista retornada com sucesso"},
+        400: {"description": "Cursor inválido"}
+    }
+)
+async def list_decks_cursor(params: CursorParams = Depends(cursor_params)):
+    return await keyset_paginate(Deck.find(), params, transformer=resolve_deck_links)
+
 @router.post(
     "/", 
     response_model=DeckResponse, 
@@ -227,6 +409,8 @@ async def create_deck(data: DeckCreate):
         cards=[]
     )
     await deck.insert()
+    await stats.on_deck_created(deck)
+    deck_changed(deck.id, None, [], deck.format, [])
 
     return DeckResponse(
         id=str(deck.id),
@@ -242,19 +426,25 @@ async def create_deck(data: DeckCreate):
     response_model=DeckResponse,
     status_code=status.HTTP_200_OK,
     summary="Atualizar deck",
-    description="Atualiza nome, formato ou a lista completa de cartas do deck.",
+    description=(
+        "Atualiza nome, formato ou a lista completa de cartas do deck. "
+        "Com If-Match, só grava se o deck ainda estiver na versão do ETag informado."
+    ),
     responses={
         200: {"description": "Deck atualizado com sucesso"},
         400: {"description": "Uma ou mais cartas informadas não existem"},
         404: {"description": "Deck não encontrado"},
+        412: {"description": "If-Match não confere: o deck foi alterado por outra requisição"},
         422: {"description": "Erro de validação"}
     }
 )
-async def update_deck(deck_id: str, data: DeckUpdate):
+async def update_deck(deck_id: str, data: DeckUpdate, request: Request, response: Response):
     deck = await Deck.get(deck_id, fetch_links=True)
     if not deck:
         raise HTTPException(404, "Deck não encontrado")
 
+    previous_format = deck.format
+    previous_card_ids = deck_card_ids(deck)
     if data.name is not None:
         deck.name = data.name
 
@@ -271,7 +461,10 @@ async def update_deck(deck_id: str, data: DeckUpdate):
 
         deck.cards = cards
 
-    await deck.save()
+    await save_if_match(request, deck)
+    await stats.on_deck_updated(previous_format, deck)
+    deck_changed(deck.id, previous_format, previous_card_ids, deck.format, deck_card_ids(deck))
+    response.headers["ETag"] = document_etag(deck)
 
     return DeckResponse(
         id=str(deck.id),
@@ -290,16 +483,17 @@ async def update_deck(deck_id: str, data: DeckUpdate):
     description="Adiciona uma lista de cartas ao deck, validando duplicatas e existência.",
     responses={
         200: {"description": "Cartas adicionadas com sucesso"},
-        400: {"description": "Carta já existe no deck ou ID da carta inválido"},
+        400: {"description": "Cartas já existentes no deck, inexistentes ou com ID inválido (todas listadas na resposta)"},
         404: {"description": "Deck não encontrado"}
     }
 )
 async def add_cards_to_deck(deck_id: str, data: AddCardsRequest):
-    deck = await Deck.get(PydanticObjectId(deck_id), fetch_links=True)
+    deck = await Deck.get(PydanticObjectId(deck_id))
     if not deck:
         raise HTTPException(404, "Deck não encontrado")
 
     deck = await add_cards_to_deck_helper(deck, data.card_ids)
+    await deck.fetch_link("owner")
 
     return DeckResponse(
         id=str(deck.id),
@@ -307,7 +501,7 @@ async def add_cards_to_deck(deck_id: str, data: AddCardsRequest):
         format=deck.format,
         created_at=deck.created_at,
         owner=deck.owner,
-        cards_ids=[str(card.id) for card in deck.cards]
+        cards_ids=[str(card.ref.id) for card in deck.cards]
     )
 
 @router.post(
@@ -322,11 +516,32 @@ async def add_cards_to_deck(deck_id: str, data: AddCardsRequest):
     }
 )
 async def remove_card(deck_id: str, card_id : str):
-    deck = await Deck.get(PydanticObjectId(deck_id), fetch_links=True)
-    if not deck:
-        raise HTTPException(404, "Deck não encontrado")
+    deck = await remove_cards_from_deck_helper(PydanticObjectId(deck_id), [card_id])
+    await deck.fetch_link("owner")
 
-    deck = await remove_card_from_deck_helper(deck, card_id)
+    return DeckResponse(
+        id=str(deck.id),
+        name=deck.name,
+        format=deck.format,
+        created_at=deck.created_at,
+        owner=deck.owner,
+        cards_ids=[str(c.ref.id) for c in deck.cards]
+    )
+
+@router.post(
+    "/{deck_id}/remove_cards", 
+    response_model=DeckResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Remover cartas do deck",
+    description="Remove uma lista de cartas do deck em uma única operação atômica.",
+    responses={
+        200: {"description": "Cartas removidas com sucesso"},
+        404: {"description": "Deck não encontrado ou cartas fora do deck (todas listadas na resposta)"}
+    }
+)
+async def remove_cards(deck_id: str, data: RemoveCardsRequest):
+    deck = await remove_cards_from_deck_helper(PydanticObjectId(deck_id), data.card_ids)
+    await deck.fetch_link("owner")
 
     return DeckResponse(
         id=str(deck.id),
@@ -334,28 +549,130 @@ async def remove_card(deck_id: str, card_id : str):
         format=deck.format,
         created_at=deck.created_at,
         owner=deck.owner,
-        cards_ids=[str(c.id) for c in deck.cards]
+        cards_ids=[str(c.ref.id) for c in deck.cards]
+    )
+
+@router.post(
+    "/analytics", 
+    response_model=DeckAnalyticsBatch,
+    status_code=status.HTTP_200_OK,
+    summary="Analisar decks em lote",
+    description="Calcula a análise de composição e legalidade de vários decks em uma única agregação, para relatórios de meta.",
+    responses={
+        200: {"description": "Análises geradas com sucesso (decks inexistentes e IDs inválidos listados na resposta)"},
+        422: {"description": "Erro de validação: lista vazia ou com mais de 500 IDs"}
+    }
+)
+async def analyze_decks_batch(data: DeckAnalyticsRequest):
+    parsed, invalid = parse_object_ids(data.deck_ids)
+    ids = list(dict.fromkeys(parsed))
+    analytics = await analyze_decks(ids)
+
+    return DeckAnalyticsBatch(
+        decks=[analytics[deck_id] for deck_id in ids if deck_id in analytics],
+        not_found=[str(deck_id) for deck_id in ids if deck_id not in analytics],
+        invalid=invalid,
     )
 
+@router.get(
+    "/{deck_id}/analytics", 
+    response_model=DeckAnalytics,
+    status_code=status.HTTP_200_OK,
+    summary="Analisar deck",
+    description="Retorna a distribuição de tipos e raridades, as coleções das cartas e a legalidade do deck no seu formato, calculadas no banco.",
+    responses={
+        200: {"description": "Análise gerada com sucesso"},
+        404: {"description": "Deck não encontrado"}
+    }
+)
+@coalesce("decks.analytics", key=lambda deck_id: deck_id)
+async def deck_analytics(deck_id: str):
+    parsed, _ = parse_object_ids([deck_id])
+    analytics = await analyze_decks(parsed)
+    if not analytics:
+        raise HTTPException(404, "Deck não encontrado")
+    return analytics[parsed[0]]
+
+@router.get(
+    "/{deck_id}/similar", 
+    status_code=status.HTTP_200_OK,
+    summary="Decks similares",
+    description=(
+        "Retorna os decks com mais cartas em comum (Jaccard estimado por MinHash), "
+        "consultando só o índice LSH em memória."
+    ),
+    responses={
+        200: {"description": "Decks similares retornados com sucesso"},
+        404: {"description": "Deck não encontrado no índice (inexistente ou sem cartas)"},
+        503: {"description": "Índice de similaridade ainda sendo montado"}
+    }
+)
+async def similar_decks(
+    deck_id: PydanticObjectId,
+    k: int = Query(10, ge=1, le=100, description="Quantidade de decks"),
+    format: Optional[DeckFormat] = Query(None, description="Restringe a decks deste formato")
+):
+    if similarity.status in ("pending", "building", "failed"):
+        raise HTTPException(503, f"Índice de similaridade indisponível (status: {similarity.status})")
+    result = similarity.similar(deck_id, k, format)
+    if result is None:
+        raise HTTPException(404, "Deck não encontrado no índice de similaridade")
+    return result
+
 @router.get(
     "/{deck_id}/cards", 
     response_model=Page[Card],
     status_code=status.HTTP_200_OK,
     summary="Listar cartas do deck",
-    description="Retorna todas as cartas contidas em um deck específico.",
+    description=(
+        "Retorna todas as cartas contidas em um deck específico. "
+        "Envia ETag da página e responde 304 a um If-None-Match que case com ele."
+    ),
     responses={
         200: {"description": "Cartas recuperadas com sucesso"},
+        304: {"description": "A página não mudou desde o ETag informado"},
         404: {"description": "Deck não encontrado"}
     }
 )
-async def get_deck_cards(deck_id: str):
+async def get_deck_cards(deck_id: str, request: Request, response: Response):
     deck = await Deck.get(deck_id)
     
     if not deck:
         raise HTTPException(404, "Deck não encontrado")
 
     card_ids = [c.ref.id for c in deck.cards]
+    page = await apaginate(
+        Card.find({"_id": {"$in": card_ids}}).sort("_id")
+    )
+    unchanged = not_modified(request, response, page_etag(page, Card.get_collection_name()))
+    if unchanged:
+        return unchanged
+    return page
 
-    return await apaginate(
-        Card.find({"_id": {"$in": card_ids}})
-    )
\ No newline at end of file
+@router.get(
+    "/{deck_id}/cards/cursor", 
+    response_model=CursorPage[Card],
+    status_code=status.HTTP_200_OK,
+    summary="Listar cartas do deck (cursor)",
+    description="Retorna as cartas de um deck com paginação por cursor.",
+    responses={
+        200: {"description": "Cartas recuperadas com sucesso"},
+        400: {"description": "Cursor inválido"},
+        404: {"description": "Deck não encontrado"}
+    }
+)
+async def get_deck_cards_cursor(
+    deck_id: str,
+    params: CursorParams = Depends(cursor_params)
+):
+    deck = await Deck.get(deck_id)
+    
+    if not deck:
+        raise HTTPException(404, "Deck não encontrado")
+
+    card_ids = [c.ref.id for c in deck.cards]
+
+    return await keyset_paginate(
+        Card.find({"_id": {"$in": card_ids}}),
+        params
+    )
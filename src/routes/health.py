@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Response, status
+
+from src.core import health
+
+router = APIRouter(
+    prefix="/health",
+    tags=["Health"]
+)
+
+
+@router.get(
+    "/live",
+    status_code=status.HTTP_200_OK,
+    summary="Liveness",
+    description="Indica apenas que o processo está de pé e atendendo requisições. Não consulta o banco.",
+    responses={
+        200: {"description": "Processo ativo"}
+    }
+)
+async def liveness():
+    return {"status": health.OK}
+
+
+@router.get(
+    "/ready",
+    status_code=status.HTTP_200_OK,
+    summary="Readiness",
+    description=(
+        "Verifica o banco (ping com timeout), a saturação do pool de conexões e o estado dos índices. "
+        "Retorna ok, degraded (atende, mas com problemas) ou down (503). "
+        "O resultado é reaproveitado por alguns segundos."
+    ),
+    responses={
+        200: {"description": "Aplicação pronta (ok ou degraded)"},
+        503: {"description": "Aplicação indisponível: banco inacessível"}
+    }
+)
+async def readiness(response: Response):
+    result = await health.readiness()
+    if result["status"] == health.DOWN:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return result
+
+
+@router.get(
+    "",
+    status_code=status.HTTP_200_OK,
+    summary="Health check",
+    description="Mesmo resultado de /health/ready.",
+    responses={
+        200: {"description": "Aplicação pronta (ok ou degraded)"},
+        503: {"description": "Aplicação indisponível: banco inacessível"}
+    }
+)
+async def health_check(response: Response):
+    return await readiness(response)
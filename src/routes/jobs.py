@@ -0,0 +1,105 @@
+from typing import Optional
+from beanie import PydanticObjectId
+from fastapi import APIRouter, HTTPException, Path, Query, status
+from fastapi_pagination import Page
+from fastapi_pagination.ext.beanie import apaginate
+
+from src.core.jobs import JOB_HANDLERS, UnknownJobKind, scheduler
+from src.models.enums.enums import JobStatus
+from src.models.job import Job, JobCreate
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
+
+@router.post(
+    "/",
+    response_model=Job,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Enfileirar tarefa",
+    description="Enfileira uma tarefa em background e retorna o job criado; o andamento é consultado em GET /jobs/{job_id}.",
+    responses={
+        202: {"description": "Tarefa enfileirada"},
+        400: {"description": "Tipo de tarefa desconhecido"}
+    }
+)
+async def submit_job(payload: JobCreate):
+    try:
+        return await scheduler.submit(payload.kind, payload.params)
+    except UnknownJobKind:
+        raise HTTPException(400, f"Tipo de tarefa desconhecido: {payload.kind}")
+
+
+@router.get(
+    "/",
+    response_model=Page[Job],
+    status_code=status.HTTP_200_OK,
+    summary="Listar tarefas",
+    description="Retorna as tarefas paginadas, das mais recentes para as mais antigas, opcionalmente filtradas por status.",
+    responses={
+        200: {"description": "Lista de tarefas retornada com sucesso"}
+    }
+)
+async def list_jobs(
+    job_status: Optional[JobStatus] = Query(None, alias="status", description="Filtrar por status")
+):
+    query = {"status": job_status} if job_status is not None else {}
+    return await apaginate(Job.find(query).sort("-created_at"))
+
+
+@router.get(
+    "/kinds",
+    status_code=status.HTTP_200_OK,
+    summary="Tipos de tarefa",
+    description="Lista os tipos de tarefa aceitos por POST /jobs e o estado do agendador.",
+    responses={
+        200: {"description": "Tipos retornados com sucesso"}
+    }
+)
+async def list_job_kinds():
+    return {
+        "kinds": [{"kind": kind, "description": description} for kind, (_, description) in JOB_HANDLERS.items()],
+        "scheduler": scheduler.info(),
+    }
+
+
+@router.get(
+    "/{job_id}",
+    response_model=Job,
+    status_code=status.HTTP_200_OK,
+    summary="Consultar tarefa",
+    description="Retorna status, progresso e resultado (ou erro) de uma tarefa.",
+    responses={
+        200: {"description": "Tarefa encontrada"},
+        404: {"description": "Tarefa não encontrada"}
+    }
+)
+async def get_job(
+    job_id: PydanticObjectId = Path(..., description="ID da tarefa")
+):
+    job = await Job.get(job_id)
+    if not job:
+        raise HTTPException(404, "Tarefa não encontrada")
+    return job
+
+
+@router.post(
+    "/{job_id}/cancel",
+    response_model=Job,
+    status_code=status.HTTP_200_OK,
+    summary="Cancelar tarefa",
+    description="Cancela uma tarefa na fila ou em execução. Tarefas já encerradas são retornadas sem alteração.",
+    responses={
+        200: {"description": "Tarefa cancelada (ou já encerrada)"},
+        404: {"description": "Tarefa não encontrada"}
+    }
+)
+async def cancel_job(
+    job_id: PydanticObjectId = Path(..., description="ID da tarefa")
+):
+    job = await scheduler.cancel(job_id)
+    if not job:
+        raise HTTPException(404, "Tarefa não encontrada")
+    return job
@@ -0,0 +1,96 @@
+from beanie import PydanticObjectId
+from fastapi import APIRouter, HTTPException, Path, Query, status
+
+from src.core.cache import get_many_cached
+from src.core.cooccurrence import engine
+from src.models.card import Card
+from src.models.enums.enums import DeckFormat
+
+router = APIRouter(
+    prefix="/meta",
+    tags=["Meta"]
+)
+
+
+def ensure_ready():
+    if engine.status in ("pending", "building", "failed"):
+        raise HTTPException(
+            status_code=503,
+            detail=f"Índice de co-ocorrência indisponível (status: {engine.status})"
+        )
+
+
+async def with_names(rows: list[dict]) -> list[dict]:
+    cards = await get_many_cached(Card, [row["card_id"] for row in rows])
+    for row in rows:
+        card = cards.get(row["card_id"])
+        row["name"] = card.name if card else None
+    return rows
+
+
+def serialize(rows: list[dict]) -> list[dict]:
+    return [{**row, "card_id": str(row["card_id"])} for row in rows]
+
+
+@router.get(
+    "/{format}/top-cards",
+    status_code=status.HTTP_200_OK,
+    summary="Cartas mais jogadas",
+    description="Retorna as cartas presentes em mais decks do formato, com a fração dos decks que as usam. Servido da memória.",
+    responses={
+        200: {"description": "Ranking retornado com sucesso"},
+        503: {"description": "Índice de co-ocorrência ainda sendo montado"}
+    }
+)
+async def top_cards(
+    format: DeckFormat,
+    k: int = Query(20, ge=1, le=500, description="Quantidade de cartas"),
+    names: bool = Query(False, description="Inclui o nome das cartas (lido do cache)")
+):
+    ensure_ready()
+    rows = engine.top_cards(format, k)
+    if names:
+        rows = await with_names(rows)
+    return serialize(rows)
+
+
+@router.get(
+    "/{format}/cards/{card_id}/together",
+    status_code=status.HTTP_200_OK,
+    summary="Cartas jogadas junto",
+    description=(
+        "Retorna as cartas que mais aparecem nos mesmos decks que a carta informada, "
+        "ordenadas pela similaridade de cosseno. Servido da memória."
+    ),
+    responses={
+        200: {"description": "Cartas retornadas com sucesso"},
+        404: {"description": "Carta não aparece em nenhum deck do formato"},
+        503: {"description": "Índice de co-ocorrência ainda sendo montado"}
+    }
+)
+async def similar_cards(
+    format: DeckFormat,
+    card_id: PydanticObjectId = Path(..., description="ID da carta"),
+    k: int = Query(20, ge=1, le=500, description="Quantidade de cartas"),
+    names: bool = Query(False, description="Inclui o nome das cartas (lido do cache)")
+):
+    ensure_ready()
+    rows = engine.similar_cards(format, card_id, k)
+    if rows is None:
+        raise HTTPException(404, f"Carta {card_id} não aparece em nenhum deck {format.value}")
+    if names:
+        rows = await with_names(rows)
+    return serialize(rows)
+
+
+@router.get(
+    "/status",
+    status_code=status.HTTP_200_OK,
+    summary="Estado do índice de co-ocorrência",
+    description="Retorna o estado do último build e o tamanho do índice por formato.",
+    responses={
+        200: {"description": "Estado retornado com sucesso"}
+    }
+)
+async def cooccurrence_status():
+    return engine.info()
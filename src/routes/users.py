@@ -1,13 +1,18 @@
-from typing import Dict
-from fastapi import APIRouter, HTTPException, status, Path
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Path, Query
 from beanie import PydanticObjectId
 from fastapi_pagination import Page
-from fastapi_pagination.ext.beanie import apaginate
+from pymongo.errors import DuplicateKeyError
 
-from src.models.user import User, UserCreate, UserRead, UserUpdate
+from src.models.user import User, UserCreate, UserRead, UserReadProjection, UserUpdate
 from src.models.deck import Deck
+from src.core import cascade
+from src.core.cascade import DeletePolicy
+from src.core.conditional import document_etag, not_modified, save_if_match
+from src.core.pagination import CursorPage, CursorParams, apaginate_profile, cursor_params, keyset_paginate
+from src.core.responses import FastJSONRoute
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=FastJSONRoute)
 
 @router.post(
     "/", 
@@ -31,28 +36,52 @@ async def create_user(data: UserCreate):
         email=data.email,
         password=data.password
     )
-    await user.insert()
+    try:
+        await user.insert()
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email já cadastrado!")
     return user
 
+@router.get(
+    "/cursor", 
+    response_model=CursorPage[UserRead], 
+    status_code=status.HTTP_200_OK,
+    summary="Listar usuários (cursor)",
+    description="Lista os usuários com paginação por cursor, sem count e sem skip.",
+    responses={
+        200: {"description": "Lista de usuários recuperada com sucesso"},
+        400: {"description": "Cursor inválido"}
+    }
+)
+async def list_users_cursor(params: CursorParams = Depends(cursor_params)):
+    """Retorna todos os usuários com paginação por cursor"""
+    return await keyset_paginate(User.find_all().project(UserReadProjection), params)
+
 @router.get(
     "/{user_id}", 
     response_model=UserRead, 
     status_code=status.HTTP_200_OK,
     summary="Buscar usuário por ID",
-    description="Retorna os detalhes públicos de um usuário específico.",
+    description="Retorna os detalhes públicos de um usuário específico. Envia ETag e responde 304 a um If-None-Match que case com ele.",
     responses={
         200: {"description": "Usuário encontrado"},
+        304: {"description": "O usuário não mudou desde o ETag informado"},
         404: {"description": "Usuário não encontrado"},
         422: {"description": "ID inválido"}
     }
 )
 async def get_user_by_id(
+    request: Request,
+    response: Response,
     user_id: PydanticObjectId = Path(..., description="ID único do usuário (ObjectID)")
 ):
     """Busca um usuário pelo ID"""
     user = await User.get(user_id)
     if not user:
         raise HTTPException(404, f"Usuário com ID {user_id} não existe!")
+    unchanged = not_modified(request, response, document_etag(user))
+    if unchanged:
+        return unchanged
     return user
 
 @router.get(
@@ -67,22 +96,28 @@ async def get_user_by_id(
 )
 async def list_users():
     """Retorna todos os usuários com paginação"""
-    return await apaginate(User.find_all())
+    return await apaginate_profile(User, "lists", projection_model=UserReadProjection)
 
 @router.put(
     "/{user_id}", 
     response_model=UserRead, 
     status_code=status.HTTP_200_OK,
     summary="Atualizar usuário",
-    description="Atualiza nome, email ou senha de um usuário existente.",
+    description=(
+        "Atualiza nome, email ou senha de um usuário existente. "
+        "Com If-Match, só grava se o usuário ainda estiver na versão do ETag informado."
+    ),
     responses={
         200: {"description": "Usuário atualizado com sucesso"},
         400: {"description": "Erro de Requisição: Nenhum dado enviado para atualização"},
         404: {"description": "Usuário não encontrado"},
+        412: {"description": "If-Match não confere: o usuário foi alterado por outra requisição"},
         422: {"description": "Erro de Validação"}
     }
 )
 async def update_user(
+    request: Request,
+    response: Response,
     user_id: PydanticObjectId = Path(..., description="ID do usuário a ser atualizado"), 
     updated_user: UserUpdate = None
 ):
@@ -99,26 +134,39 @@ async def update_user(
     for key, value in changes.items():
         setattr(user, key, value)
     
-    await user.save()
+    try:
+        await save_if_match(request, user)
+    except DuplicateKeyError:
+        raise HTTPException(400, "Email já cadastrado!")
+    response.headers["ETag"] = document_etag(user)
     return user
 
 @router.delete(
     "/{user_id}", 
-    status_code=status.HTTP_204_NO_CONTENT,
+    status_code=status.HTTP_200_OK,
     summary="Excluir usuário",
-    description="Remove permanentemente um usuário do banco de dados.",
+    description=(
+        "Remove permanentemente um usuário. Com policy=cascade os decks do usuário são apagados junto "
+        "(um delete_many); com policy=restrict a exclusão é recusada se ele ainda tem decks."
+    ),
     responses={
-        204: {"description": "Usuário removido com sucesso"},
+        200: {"description": "Usuário removido; retorna quantos documentos foram afetados"},
         404: {"description": "Usuário não encontrado"},
+        409: {"description": "Política restrict: o usuário ainda tem decks"},
         422: {"description": "ID inválido"}
     }
 )
 async def delete_user(
-    user_id: PydanticObjectId = Path(..., description="ID do usuário a ser excluído")
+    user_id: PydanticObjectId = Path(..., description="ID do usuário a ser excluído"),
+    policy: Optional[DeletePolicy] = Query(None, description="cascade ou restrict (padrão: DELETE_POLICY_USER)")
 ):
     """Deleta um usuário"""
     user = await User.get(user_id)
     if not user:
         raise HTTPException(404, f"Usuário com ID {user_id} não existe!")
 
-    await user.delete()
\ No newline at end of file
+    try:
+        deleted = await cascade.delete_user(user, policy or cascade.DELETE_POLICY_USER)
+    except cascade.DeleteRestricted as e:
+        raise HTTPException(409, {"message": e.message, "references": e.references})
+    return {"message": "Usuário removido com sucesso", "deleted": deleted}
\ No newline at end of file
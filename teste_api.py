@@ -278,7 +278,8 @@ def run_tests():
 
         # 5.1 Deletar Carta
         response = client.delete(f"/cards/{card_id_1}")
-        assert response.status_code == 204
+        assert response.status_code == 200
+        assert response.json()["deleted"]["cards"] == 1
         print(f"✅ DELETE /cards/{{id}} - Carta deletada")
 
         # 5.2 Deletar Coleção
@@ -288,7 +289,7 @@ def run_tests():
 
         # 5.3 Deletar Usuário
         response = client.delete(f"/users/{user_id}")
-        assert response.status_code == 204
+        assert response.status_code == 200
         print(f"✅ DELETE /users/{{id}} - Usuário deletado")
 
         print("\n✨ Todos os testes foram concluídos com sucesso! ✨")
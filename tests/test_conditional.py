@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+from bson import ObjectId
+from fastapi import Response
+from starlette.requests import Request
+
+from src.core.conditional import make_etag, not_modified, page_etag
+
+
+def request(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_make_etag_is_a_stable_quoted_tag():
+    deck_id = ObjectId()
+    etag = make_etag("decks", deck_id, 3)
+
+    assert etag == make_etag("decks", deck_id, 3)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag != make_etag("decks", deck_id, 4)
+    assert etag != make_etag("cards", deck_id, 3)
+
+
+def test_page_etag_is_weak_and_follows_revisions():
+    item = SimpleNamespace(id=ObjectId(), revision=1)
+    page = SimpleNamespace(items=[item], page=1, size=50, total=1)
+    etag = page_etag(page, "decks")
+
+    assert etag.startswith('W/"')
+    item.revision = 2
+    assert page_etag(page, "decks") != etag
+
+
+def test_not_modified_sets_etag_without_if_none_match():
+    response = Response()
+
+    assert not_modified(request(), response, '"abc"') is None
+    assert response.headers["ETag"] == '"abc"'
+
+
+def test_not_modified_returns_304_for_matching_tags():
+    for header in ['"abc"', 'W/"abc"', '"other", "abc"', "*"]:
+        result = not_modified(request(if_none_match=header), Response(), '"abc"')
+        assert result is not None and result.status_code == 304
+        assert result.headers["ETag"] == '"abc"'
+
+
+def test_not_modified_compares_weak_etags_weakly():
+    result = not_modified(request(if_none_match='"abc"'), Response(), 'W/"abc"')
+
+    assert result is not None and result.status_code == 304
+
+
+def test_not_modified_ignores_other_tags():
+    assert not_modified(request(if_none_match='"other"'), Response(), '"abc"') is None
@@ -0,0 +1,84 @@
+import pytest
+
+from src.core import cooccurrence
+from src.core.cooccurrence import FormatBuilder, FormatIndex
+
+DECKS = [[0, 1, 2], [0, 1], [1, 3], [0, 2, 3]]
+
+
+def build(decks) -> FormatIndex:
+    index = FormatIndex()
+    for cards in decks:
+        index.add(cards)
+    return index
+
+
+def test_add_counts_decks_cards_and_pairs():
+    index = build(DECKS)
+
+    assert index.decks == 4
+    assert index.totals() == {0: 3, 1: 3, 2: 2, 3: 2}
+    assert index.row(0) == {0: 3, 1: 2, 2: 2, 3: 1}
+    assert index.pair_count() == 6
+
+
+def test_remove_undoes_add():
+    index = build(DECKS)
+    index.remove([0, 2, 3])
+
+    assert index.decks == 3
+    assert index.totals() == build(DECKS[:3]).totals()
+    assert index.row(3) == {3: 1, 1: 1}
+
+
+def test_top_orders_by_count_then_card():
+    assert build(DECKS).top(3) == [(0, 3), (1, 3), (2, 2)]
+
+
+def test_similar_ranks_by_cosine():
+    similar = build(DECKS).similar(2)
+
+    # 3 aparece com 2 tantas vezes quanto 1, mas é menos popular no formato
+    assert [other for other, _, _ in similar] == [0, 3, 1]
+    assert [together for _, together, _ in similar] == [2, 1, 1]
+    assert similar[1][2] == pytest.approx(1 / (2 * 2) ** 0.5)
+
+
+def test_drop_card_zeroes_row_and_column_but_keeps_decks():
+    index = build(DECKS)
+    index.drop_card(0)
+
+    assert index.decks == 4
+    assert 0 not in index.totals()
+    assert index.row(0) == {}
+    assert 0 not in index.row(1)
+    assert index.totals() == {1: 3, 2: 2, 3: 2}
+
+
+def test_caches_are_invalidated_on_change():
+    index = build(DECKS)
+    assert index.top(1) == [(0, 3)]
+    index.add([1])
+    assert index.top(1) == [(1, 4)]
+
+
+@pytest.mark.skipif(cooccurrence.sparse is None, reason="numpy/scipy não instalados")
+def test_sparse_base_matches_the_counters():
+    builder = FormatBuilder()
+    builder.add_batch(DECKS[:2], size=4)
+    builder.add_batch(DECKS[2:], size=4)
+    index = builder.build()
+    expected = build(DECKS)
+
+    assert index.decks == expected.decks
+    assert index.totals() == expected.totals()
+    assert all(index.row(card) == expected.row(card) for card in range(4))
+    assert index.pair_count() == expected.pair_count()
+
+    # Delta sobre a base: remover um deck e zerar uma carta
+    index.remove(DECKS[3])
+    expected.remove(DECKS[3])
+    index.drop_card(1)
+    expected.drop_card(1)
+    assert index.totals() == expected.totals()
+    assert all({k: v for k, v in index.row(card).items() if v} == expected.row(card) for card in range(4))
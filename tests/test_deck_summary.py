@@ -0,0 +1,209 @@
+import asyncio
+import copy
+
+import pytest
+from bson import DBRef, ObjectId
+from fastapi import HTTPException
+
+from src.models.deck import Deck
+from src.routes import decks as deck_routes
+
+MISSING = object()
+
+
+def _path(value, parts):
+    for index, part in enumerate(parts):
+        if isinstance(value, DBRef):
+            value = {"$ref": value.collection, "$id": value.id}
+        if isinstance(value, list):
+            values = [_path(item, parts[index:]) for item in value]
+            return [item for item in values if item is not MISSING]
+        if not isinstance(value, dict):
+            return MISSING
+        value = value.get(part, MISSING)
+    return value
+
+
+def evaluate(expr, doc, variables):
+    """
+    Avalia o subconjunto de expressões de agregação usado pelos updates em
+    pipeline de src/core/deck_summary.py, com a mesma semântica de campo
+    ausente do servidor (um $filter sobre campo ausente devolve null).
+    """
+    if isinstance(expr, str) and expr.startswith("$$"):
+        name, *parts = expr[2:].split(".")
+        return _path(variables[name], parts)
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _path(doc, expr[1:].split("."))
+    if isinstance(expr, list):
+        return [evaluate(item, doc, variables) for item in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if len(expr) != 1 or not next(iter(expr)).startswith("$"):
+        return {key: evaluate(value, doc, variables) for key, value in expr.items()}
+
+    ((op, args),) = expr.items()
+    if op == "$literal":
+        return args
+
+    def arg(value):
+        result = evaluate(value, doc, variables)
+        return None if result is MISSING else result
+
+    if op == "$ifNull":
+        value = arg(args[0])
+        return arg(args[1]) if value is None else value
+    if op == "$add":
+        return sum(arg(value) for value in args)
+    if op == "$eq":
+        return arg(args[0]) == arg(args[1])
+    if op == "$in":
+        return arg(args[0]) in arg(args[1])
+    if op == "$not":
+        return not arg(args[0])
+    if op == "$getField":
+        value = arg(args["input"])
+        if isinstance(value, DBRef):
+            value = {"$ref": value.collection, "$id": value.id}
+        return value.get(arg(args["field"]), MISSING)
+    if op == "$size":
+        return len(arg(args))
+    if op in ("$filter", "$map"):
+        items = arg(args["input"])
+        if items is None:
+            return None
+        results = [evaluate(args.get("in", args.get("cond")), doc, {**variables, args["as"]: item}) for item in items]
+        if op == "$map":
+            return results
+        return [item for item, keep in zip(items, results) if keep not in (None, False, 0, MISSING)]
+    if op == "$setUnion":
+        values = [arg(value) for value in args]
+        if any(value is None for value in values):
+            return None
+        return sorted({item for value in values for item in value})
+    if op == "$arrayToObject":
+        items = arg(args)
+        return None if items is None else {item["k"]: item["v"] for item in items}
+    raise NotImplementedError(op)
+
+
+class FakeDecks:
+    """
+    Collection de decks em memória com as operações que o helper usa.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.changes = []
+
+    async def find_one_and_update(self, query, pipeline, return_document):
+        doc = self.docs.get(query["_id"])
+        if doc is None or not set(query["cards.$id"]["$all"]) <= {ref.id for ref in doc.get("cards", [])}:
+            return None
+        for stage in pipeline:
+            doc.update({field: evaluate(expr, doc, {}) for field, expr in stage["$set"].items()})
+        return copy.deepcopy(doc)
+
+    async def distinct(self, key, query):
+        doc = self.docs.get(query["_id"])
+        return [] if doc is None else [ref.id for ref in doc.get("cards", [])]
+
+    def find(self, query):
+        docs = self.docs
+
+        class Query:
+            async def count(self):
+                return int(query["_id"] in docs)
+
+        return Query()
+
+
+CARDS = {
+    ObjectId(): ("Dragão Azul", "Dragon", "Rare"),
+    ObjectId(): ("Bola de Fogo", "Spell", "Common"),
+    ObjectId(): ("Guerreiro", "Warrior", "Common"),
+}
+A, B, C = CARDS
+
+
+def deck_document(card_ids, summary=True) -> dict:
+    doc = {
+        "_id": ObjectId(),
+        "name": "Deck de teste",
+        "format": "Standard",
+        "owner": DBRef("users", ObjectId()),
+        "cards": [DBRef("cards", card_id) for card_id in card_ids],
+    }
+    if summary:
+        doc["card_summary"] = [
+            {"id": card_id, "name": name, "type": card_type, "rarity": rarity}
+            for card_id, (name, card_type, rarity) in ((card_id, CARDS[card_id]) for card_id in card_ids)
+        ]
+        doc["type_counts"] = {"Dragon": 1, "Spell": 1, "Warrior": 1}
+        doc["rarity_counts"] = {"Rare": 1, "Common": 2}
+        doc["revision"] = 4
+    return doc
+
+
+@pytest.fixture
+def decks(monkeypatch):
+    decks = FakeDecks()
+    monkeypatch.setattr(Deck, "get_pymongo_collection", classmethod(lambda cls: decks))
+    monkeypatch.setattr(Deck, "distinct", classmethod(lambda cls, key, query: decks.distinct(key, query)))
+    monkeypatch.setattr(Deck, "find", classmethod(lambda cls, query: decks.find(query)))
+    monkeypatch.setattr(deck_routes, "deck_changed", lambda *args: decks.changes.append(args))
+    return decks
+
+
+def remove(deck_id, card_ids):
+    return asyncio.run(deck_routes.remove_cards_from_deck_helper(deck_id, [str(cid) for cid in card_ids]))
+
+
+def test_removes_cards_from_references_summary_and_counts(decks):
+    doc = deck_document([A, B, C])
+    decks.docs[doc["_id"]] = doc
+
+    deck = remove(doc["_id"], [A, B])
+
+    assert [ref.ref.id for ref in deck.cards] == [C]
+    assert [card.id for card in deck.card_summary] == [C]
+    assert deck.type_counts == {"Warrior": 1}
+    assert deck.rarity_counts == {"Common": 1}
+    assert deck.revision == 5
+    assert decks.docs[doc["_id"]]["revision"] == 5
+    assert decks.changes == [(doc["_id"], deck.format, [C, A, B], deck.format, [C])]
+
+
+def test_deck_without_card_summary_is_treated_as_empty(decks):
+    doc = deck_document([A, B], summary=False)
+    decks.docs[doc["_id"]] = doc
+
+    deck = remove(doc["_id"], [A])
+
+    assert [ref.ref.id for ref in deck.cards] == [B]
+    assert deck.card_summary == []
+    assert deck.type_counts == {}
+    assert deck.rarity_counts == {}
+    assert deck.revision == 1
+
+
+def test_cards_not_in_deck_are_listed_and_nothing_is_written(decks):
+    doc = deck_document([A, B])
+    decks.docs[doc["_id"]] = doc
+    before = copy.deepcopy(doc)
+
+    with pytest.raises(HTTPException) as error:
+        remove(doc["_id"], [A, C, "invalido"])
+
+    assert error.value.status_code == 404
+    assert error.value.detail["not_in_deck"] == ["invalido", str(C)]
+    assert decks.docs[doc["_id"]] == before
+    assert decks.changes == []
+
+
+def test_missing_deck_is_404(decks):
+    with pytest.raises(HTTPException) as error:
+        remove(ObjectId(), [A])
+
+    assert error.value.status_code == 404
+    assert error.value.detail == "Deck não encontrado"
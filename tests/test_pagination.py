@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from src.core.pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize(
+    "sort_value",
+    [ObjectId(), "Dragão Azul", 42, datetime(2024, 1, 1, 12, 30), None],
+)
+def test_cursor_round_trips_sort_value_and_id(sort_value):
+    last_id = ObjectId()
+    cursor = encode_cursor(sort_value, last_id)
+
+    assert decode_cursor(cursor) == (sort_value, last_id)
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor("a" * 7, ObjectId())
+
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+@pytest.mark.parametrize("cursor", ["", "não-é-base64", "e30", "bm90IGpzb24"])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,33 @@
+import re
+
+from src.core.search import build_name_filter, normalize_name
+from src.models.enums.enums import SearchMode
+
+
+def test_normalize_name_folds_accents_case_and_spaces():
+    assert normalize_name("  Dragão   AZUL ") == "dragao azul"
+
+
+def test_contains_escapes_regex_metacharacters():
+    query = "Dragon (EX) .* [1]+"
+    condition = build_name_filter(query)["name"]
+
+    assert condition == {"$regex": re.escape(query), "$options": "i"}
+    pattern = re.compile(condition["$regex"], re.IGNORECASE)
+    assert pattern.search("Black dragon (ex) .* [1]+ token")
+    assert not pattern.search("Dragon EX 11")
+
+
+def test_prefix_is_anchored_on_the_normalized_name():
+    condition = build_name_filter("Dragão (Azul)", SearchMode.prefix)
+
+    assert list(condition) == ["name_normalized"]
+    pattern = condition["name_normalized"]["$regex"]
+    assert pattern.startswith("^")
+    assert re.match(pattern, "dragao (azul) ancestral")
+    assert not re.match(pattern, "o dragao (azul)")
+    assert not re.match(pattern, "dragao azul")
+
+
+def test_text_mode_uses_the_text_index():
+    assert build_name_filter("Dragon", SearchMode.text) == {"$text": {"$search": "Dragon"}}
@@ -0,0 +1,96 @@
+import pytest
+from bson import ObjectId
+
+from src.core import similarity
+from src.core.similarity import SimilarityIndex, minhash
+from src.models.enums.enums import DeckFormat
+
+# IDs fixos: as assinaturas (e os scores) ficam determinísticos
+CARDS = [ObjectId(f"{i:024x}") for i in range(1, 21)]
+DECKS = [ObjectId(f"{i:024x}") for i in range(101, 105)]
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(similarity, "DECK_SIMILARITY_ENABLED", True)
+    index = SimilarityIndex(tmp_path / "decks.idx", permutations=64, bands=16)
+    index.status = "ready"
+    return index
+
+
+def test_minhash_depends_only_on_the_set_of_cards():
+    signature = minhash(CARDS[:5], 64)
+
+    assert len(signature) == 64
+    assert minhash(list(reversed(CARDS[:5])) + CARDS[:2], 64) == signature
+    assert minhash(CARDS[5:10], 64) != signature
+    assert minhash([], 64) is None
+
+
+def test_minhash_estimates_jaccard():
+    a = minhash(CARDS[:10], 256)
+    b = minhash(CARDS[5:15], 256)
+    estimate = sum(x == y for x, y in zip(a, b)) / 256
+
+    # Jaccard real: 5 / 15
+    assert estimate == pytest.approx(1 / 3, abs=0.15)
+
+
+def test_similar_ranks_by_estimated_jaccard(index):
+    deck, near, far, other = DECKS
+    index.on_deck_changed(deck, DeckFormat.Standard, CARDS[:10])
+    index.on_deck_changed(near, DeckFormat.Standard, CARDS[:9])
+    index.on_deck_changed(far, DeckFormat.Standard, CARDS[:5] + CARDS[15:])
+    index.on_deck_changed(other, DeckFormat.Modern, CARDS[:10])
+
+    result = index.similar(deck, 10)
+    assert [item["deck_id"] for item in result][:2] == [str(other), str(near)]
+    assert result[0] == {"deck_id": str(other), "format": "Modern", "score": 1.0}
+
+    standard = index.similar(deck, 10, DeckFormat.Standard)
+    assert [item["deck_id"] for item in standard][0] == str(near)
+    assert all(item["format"] == "Standard" for item in standard)
+    assert index.similar(ObjectId(), 10) is None
+
+
+def test_changes_update_buckets_and_invalidate_results(index):
+    deck, twin = DECKS[:2]
+    index.on_deck_changed(deck, DeckFormat.Standard, CARDS[:10])
+    index.on_deck_changed(twin, DeckFormat.Standard, CARDS[:10])
+    assert [item["deck_id"] for item in index.similar(deck, 5)] == [str(twin)]
+
+    index.on_deck_changed(twin, None, [])
+    assert index.similar(deck, 5) == []
+    assert index.similar(twin, 5) is None
+    assert all(twin not in bucket for buckets in index.buckets for bucket in buckets.values())
+
+    index.on_deck_changed(deck, DeckFormat.Standard, [])
+    assert index.similar(deck, 5) is None
+
+
+def test_changes_are_ignored_until_the_index_is_built(index):
+    index.status = "pending"
+    index.on_deck_changed(ObjectId(), DeckFormat.Standard, CARDS)
+
+    assert index.signatures == {}
+
+
+def test_dump_and_restore_round_trip(index, tmp_path):
+    decks = {DECKS[i]: (deck_format, CARDS[i:i + 8]) for i, deck_format in enumerate(DeckFormat)}
+    for deck_id, (deck_format, cards) in decks.items():
+        index.on_deck_changed(deck_id, deck_format, cards)
+
+    restored = SimilarityIndex(tmp_path / "other.idx", permutations=64, bands=16)
+    assert restored._restore(index._dump())
+    assert restored.signatures == index.signatures
+    assert restored.formats == index.formats
+    assert restored.buckets == index.buckets
+
+    incompatible = SimilarityIndex(tmp_path / "other.idx", permutations=32, bands=16)
+    assert not incompatible._restore(index._dump())
+    assert not incompatible._restore(b"lixo")
+
+
+def test_permutations_must_be_a_multiple_of_bands(tmp_path):
+    with pytest.raises(ValueError):
+        SimilarityIndex(tmp_path / "decks.idx", permutations=64, bands=10)